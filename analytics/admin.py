@@ -1,10 +1,10 @@
 from django.contrib import admin
-from .models import ReportSchedule, SavedReport, Dashboard, DashboardWidget
+from .models import ReportSchedule, SavedReport, Dashboard, DashboardWidget, DailyStoreRollup, RollupWatermark, ExportJob, CustomerStats
 
 
 @admin.register(ReportSchedule)
 class ReportScheduleAdmin(admin.ModelAdmin):
-    list_display = ('name', 'report_type', 'frequency', 'next_run_date', 'is_active', 'created_by')
+    list_display = ('name', 'report_type', 'frequency', 'next_run_date', 'last_run_date', 'is_active', 'created_by')
     list_filter = ('report_type', 'frequency', 'is_active')
     search_fields = ('name', 'description')
     date_hierarchy = 'next_run_date'
@@ -29,4 +29,33 @@ class DashboardAdmin(admin.ModelAdmin):
 class DashboardWidgetAdmin(admin.ModelAdmin):
     list_display = ('title', 'dashboard', 'widget_type', 'position_x', 'position_y', 'width', 'height')
     list_filter = ('widget_type', 'dashboard')
-    search_fields = ('title', 'dashboard__name')
\ No newline at end of file
+    search_fields = ('title', 'dashboard__name')
+
+
+@admin.register(DailyStoreRollup)
+class DailyStoreRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'store', 'rentals', 'rental_revenue', 'expenses', 'job_cards', 'parts_consumed')
+    list_filter = ('store',)
+    date_hierarchy = 'date'
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_processed', 'last_run_days', 'date_updated')
+
+
+@admin.register(CustomerStats)
+class CustomerStatsAdmin(admin.ModelAdmin):
+    list_display = ('customer', 'rental_count', 'lifetime_spend', 'first_rental', 'last_rental', 'segment')
+    list_filter = ('segment',)
+    list_select_related = ('customer',)
+    search_fields = ('customer__first_name', 'customer__last_name', 'customer__email')
+    readonly_fields = ('date_updated',)
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('export_type', 'file_format', 'status', 'requested_by', 'row_count', 'date_created', 'finished_at')
+    list_filter = ('export_type', 'file_format', 'status')
+    search_fields = ('requested_by__username',)
+    date_hierarchy = 'date_created'
@@ -0,0 +1,139 @@
+"""
+Customer metrics: rental count, lifetime spend, first/last rental and segment
+
+Customer analytics read the CustomerStats table (one row per customer)
+instead of aggregating the rental table per request. Stats are computed in
+one grouped pass over customers and their rentals; refresh_customer_stats()
+recomputes only customers with rentals changed, or who were created, since
+the last run's watermark.
+
+Lifetime spend is the sum of Rental.total_amount. Deleted rentals leave
+their customer's stats stale until the customer is recomputed by a later
+change or a --full rebuild.
+"""
+from itertools import islice
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+from customers.models import Customer, Rental
+from .models import CustomerStats, RollupWatermark
+
+WATERMARK_NAME = 'customer_stats'
+
+# Customers recomputed per transaction (also bounds the size of the IN (...) filters)
+CUSTOMERS_PER_BATCH = 1000
+
+# Segments by rental count: (segment, fewest rentals, most rentals or None)
+SEGMENTS = (
+    ('none', 0, 0),
+    ('new', 1, 1),
+    ('occasional', 2, 5),
+    ('regular', 6, 15),
+    ('frequent', 16, None),
+)
+
+
+def segment_for(rental_count):
+    """Segment of a customer with the given number of rentals"""
+    for segment, low, high in SEGMENTS:
+        if rental_count >= low and (high is None or rental_count <= high):
+            return segment
+    return 'none'
+
+
+def _compute_stats(customer_ids=None):
+    """
+    Unsaved CustomerStats rows for the given customers (all customers when None),
+    from one grouped query over customers and their rentals
+    """
+    customers = Customer.objects.all()
+    if customer_ids is not None:
+        customers = customers.filter(pk__in=customer_ids)
+    
+    rows = customers.values('pk').annotate(
+        rental_count=Count('rentals'),
+        lifetime_spend=Sum('rentals__total_amount', default=0),
+        first_rental=Min('rentals__start_date'),
+        last_rental=Max('rentals__start_date'),
+    ).order_by()
+    
+    for row in rows.iterator():
+        yield CustomerStats(
+            customer_id=row['pk'],
+            rental_count=row['rental_count'],
+            lifetime_spend=row['lifetime_spend'],
+            first_rental=row['first_rental'],
+            last_rental=row['last_rental'],
+            segment=segment_for(row['rental_count']),
+        )
+
+
+def _replace_stats(customer_ids=None):
+    """Recompute and replace the stats rows for the given customers (all customers when None)"""
+    rows = _compute_stats(customer_ids)
+    
+    with transaction.atomic():
+        existing = CustomerStats.objects.all()
+        if customer_ids is not None:
+            existing = existing.filter(customer_id__in=customer_ids)
+        existing.delete()
+        
+        # Rows are streamed from the grouped query and inserted a batch at a time
+        while batch := list(islice(rows, CUSTOMERS_PER_BATCH)):
+            CustomerStats.objects.bulk_create(batch)
+
+
+def _changed_customers(since):
+    """Customers with rentals changed, or created themselves, since the given time"""
+    customer_ids = set(Rental.objects.filter(date_updated__gte=since).values_list(
+        'customer_id', flat=True
+    ).order_by().distinct())
+    customer_ids.update(Customer.objects.filter(date_created__gte=since).values_list('pk', flat=True))
+    return customer_ids
+
+
+def refresh_customer_stats(full=False):
+    """
+    Bring the customer stats up to date
+    
+    Args:
+        full: Rebuild every customer's stats from scratch (also done on the first run)
+    
+    Returns:
+        int: Number of customers recomputed, or None for a full rebuild
+    """
+    started = timezone.now()
+    watermark, _ = RollupWatermark.objects.get_or_create(name=WATERMARK_NAME)
+    
+    if full or watermark.last_processed is None:
+        _replace_stats()
+        customers_processed = None
+    else:
+        customer_ids = sorted(_changed_customers(watermark.last_processed))
+        for start in range(0, len(customer_ids), CUSTOMERS_PER_BATCH):
+            _replace_stats(customer_ids[start:start + CUSTOMERS_PER_BATCH])
+        customers_processed = len(customer_ids)
+    
+    # Rows changed while this run was reading are picked up by the next run
+    watermark.last_processed = started
+    watermark.save()
+    
+    return customers_processed
+
+
+def get_stats_watermark():
+    """Time the customer stats were last brought up to date, or None if never"""
+    return RollupWatermark.objects.filter(name=WATERMARK_NAME).values_list('last_processed', flat=True).first()
+
+
+def get_segment_counts():
+    """Number of customers in each segment (every segment present, zero if empty)"""
+    counts = {segment: 0 for segment, _, _ in SEGMENTS}
+    for row in CustomerStats.objects.values('segment').annotate(count=Count('pk')).order_by():
+        counts[row['segment']] = row['count']
+    return counts
+
+
+def get_top_customers(limit=10):
+    """CustomerStats of the customers with the highest lifetime spend, with the customer loaded"""
+    return CustomerStats.objects.select_related('customer').order_by('-lifetime_spend', 'customer_id')[:limit]
@@ -0,0 +1,308 @@
+"""
+Background export jobs
+
+A page queues an ExportJob with the filters it is showing; the export worker
+(python manage.py run_export_worker) builds the same queryset for the
+store the job was queued in, writes the CSV/XLSX file under MEDIA_ROOT/exports and marks
+the job completed so the user can download it from the export jobs page.
+"""
+import io
+import os
+import tempfile
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone
+from inventory.models import Scooter, Parts, Store
+from inventory.listing import filter_scooters, filter_parts, get_sort, PARTS_SORT_FIELDS, PARTS_DEFAULT_SORT
+from service.models import JobCard
+from customers.models import Rental
+from users.scope import get_store_scope
+from utils.export_utils import write_excel, write_csv
+from .models import ExportJob
+
+
+def _job_card_export(params, store):
+    """Service job cards, newest first (as on the job card list)"""
+    queryset = JobCard.objects.all().select_related('scooter', 'technician').order_by('-date_created')
+    
+    return {
+        'data': queryset.for_store(store),
+        'columns': [
+            ('job_card_number', 'Job Number'),
+            ('scooter.vin', 'Scooter VIN'),
+            ('scooter.make', 'Make'),
+            ('scooter.model', 'Model'),
+            ('description', 'Description'),
+            ('technician.username', 'Technician'),
+            ('status', 'Status'),
+            ('priority', 'Priority'),
+            ('date_created', 'Date Created'),
+            ('actual_completion', 'Completion Date'),
+            ('labor_hours', 'Labor Hours'),
+            ('labor_rate', 'Labor Rate (R)'),
+            ('total_cost', 'Total Cost (R)')
+        ],
+        'filename': 'Service_Job_Cards',
+        'title': 'Service Job Cards Report',
+        'sheet_name': 'Job Cards',
+    }
+
+
+def _scooter_export(params, store):
+    """Scooters with the scooter list's status, category and search filters"""
+    queryset = filter_scooters(Scooter.objects.for_store(store).select_related('store'), params)
+    
+    return {
+        'data': queryset.order_by('id'),
+        'columns': [
+            ('vin', 'VIN/Serial Number'),
+            ('license_number', 'License Number'),
+            ('make', 'Make'),
+            ('model', 'Model'),
+            ('category', 'Category'),
+            ('year', 'Year'),
+            ('color', 'Color'),
+            ('status', 'Status'),
+            ('mileage', 'Mileage'),
+            ('store.name', 'Store'),
+            ('purchase_date', 'Purchase Date'),
+            ('purchase_price', 'Purchase Price (R)'),
+            ('last_maintenance', 'Last Maintenance'),
+            ('notes', 'Notes')
+        ],
+        'filename': 'Scooter_Inventory',
+        'title': 'Scooter Inventory Report',
+        'sheet_name': 'Scooters',
+    }
+
+
+def _parts_export(params, store):
+    """Parts with the parts list's store, search and sort options"""
+    queryset = Parts.objects.for_store(store).select_related('store')
+    
+    store_name = "All Stores"
+    store_id = params.get('store')
+    if store_id and store_id.isdigit():
+        store_name = Store.objects.filter(id=int(store_id)).values_list('name', flat=True).first() or store_name
+    
+    search_query = params.get('search', '')
+    queryset = filter_parts(queryset, params)
+    
+    # Same sort validation as the parts list
+    sort_field = get_sort(params, PARTS_SORT_FIELDS, PARTS_DEFAULT_SORT)
+    
+    return {
+        'data': queryset.order_by(sort_field),
+        'columns': [
+            ('part_number', 'Part Number'),
+            ('name', 'Part Name'),
+            ('category', 'Category'),
+            ('store.name', 'Store Location'),
+            ('current_stock', 'Current Stock'),
+            ('reorder_level', 'Reorder Level'),
+            ('unit_price', 'Unit Price (R)'),
+            ('location_in_store', 'Location in Store'),
+            ('description', 'Description')
+        ],
+        'filename': 'Parts_Inventory_Report',
+        'title': 'Parts Inventory Report',
+        'sheet_name': 'Parts Inventory',
+        'store_name': store_name,
+        'additional_info': {
+            'Search Query': search_query if search_query else 'None',
+            'Sort Order': sort_field.replace('_', ' ').title()
+        },
+    }
+
+
+def _inventory_report_export(params, store):
+    """Parts stock and value, as in the analytics inventory CSV export"""
+    queryset = Parts.objects.for_store(store).annotate(
+        total_value=F('current_stock') * F('unit_price')
+    ).order_by('id')
+    
+    return {
+        'data': queryset,
+        'columns': [
+            ('part_number', 'Part Number'),
+            ('name', 'Name'),
+            ('store.name', 'Store'),
+            ('category', 'Category'),
+            ('current_stock', 'Current Stock'),
+            ('reorder_level', 'Reorder Level'),
+            ('unit_price', 'Unit Price'),
+            ('total_value', 'Total Value')
+        ],
+        'filename': 'inventory_report',
+        'title': 'Inventory Report',
+        'sheet_name': 'Inventory',
+    }
+
+
+def _rental_report_export(params, store):
+    """Rentals, as in the analytics rentals CSV export"""
+    queryset = Rental.objects.for_store(store).annotate(
+        customer_name=Concat('customer__first_name', Value(' '), 'customer__last_name', output_field=CharField()),
+        scooter_name=Concat('scooter__make', Value(' '), 'scooter__model', output_field=CharField()),
+        status_name=Case(
+            *[When(status=value, then=Value(label)) for value, label in Rental.STATUS_CHOICES],
+            default=F('status'),
+            output_field=CharField()
+        )
+    ).order_by('id')
+    
+    return {
+        'data': queryset,
+        'columns': [
+            ('rental_number', 'Rental Number'),
+            ('customer_name', 'Customer'),
+            ('scooter_name', 'Scooter'),
+            ('start_date', 'Start Date'),
+            ('end_date', 'End Date'),
+            ('status_name', 'Status'),
+            ('total_amount', 'Total Amount')
+        ],
+        'filename': 'rental_report',
+        'title': 'Rental Report',
+        'sheet_name': 'Rentals',
+    }
+
+
+# Export type -> function(params, store) returning the data, columns and file details
+EXPORT_DEFINITIONS = {
+    'job_cards': _job_card_export,
+    'scooters': _scooter_export,
+    'parts': _parts_export,
+    'inventory_report': _inventory_report_export,
+    'rental_report': _rental_report_export,
+}
+
+
+def queue_export(export_type, user, filters=None, file_format='xlsx'):
+    """
+    Queue an export for the export worker
+    
+    Args:
+        export_type: One of ExportJob.EXPORT_TYPES
+        user: Requesting user; the export is limited to their store
+        filters: Dict of the list page's query string filters
+        file_format: 'xlsx' or 'csv'
+    
+    Returns:
+        ExportJob instance
+    """
+    if export_type not in EXPORT_DEFINITIONS:
+        raise ValueError(f"Unknown export type: {export_type}")
+    if file_format not in dict(ExportJob.FORMAT_CHOICES):
+        raise ValueError(f"Unknown export format: {file_format}")
+    
+    return ExportJob.objects.create(
+        export_type=export_type,
+        file_format=file_format,
+        filters=filters or {},
+        store=get_store_scope(user).store,
+        requested_by=user,
+    )
+
+
+def fail_stale_export_jobs():
+    """
+    Fail running jobs started more than EXPORT_JOB_TIMEOUT seconds ago, whose
+    worker stopped or crashed before finishing them, so they do not show as
+    running forever; the user can queue the export again.
+    
+    Returns:
+        int: Number of jobs failed
+    """
+    timeout = getattr(settings, 'EXPORT_JOB_TIMEOUT', 1800)
+    now = timezone.now()
+    return ExportJob.objects.filter(status='running', started_at__lt=now - timedelta(seconds=timeout)).update(
+        status='failed',
+        error=f"The export did not finish within {timeout} seconds",
+        finished_at=now,
+    )
+
+
+def claim_export_jobs(limit):
+    """
+    Mark up to `limit` of the oldest queued jobs as running and return their ids.
+    A job is only returned to the worker whose update moved it out of 'queued',
+    so concurrent workers never produce the same export.
+    """
+    fail_stale_export_jobs()
+    
+    claimed = []
+    job_ids = ExportJob.objects.filter(status='queued').order_by('date_created').values_list('pk', flat=True)[:limit]
+    for job_id in job_ids:
+        if ExportJob.objects.filter(pk=job_id, status='queued').update(status='running', started_at=timezone.now()):
+            claimed.append(job_id)
+    return claimed
+
+
+def run_export_job(job_id):
+    """
+    Produce the file for a claimed (running) export job
+    
+    Returns:
+        ExportJob instance, completed or failed
+    """
+    job = ExportJob.objects.get(pk=job_id)
+    output = tempfile.TemporaryFile()
+    
+    try:
+        # Scoped to the store recorded when the job was queued, not the user's current store
+        spec = EXPORT_DEFINITIONS[job.export_type](job.filters, job.store_id)
+        
+        if job.file_format == 'csv':
+            text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+            row_count = write_csv(text, spec['data'], spec['columns'])
+            text.detach()
+        else:
+            row_count = write_excel(
+                output, spec['data'], spec['columns'],
+                title=spec.get('title'),
+                sheet_name=spec.get('sheet_name'),
+                store_name=spec.get('store_name'),
+                additional_info=spec.get('additional_info')
+            )
+        
+        output.seek(0)
+        job.file.save(f"{spec['filename']}_{job.pk}.{job.file_format}", File(output), save=False)
+        job.row_count = row_count
+        job.status = 'completed'
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        output.close()
+    
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'row_count', 'status', 'error', 'finished_at'])
+    return job
+
+
+def prune_export_jobs(retention_days):
+    """
+    Delete finished export jobs older than `retention_days`, with their files
+    
+    Returns:
+        int: Number of jobs deleted
+    """
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    jobs = ExportJob.objects.filter(status__in=['completed', 'failed'], finished_at__lt=cutoff)
+    
+    deleted = 0
+    for job in jobs.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        deleted += 1
+    return deleted
+
+
+def export_download_name(job):
+    """File name offered when downloading a job's export"""
+    return os.path.basename(job.file.name)
@@ -0,0 +1,148 @@
+from datetime import timedelta
+from statistics import median
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from analytics.models import ExportJob
+from customers.models import Rental
+from inventory.models import Scooter, Parts, StockTransfer, InventoryAlert
+from inventory.utils import OPEN_ALERT_STATUSES
+from service.models import JobCard
+import time
+
+# Indexes from the hot path indexing pass, dropped for the --compare baseline
+HOT_PATH_INDEXES = {
+    Rental: ['rental_status_due_idx', 'rental_start_idx', 'rental_updated_idx'],
+    Scooter: ['scooter_store_status_idx'],
+    Parts: ['parts_store_stock_idx', 'parts_low_stock_idx'],
+    StockTransfer: ['transfer_status_date_idx'],
+    InventoryAlert: ['alert_part_type_status_idx', 'alert_scooter_type_status_idx', 'alert_open_type_title_idx'],
+    JobCard: ['jobcard_status_created_idx', 'jobcard_updated_idx'],
+    ExportJob: ['exportjob_user_created_idx'],
+}
+
+
+def _hot_queries():
+    """(name, queryset) for each hot filter/sort path, using ids present in the database"""
+    now = timezone.now()
+    store_id = Scooter.objects.values_list('store_id', flat=True).first()
+    part_id = Parts.objects.values_list('pk', flat=True).first()
+    scooter_id = Scooter.objects.values_list('pk', flat=True).first()
+    user_id = ExportJob.objects.values_list('requested_by_id', flat=True).first()
+    
+    return [
+        ('Overdue sweep batch', Rental.objects.filter(
+            status='active', expected_end_date__lt=now
+        ).order_by('expected_end_date').values_list('pk', flat=True)[:500]),
+        ('Rentals started in the last 30 days', Rental.objects.filter(start_date__gte=now - timedelta(days=30))),
+        ('Rentals changed since the rollup watermark', Rental.objects.filter(date_updated__gte=now - timedelta(hours=1))),
+        ('Available scooters in a store', Scooter.objects.filter(store_id=store_id, status='available')),
+        ('Store parts by stock level', Parts.objects.filter(store_id=store_id).order_by('current_stock')[:50]),
+        ('Low stock parts', Parts.objects.filter(current_stock__lte=F('reorder_level'))),
+        ('Open low stock alert for a part', InventoryAlert.objects.filter(
+            part_id=part_id, alert_type='low_stock', status__in=OPEN_ALERT_STATUSES
+        )),
+        ('Open maintenance alert for a scooter', InventoryAlert.objects.filter(
+            scooter_id=scooter_id, alert_type='maintenance_due', status__in=OPEN_ALERT_STATUSES
+        )),
+        ('Open overdue rental alert by title', InventoryAlert.objects.filter(
+            alert_type='overdue_rental', title='Overdue Rental: R-0001', status__in=OPEN_ALERT_STATUSES
+        )),
+        ('In progress job cards, newest first', JobCard.objects.filter(status='in_progress').order_by('-date_created')[:50]),
+        ('Job cards changed since the rollup watermark', JobCard.objects.filter(date_updated__gte=now - timedelta(hours=1))),
+        ('Pending stock transfers by date', StockTransfer.objects.filter(status='pending').order_by('transfer_date')[:50]),
+        ("A user's export jobs", ExportJob.objects.filter(requested_by_id=user_id).order_by('-date_created')[:50]),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Show query plans and timings for the hot filter/sort paths, optionally compared with the indexes dropped'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Times each query is run; the median is reported (default: 20)',
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Also run every query with the hot path indexes dropped (inside a transaction that is rolled back)',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Use EXPLAIN ANALYZE on PostgreSQL (runs the queries)',
+        )
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print the full query plans, not just the timings',
+        )
+    
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        if repeat < 1:
+            raise CommandError('--repeat must be at least 1')
+        if options['compare'] and not connection.features.can_rollback_ddl:
+            raise CommandError(f'--compare needs transactional DDL, which {connection.vendor} does not support')
+        
+        self.explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+        self.show_plans = options['plans']
+        
+        baseline = {}
+        if options['compare']:
+            self.stdout.write(self.style.MIGRATE_HEADING('Without hot path indexes'))
+            
+            # Collect the DROP INDEX statements, then run them in a transaction
+            with connection.schema_editor(collect_sql=True, atomic=False) as schema_editor:
+                for model, index_names in HOT_PATH_INDEXES.items():
+                    for index in model._meta.indexes:
+                        if index.name in index_names:
+                            schema_editor.remove_index(model, index)
+            
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for statement in schema_editor.collected_sql:
+                        cursor.execute(statement)
+                baseline = self.run_queries(repeat)
+                
+                # Put the indexes back by rolling back the DROP INDEX statements
+                transaction.set_rollback(True)
+            self.stdout.write('')
+        
+        self.stdout.write(self.style.MIGRATE_HEADING('With hot path indexes'))
+        timings = self.run_queries(repeat)
+        
+        if baseline:
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING('Summary (median ms: without -> with)'))
+            for name, elapsed in timings.items():
+                before = baseline[name]
+                speedup = f'{before / elapsed:.1f}x' if elapsed else '-'
+                self.stdout.write(f'  {name}: {before:.3f} -> {elapsed:.3f} ({speedup})')
+        
+        self.stdout.write(self.style.SUCCESS(f'Benchmarked {len(timings)} queries on {connection.vendor}.'))
+    
+    def run_queries(self, repeat):
+        """Explain and time each hot query, returning {name: median ms}"""
+        timings = {}
+        for name, queryset in _hot_queries():
+            plan = queryset.explain(**self.explain_options)
+            
+            samples = []
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                list(queryset.all())
+                samples.append((time.perf_counter() - start_time) * 1000)
+            timings[name] = median(samples)
+            
+            # Index names in the plan show which index (if any) the database picked
+            used = sorted({index for names in HOT_PATH_INDEXES.values() for index in names if index in plan})
+            self.stdout.write(f"  {name}: {timings[name]:.3f} ms (indexes: {', '.join(used) or 'none'})")
+            if self.show_plans:
+                for line in plan.splitlines():
+                    self.stdout.write(f'      {line}')
+        return timings
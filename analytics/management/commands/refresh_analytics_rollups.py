@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from analytics.rollups import refresh_daily_rollups
+from analytics.customer_stats import refresh_customer_stats
+import time
+
+
+class Command(BaseCommand):
+    help = 'Update the daily per-store analytics rollups and customer stats from rows changed since the last run'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild all rollups and customer stats from scratch instead of only changed days and customers',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=0,
+            help='Also recompute this many recent days (picks up deleted rows)',
+        )
+    
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days cannot be negative')
+        
+        start_time = time.monotonic()
+        days_processed = refresh_daily_rollups(full=options['full'], recent_days=options['days'])
+        elapsed = time.monotonic() - start_time
+        
+        if days_processed is None:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt all analytics rollups in {elapsed:.2f}s.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Recomputed {days_processed} days of analytics rollups in {elapsed:.2f}s.'))
+        
+        start_time = time.monotonic()
+        customers_processed = refresh_customer_stats(full=options['full'])
+        elapsed = time.monotonic() - start_time
+        
+        if customers_processed is None:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt all customer stats in {elapsed:.2f}s.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Recomputed stats for {customers_processed} customers in {elapsed:.2f}s.'))
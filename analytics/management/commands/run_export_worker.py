@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from analytics.exports import claim_export_jobs, run_export_job, prune_export_jobs
+from utils.workers import run_worker_loop
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds between clean-ups of expired export files
+PRUNE_INTERVAL = 3600
+
+
+def _run_job(job_id):
+    """Run one export job in a pool thread, releasing the thread's connection afterwards"""
+    try:
+        return run_export_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run the background export worker, producing queued export files with a capped number of concurrent exports'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'EXPORT_MAX_CONCURRENCY', 2),
+            help='Maximum exports produced at the same time (default: EXPORT_MAX_CONCURRENCY setting)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'EXPORT_POLL_INTERVAL', 5),
+            help='Seconds between queue polls when idle (default: EXPORT_POLL_INTERVAL setting)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Produce the exports currently queued and exit (for cron/systemd timers)',
+        )
+        
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        interval = max(options['interval'], 1)
+        run_once = options['once']
+        retention_days = getattr(settings, 'EXPORT_RETENTION_DAYS', 7)
+        
+        self.stdout.write(f'Export worker started (workers: {workers}, interval: {interval}s)')
+        
+        running = set()
+        last_prune = None
+        
+        def step():
+            nonlocal last_prune
+            
+            # Report finished jobs and free their slots
+            for future in [future for future in running if future.done()]:
+                running.discard(future)
+                job = future.result()
+                self.stdout.write(f'Export job {job.pk} {job.status} ({job.row_count} rows).')
+                logger.info('Export job %s %s', job.pk, job.status)
+            
+            # Claim only as many jobs as there are free slots; the rest stay queued
+            job_ids = claim_export_jobs(workers - len(running)) if len(running) < workers else []
+            for job_id in job_ids:
+                running.add(pool.submit(_run_job, job_id))
+            
+            if running and (len(running) >= workers or not job_ids):
+                wait(running, timeout=interval, return_when=FIRST_COMPLETED)
+                return True
+            if job_ids:
+                return True
+            
+            # Idle: remove expired export files at most once per PRUNE_INTERVAL
+            if not run_once and (last_prune is None or time.monotonic() - last_prune > PRUNE_INTERVAL):
+                pruned = prune_export_jobs(retention_days)
+                if pruned:
+                    self.stdout.write(f'Removed {pruned} expired export jobs.')
+                last_prune = time.monotonic()
+            return False
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export') as pool:
+            run_worker_loop(self, 'Export worker', step, interval, run_once)
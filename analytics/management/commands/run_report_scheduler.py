@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from analytics.scheduler import run_due_schedules
+from utils.workers import run_worker_loop
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Run due report schedules, saving each report and emailing its recipients'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'REPORT_SCHEDULER_INTERVAL', 60),
+            help='Seconds between checks for due schedules (default: REPORT_SCHEDULER_INTERVAL setting)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'REPORT_SCHEDULER_WORKERS', 2),
+            help='Maximum report builder processes (default: REPORT_SCHEDULER_WORKERS setting)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Maximum schedules run per check (default: 50)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the schedules due now and exit (for cron/systemd timers)',
+        )
+        
+    def handle(self, *args, **options):
+        interval = max(options['interval'], 1)
+        workers = max(options['workers'], 1)
+        run_once = options['once']
+        
+        self.stdout.write(f'Report scheduler started (interval: {interval}s, workers: {workers})')
+        
+        def step():
+            result = run_due_schedules(workers=workers, limit=options['limit'])
+            if result['claimed']:
+                self.stdout.write(
+                    f"Generated {result['generated']} of {result['claimed']} due reports "
+                    f"({result['failed']} failed, {result['emailed']} emails sent)."
+                )
+                logger.info('Report scheduler run: %s', result)
+            
+            # Run again straight away while a full batch of schedules was due
+            return result['due'] >= options['limit']
+        
+        run_worker_loop(self, 'Report scheduler', step, interval, run_once)
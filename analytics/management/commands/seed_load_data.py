@@ -0,0 +1,112 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from analytics.rollups import refresh_daily_rollups
+from analytics.customer_stats import refresh_customer_stats
+from customers.availability import invalidate_availability
+from dashboard.metrics import invalidate_dashboard_metrics
+from inventory.models import Store
+from utils.synthetic_data import generate_dataset, DEFAULT_VOLUMES, BATCH_SIZE
+import time
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic dataset (stores, parts, scooters, customers and years of activity) for benchmarking'
+    
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                default=default,
+                help=f'Number to create (default: {default})',
+            )
+        parser.add_argument(
+            '--years',
+            type=float,
+            help='Years of rental, job card and purchase history (overrides --history-days)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Random seed; the same seed and volumes give the same data (default: 1)',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='LD',
+            help='Prefix for generated names and numbers, so several datasets can coexist (default: LD)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Rows per INSERT (default: {BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--now',
+            help='Reference time the history ends at, as an ISO datetime (default: the current time)',
+        )
+        parser.add_argument(
+            '--rollups',
+            action='store_true',
+            help='Rebuild the analytics rollups and customer stats afterwards so reports include the new data',
+        )
+    
+    def handle(self, *args, **options):
+        volumes = {name: options[name] for name in DEFAULT_VOLUMES}
+        if options['years'] is not None:
+            volumes['history_days'] = int(options['years'] * 365)
+        if any(value < 0 for value in volumes.values()):
+            raise CommandError('Volumes cannot be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        
+        # Fix the reference time so the same options reproduce the same rows
+        now = None
+        if options['now']:
+            try:
+                now = parse_datetime(options['now'])
+            except ValueError:
+                now = None
+            if now is None:
+                raise CommandError(f"Invalid --now value \"{options['now']}\"; use an ISO datetime such as 2025-01-31T12:00")
+            if timezone.is_naive(now):
+                now = timezone.make_aware(now)
+        
+        prefix = options['prefix']
+        if Store.objects.filter(name__startswith=f'{prefix} Store ').exists():
+            raise CommandError(f'A dataset with prefix "{prefix}" already exists; choose another --prefix')
+        
+        start_time = time.monotonic()
+        step_start = start_time
+        
+        def progress(step, rows):
+            nonlocal step_start
+            elapsed = time.monotonic() - step_start
+            self.stdout.write(f"  {step.replace('_', ' ')}: {rows:,} ({elapsed:.1f}s)")
+            step_start = time.monotonic()
+        
+        # All or nothing: a failed run leaves no partial dataset behind
+        with transaction.atomic():
+            counts = generate_dataset(
+                volumes, seed=options['seed'], prefix=prefix, batch_size=options['batch_size'], now=now,
+                progress=progress
+            )
+        
+        # bulk_create sends no signals, so drop the cached views of the old data
+        invalidate_availability()
+        invalidate_dashboard_metrics()
+        
+        total = sum(counts.values())
+        elapsed = time.monotonic() - start_time
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s): '
+            + ', '.join(f"{count:,} {name.replace('_', ' ')}" for name, count in counts.items())
+        ))
+        
+        if options['rollups']:
+            rollup_start = time.monotonic()
+            refresh_daily_rollups(full=True)
+            refresh_customer_stats(full=True)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt analytics rollups and customer stats in {time.monotonic() - rollup_start:.1f}s.'))
@@ -0,0 +1,43 @@
+import random
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from .profiling import install_instrumentation, start_profile, stop_profile, write_sample
+
+
+class RequestProfilingMiddleware:
+    """
+    Opt-in request profiler (REQUEST_PROFILING=1).
+    Adds a Server-Timing header to sampled responses and appends each sample
+    to the request profile log summarized on the slowest endpoints page.
+    """
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 1.0)
+        self.exclude_paths = tuple(getattr(settings, 'REQUEST_PROFILING_EXCLUDE', ('/static/', '/media/')))
+        install_instrumentation()
+    
+    def __call__(self, request):
+        # Skip static files and requests outside the sample
+        if request.path.startswith(self.exclude_paths) or random.random() >= self.sample_rate:
+            return self.get_response(request)
+        
+        profile, token = start_profile()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.record_query))
+                response = self.get_response(request)
+        finally:
+            stop_profile(token)
+        
+        # Timings reveal internals, so only staff see the header; every sample is logged
+        if hasattr(request, 'user') and request.user.is_staff:
+            response['Server-Timing'] = profile.server_timing()
+        write_sample(profile.sample(request, response))
+        return response
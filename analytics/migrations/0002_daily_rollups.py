@@ -0,0 +1,82 @@
+# Generated by Django 5.2 on 2026-10-16 22:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('inventory', '0010_alertenginestatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_processed', models.DateTimeField(blank=True, help_text='Source rows changed after this time are reprocessed on the next run', null=True)),
+                ('last_run_days', models.PositiveIntegerField(default=0, help_text='Days recomputed by the last run')),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyJobCardRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('status', models.CharField(max_length=20)),
+                ('priority', models.CharField(max_length=20)),
+                ('job_cards', models.PositiveIntegerField(default=0)),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_job_card_rollups', to='inventory.store')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyPartsUsageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('part_number', models.CharField(max_length=100)),
+                ('part_name', models.CharField(max_length=200)),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_parts_rollups', to='inventory.store')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRentalRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('status', models.CharField(max_length=20)),
+                ('scooter_make', models.CharField(max_length=100)),
+                ('scooter_model', models.CharField(max_length=100)),
+                ('rentals', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rental_rollups', to='inventory.store')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyStoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('rentals', models.PositiveIntegerField(default=0)),
+                ('rental_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('job_cards', models.PositiveIntegerField(default=0)),
+                ('job_cards_completed', models.PositiveIntegerField(default=0)),
+                ('completion_days_total', models.PositiveIntegerField(default=0, help_text='Sum of days from creation to completion for completed job cards')),
+                ('parts_consumed', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('parts_cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='inventory.store')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('date', 'store')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-16 22:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_daily_rollups'),
+        ('inventory', '0010_alertenginestatus'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('export_type', models.CharField(choices=[('job_cards', 'Service Job Cards'), ('scooters', 'Scooter Inventory'), ('parts', 'Parts Inventory'), ('inventory_report', 'Inventory Report'), ('rental_report', 'Rental Report')], max_length=30)),
+                ('file_format', models.CharField(choices=[('xlsx', 'Excel'), ('csv', 'CSV')], default='xlsx', max_length=10)),
+                ('filters', models.JSONField(blank=True, default=dict, help_text='Query string filters of the page the export was requested from')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('file', models.FileField(blank=True, upload_to='exports/%Y/%m/')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+                ('store', models.ForeignKey(blank=True, help_text='Store scope of the requesting user when the export was queued', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to='inventory.store')),
+            ],
+            options={
+                'ordering': ['-date_created'],
+                'indexes': [models.Index(fields=['status', 'date_created'], name='exportjob_status_created_idx')],
+            },
+        ),
+    ]
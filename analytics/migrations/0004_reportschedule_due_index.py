@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-16 22:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reportschedule',
+            index=models.Index(fields=['is_active', 'next_run_date'], name='reportschedule_due_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-16 23:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_reportschedule_due_index'),
+        ('inventory', '0013_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(fields=['requested_by', 'date_created'], name='exportjob_user_created_idx'),
+        ),
+    ]
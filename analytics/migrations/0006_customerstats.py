@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-16 23:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_exportjob_user_index'),
+        ('customers', '0004_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerStats',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='customers.customer')),
+                ('rental_count', models.PositiveIntegerField(default=0)),
+                ('lifetime_spend', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('first_rental', models.DateTimeField(blank=True, null=True)),
+                ('last_rental', models.DateTimeField(blank=True, null=True)),
+                ('segment', models.CharField(choices=[('none', 'No rentals'), ('new', 'New (1 rental)'), ('occasional', 'Occasional (2-5 rentals)'), ('regular', 'Regular (6-15 rentals)'), ('frequent', 'Frequent (16+ rentals)')], default='none', max_length=20)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Customer stats',
+                'indexes': [models.Index(fields=['segment'], name='customerstats_segment_idx'), models.Index(fields=['-lifetime_spend'], name='customerstats_spend_idx')],
+            },
+        ),
+    ]
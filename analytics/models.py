@@ -43,6 +43,12 @@ class ReportSchedule(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.get_frequency_display()})"
+    
+    class Meta:
+        indexes = [
+            # Due-schedule lookup of the report scheduler (is_active, next_run_date <= now)
+            models.Index(fields=['is_active', 'next_run_date'], name='reportschedule_due_idx'),
+        ]
 
 
 class SavedReport(models.Model):
@@ -101,4 +107,159 @@ class DashboardWidget(models.Model):
     date_updated = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"{self.title} on {self.dashboard.name}"
\ No newline at end of file
+        return f"{self.title} on {self.dashboard.name}"
+
+class DailyStoreRollup(models.Model):
+    """Per-day, per-store totals used by the analytics reports instead of raw tables"""
+    date = models.DateField()
+    store = models.ForeignKey('inventory.Store', on_delete=models.CASCADE, null=True, blank=True, related_name='daily_rollups')
+    rentals = models.PositiveIntegerField(default=0)
+    rental_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    job_cards = models.PositiveIntegerField(default=0)
+    job_cards_completed = models.PositiveIntegerField(default=0)
+    completion_days_total = models.PositiveIntegerField(default=0, help_text="Sum of days from creation to completion for completed job cards")
+    parts_consumed = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    parts_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    date_updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.date} - {self.store or 'No store'}"
+    
+    class Meta:
+        unique_together = ['date', 'store']
+        ordering = ['date']
+
+
+class DailyRentalRollup(models.Model):
+    """Per-day rental counts and revenue by store, status and scooter make/model"""
+    date = models.DateField(db_index=True)
+    store = models.ForeignKey('inventory.Store', on_delete=models.CASCADE, null=True, blank=True, related_name='daily_rental_rollups')
+    status = models.CharField(max_length=20)
+    scooter_make = models.CharField(max_length=100)
+    scooter_model = models.CharField(max_length=100)
+    rentals = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    def __str__(self):
+        return f"{self.date} - {self.scooter_make} {self.scooter_model} ({self.status})"
+
+
+class DailyJobCardRollup(models.Model):
+    """Per-day job card counts by store, status and priority"""
+    date = models.DateField(db_index=True)
+    store = models.ForeignKey('inventory.Store', on_delete=models.CASCADE, null=True, blank=True, related_name='daily_job_card_rollups')
+    status = models.CharField(max_length=20)
+    priority = models.CharField(max_length=20)
+    job_cards = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.date} - {self.priority}/{self.status}: {self.job_cards}"
+
+
+class DailyPartsUsageRollup(models.Model):
+    """Per-day parts consumed on job cards, by store and part"""
+    date = models.DateField(db_index=True)
+    store = models.ForeignKey('inventory.Store', on_delete=models.CASCADE, null=True, blank=True, related_name='daily_parts_rollups')
+    part_number = models.CharField(max_length=100)
+    part_name = models.CharField(max_length=200)
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    def __str__(self):
+        return f"{self.date} - {self.part_name}: {self.quantity}"
+
+
+class RollupWatermark(models.Model):
+    """Records how far each incremental rollup has processed source changes"""
+    name = models.CharField(max_length=50, unique=True)
+    last_processed = models.DateTimeField(null=True, blank=True, help_text="Source rows changed after this time are reprocessed on the next run")
+    last_run_days = models.PositiveIntegerField(default=0, help_text="Days recomputed by the last run")
+    date_updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} (up to {self.last_processed or 'never'})"
+
+
+class CustomerStats(models.Model):
+    """Per-customer rental totals and segment, refreshed by analytics.customer_stats"""
+    SEGMENT_CHOICES = (
+        ('none', 'No rentals'),
+        ('new', 'New (1 rental)'),
+        ('occasional', 'Occasional (2-5 rentals)'),
+        ('regular', 'Regular (6-15 rentals)'),
+        ('frequent', 'Frequent (16+ rentals)'),
+    )
+    
+    customer = models.OneToOneField('customers.Customer', on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    rental_count = models.PositiveIntegerField(default=0)
+    lifetime_spend = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    first_rental = models.DateTimeField(null=True, blank=True)
+    last_rental = models.DateTimeField(null=True, blank=True)
+    segment = models.CharField(max_length=20, choices=SEGMENT_CHOICES, default='none')
+    date_updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.customer_id}: {self.rental_count} rentals ({self.segment})"
+    
+    class Meta:
+        verbose_name_plural = "Customer stats"
+        indexes = [
+            # Segment counts and top customers by spend
+            models.Index(fields=['segment'], name='customerstats_segment_idx'),
+            models.Index(fields=['-lifetime_spend'], name='customerstats_spend_idx'),
+        ]
+
+
+class ExportJob(models.Model):
+    """An export queued from a list or report page and produced by the export worker"""
+    EXPORT_TYPES = (
+        ('job_cards', 'Service Job Cards'),
+        ('scooters', 'Scooter Inventory'),
+        ('parts', 'Parts Inventory'),
+        ('inventory_report', 'Inventory Report'),
+        ('rental_report', 'Rental Report'),
+    )
+    
+    FORMAT_CHOICES = (
+        ('xlsx', 'Excel'),
+        ('csv', 'CSV'),
+    )
+    
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+    
+    export_type = models.CharField(max_length=30, choices=EXPORT_TYPES)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='xlsx')
+    filters = models.JSONField(default=dict, blank=True, help_text="Query string filters of the page the export was requested from")
+    store = models.ForeignKey('inventory.Store', on_delete=models.SET_NULL, null=True, blank=True, related_name='export_jobs',
+                              help_text="Store scope of the requesting user when the export was queued")
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs')
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    file = models.FileField(upload_to='exports/%Y/%m/', blank=True)
+    row_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    
+    date_created = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.get_export_type_display()} ({self.get_file_format_display()}) - {self.get_status_display()}"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+    
+    class Meta:
+        ordering = ['-date_created']
+        indexes = [
+            models.Index(fields=['status', 'date_created'], name='exportjob_status_created_idx'),
+            # Export jobs page: a user's own jobs, newest first
+            models.Index(fields=['requested_by', 'date_created'], name='exportjob_user_created_idx'),
+        ]
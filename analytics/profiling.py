@@ -0,0 +1,305 @@
+"""
+Request profiling
+
+RequestProfilingMiddleware (analytics.middleware) records, for a sample of
+requests, the wall time, SQL query count and time, duplicated queries (the
+same statement with different parameters, usually an N+1 loop), template
+render time and cache hits/misses. Each sample is sent back as a
+Server-Timing header and appended as one JSON line to REQUEST_PROFILING_LOG,
+which rotates at REQUEST_PROFILING_LOG_MAX_BYTES. summarize_profiles() reads
+the log back for the slowest endpoints page.
+
+Template and cache timings come from wrapping Template.render and the cache
+backends' get/get_many once per process; the wrappers only count while a
+profiled request is running in the current context.
+"""
+import json
+import logging
+import re
+import time
+from collections import defaultdict, Counter
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+
+PROFILE_LOGGER_NAME = 'analytics.request_profile'
+
+# Duplicated statements kept per sample, most repeated first
+MAX_DUPLICATES = 5
+
+# Profile of the request running in the current context (None when not profiled)
+_current_profile = ContextVar('request_profile', default=None)
+
+_instrumented = set()
+
+
+class RequestProfile:
+    """Measurements collected during one request"""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.sql_fingerprints = Counter()
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Set while inside an instrumented call, so nested renders/lookups are not counted twice
+        self.in_template = False
+        self.in_cache = False
+    
+    def record_query(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook timing each statement"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_ms += (time.perf_counter() - start) * 1000
+            self.sql_count += 1
+            self.sql_fingerprints[fingerprint_sql(sql)] += 1
+    
+    def duplicates(self):
+        """[(fingerprint, count)] of statements run more than once"""
+        return [
+            (sql, count) for sql, count in self.sql_fingerprints.most_common(MAX_DUPLICATES) if count > 1
+        ]
+    
+    def sample(self, request, response):
+        """The JSON log record for this request"""
+        total_ms = (time.perf_counter() - self.start) * 1000
+        resolver_match = getattr(request, 'resolver_match', None)
+        
+        return {
+            'time': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'view': resolver_match.view_name if resolver_match else '',
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_ms, 2),
+            'duplicates': [{'sql': sql, 'count': count} for sql, count in self.duplicates()],
+            'template_ms': round(self.template_ms, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'user_id': request.user.pk if hasattr(request, 'user') and request.user.is_authenticated else None,
+        }
+    
+    def server_timing(self):
+        """Server-Timing header value (durations in milliseconds)"""
+        total_ms = (time.perf_counter() - self.start) * 1000
+        app_ms = max(total_ms - self.sql_ms - self.template_ms, 0)
+        duplicated = sum(count - 1 for _, count in self.duplicates())
+        
+        return ', '.join([
+            f'total;dur={total_ms:.1f}',
+            f'sql;dur={self.sql_ms:.1f};desc="{self.sql_count} queries, {duplicated} duplicated"',
+            f'tpl;dur={self.template_ms:.1f};desc="templates"',
+            f'app;dur={app_ms:.1f};desc="python"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+        ])
+
+
+def fingerprint_sql(sql):
+    """SQL with literals, IN lists and the outer column list collapsed, so repeats of one statement match"""
+    sql = re.sub(r'\s+', ' ', sql)
+    sql = re.sub(r'^SELECT (DISTINCT )?.*? FROM ', r'SELECT \1... FROM ', sql)
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'IN \((?:%s|\?)(?:, (?:%s|\?))*\)', 'IN (...)', sql)
+    return sql[:500]
+
+
+def start_profile():
+    """Start profiling the current request; returns (profile, token for stop_profile)"""
+    profile = RequestProfile()
+    return profile, _current_profile.set(profile)
+
+
+def stop_profile(token):
+    _current_profile.reset(token)
+
+
+def _timed_template_render(original):
+    def render(self, context):
+        profile = _current_profile.get()
+        if profile is None or profile.in_template:
+            return original(self, context)
+        
+        # Only the outermost render is timed; {% include %} renders run inside it
+        profile.in_template = True
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            profile.template_ms += (time.perf_counter() - start) * 1000
+            profile.in_template = False
+    return render
+
+
+def _counted_cache_get(original):
+    missing = object()
+    
+    def get(self, key, default=None, version=None):
+        profile = _current_profile.get()
+        if profile is None or profile.in_cache:
+            return original(self, key, default, version)
+        
+        profile.in_cache = True
+        try:
+            value = original(self, key, missing, version)
+        finally:
+            profile.in_cache = False
+        if value is missing:
+            profile.cache_misses += 1
+            return default
+        profile.cache_hits += 1
+        return value
+    return get
+
+
+def _counted_cache_get_many(original):
+    def get_many(self, keys, version=None):
+        profile = _current_profile.get()
+        if profile is None or profile.in_cache:
+            return original(self, keys, version)
+        
+        # Backends without a native get_many fall back to get(); those calls are not counted again
+        keys = list(keys)
+        profile.in_cache = True
+        try:
+            values = original(self, keys, version)
+        finally:
+            profile.in_cache = False
+        profile.cache_hits += len(values)
+        profile.cache_misses += len(keys) - len(values)
+        return values
+    return get_many
+
+
+def install_instrumentation():
+    """Wrap Template.render and the configured cache backends (once per process)"""
+    if Template not in _instrumented:
+        Template.render = _timed_template_render(Template.render)
+        _instrumented.add(Template)
+    
+    for alias in settings.CACHES:
+        backend_class = type(caches[alias])
+        if backend_class not in _instrumented:
+            backend_class.get = _counted_cache_get(backend_class.get)
+            backend_class.get_many = _counted_cache_get_many(backend_class.get_many)
+            _instrumented.add(backend_class)
+
+
+def profile_log_path():
+    return Path(getattr(settings, 'REQUEST_PROFILING_LOG', Path(settings.BASE_DIR) / 'logs' / 'request_profile.jsonl'))
+
+
+def get_profile_logger():
+    """Logger writing one JSON sample per line to the rotating profile log"""
+    logger = logging.getLogger(PROFILE_LOGGER_NAME)
+    if not logger.handlers:
+        path = profile_log_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=getattr(settings, 'REQUEST_PROFILING_LOG_MAX_BYTES', 10 * 1024 * 1024),
+            backupCount=getattr(settings, 'REQUEST_PROFILING_LOG_BACKUPS', 5),
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def write_sample(sample):
+    get_profile_logger().info(json.dumps(sample, separators=(',', ':')))
+
+
+def read_samples(since=None, limit=None):
+    """
+    Samples from the profile log and its rotated backups, newest file first
+    
+    Args:
+        since: Only samples recorded at or after this Unix time (optional)
+        limit: Stop after this many samples (default: REQUEST_PROFILING_SUMMARY_LIMIT)
+    """
+    limit = limit or getattr(settings, 'REQUEST_PROFILING_SUMMARY_LIMIT', 100000)
+    path = profile_log_path()
+    backups = getattr(settings, 'REQUEST_PROFILING_LOG_BACKUPS', 5)
+    
+    samples = []
+    for file_path in [path] + [path.with_name(f'{path.name}.{number}') for number in range(1, backups + 1)]:
+        if not file_path.exists():
+            continue
+        with open(file_path, encoding='utf-8') as log_file:
+            for line in log_file:
+                try:
+                    sample = json.loads(line)
+                except ValueError:
+                    # A line cut short by rotation or a crash
+                    continue
+                if since is None or sample.get('time', 0) >= since:
+                    samples.append(sample)
+        if len(samples) >= limit:
+            break
+    return samples[:limit]
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(int(round(percent / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize_profiles(samples):
+    """
+    Per-endpoint latency and query statistics, slowest p95 first
+    
+    Returns:
+        list: One dict per (method, view) with count, p50/p95/p99/max ms,
+        average SQL count/ms, template ms, cache hit rate and the most
+        duplicated statement
+    """
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        # Requests that matched no URL pattern are grouped together rather than by path
+        by_endpoint[(sample.get('method', ''), sample.get('view') or '(no matching URL)')].append(sample)
+    
+    summary = []
+    for (method, view), endpoint_samples in by_endpoint.items():
+        count = len(endpoint_samples)
+        totals = sorted(sample['total_ms'] for sample in endpoint_samples)
+        cache_hits = sum(sample.get('cache_hits', 0) for sample in endpoint_samples)
+        cache_lookups = cache_hits + sum(sample.get('cache_misses', 0) for sample in endpoint_samples)
+        
+        duplicates = Counter()
+        for sample in endpoint_samples:
+            for duplicate in sample.get('duplicates', []):
+                duplicates[duplicate['sql']] = max(duplicates[duplicate['sql']], duplicate['count'])
+        top_duplicate = duplicates.most_common(1)
+        
+        summary.append({
+            'method': method,
+            'view': view,
+            'count': count,
+            'p50': _percentile(totals, 50),
+            'p95': _percentile(totals, 95),
+            'p99': _percentile(totals, 99),
+            'max': totals[-1],
+            'sql_count': sum(sample.get('sql_count', 0) for sample in endpoint_samples) / count,
+            'sql_ms': sum(sample.get('sql_ms', 0) for sample in endpoint_samples) / count,
+            'template_ms': sum(sample.get('template_ms', 0) for sample in endpoint_samples) / count,
+            'cache_hit_rate': cache_hits / cache_lookups * 100 if cache_lookups else None,
+            'errors': sum(1 for sample in endpoint_samples if sample.get('status', 200) >= 500),
+            'top_duplicate': top_duplicate[0][0] if top_duplicate else '',
+            'top_duplicate_count': top_duplicate[0][1] if top_duplicate else 0,
+        })
+    
+    summary.sort(key=lambda row: row['p95'], reverse=True)
+    return summary
@@ -0,0 +1,211 @@
+"""
+Incremental per-day, per-store rollups for the analytics reports
+
+Reports read from the Daily*Rollup tables, so their cost depends on the
+number of days in the range rather than the number of rentals, purchases
+and job cards behind them. refresh_daily_rollups() recomputes only the days
+touched by source rows changed since the last run's watermark.
+
+Rows are attributed to a day by Rental.start_date, Purchase.invoice_date
+and JobCard.date_created (job card items follow their job card). Deleted
+rows and rows moved to another day leave the old day stale until it is
+recomputed with --days or --full.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate, Coalesce
+from django.utils import timezone
+from inventory.models import Purchase
+from service.models import JobCard, JobCardItem
+from customers.models import Rental
+from .models import (DailyStoreRollup, DailyRentalRollup, DailyJobCardRollup,
+                     DailyPartsUsageRollup, RollupWatermark)
+
+ROLLUP_NAME = 'daily_store'
+
+# Days recomputed per transaction (also bounds the size of the IN (...) filters)
+DAYS_PER_BATCH = 100
+
+ROLLUP_MODELS = (DailyStoreRollup, DailyRentalRollup, DailyJobCardRollup, DailyPartsUsageRollup)
+
+
+def _changed_days(since):
+    """Days touched by rentals, purchases or job cards changed since the given time"""
+    days = set()
+    
+    days.update(Rental.objects.filter(date_updated__gte=since).annotate(
+        day=TruncDate('start_date')
+    ).values_list('day', flat=True).order_by().distinct())
+    
+    days.update(Purchase.objects.filter(date_updated__gte=since).values_list(
+        'invoice_date', flat=True
+    ).order_by().distinct())
+    
+    # Adding items to a job card saves the job card, so this also covers parts usage
+    days.update(JobCard.objects.filter(date_updated__gte=since).annotate(
+        day=TruncDate('date_created')
+    ).values_list('day', flat=True).order_by().distinct())
+    
+    return days
+
+
+def _compute_rollups(days=None):
+    """
+    Build unsaved rollup rows for the given days (all days when None)
+    Returns a dict mapping each rollup model to its list of rows
+    """
+    rentals = Rental.objects.all()
+    purchases = Purchase.objects.all()
+    job_cards = JobCard.objects.all()
+    job_card_items = JobCardItem.objects.all()
+    
+    if days is not None:
+        rentals = rentals.filter(start_date__date__in=days)
+        purchases = purchases.filter(invoice_date__in=days)
+        job_cards = job_cards.filter(date_created__date__in=days)
+        job_card_items = job_card_items.filter(job_card__date_created__date__in=days)
+    
+    store_totals = defaultdict(lambda: {
+        'rentals': 0, 'rental_revenue': Decimal('0'), 'expenses': Decimal('0'),
+        'job_cards': 0, 'job_cards_completed': 0, 'completion_days_total': 0,
+        'parts_consumed': Decimal('0'), 'parts_cost': Decimal('0'),
+    })
+    rows = {model: [] for model in ROLLUP_MODELS}
+    
+    # Rentals by day, store, status and scooter make/model
+    rental_rows = rentals.annotate(day=TruncDate('start_date')).values(
+        'day', 'scooter__store_id', 'status', 'scooter__make', 'scooter__model'
+    ).annotate(
+        rental_count=Count('id'),
+        revenue=Sum('total_amount', default=0)
+    ).order_by()
+    
+    for row in rental_rows:
+        rows[DailyRentalRollup].append(DailyRentalRollup(
+            date=row['day'],
+            store_id=row['scooter__store_id'],
+            status=row['status'],
+            scooter_make=row['scooter__make'],
+            scooter_model=row['scooter__model'],
+            rentals=row['rental_count'],
+            revenue=row['revenue']
+        ))
+        totals = store_totals[(row['day'], row['scooter__store_id'])]
+        totals['rentals'] += row['rental_count']
+        totals['rental_revenue'] += row['revenue']
+    
+    # Purchase expenses by invoice day and store
+    expense_rows = purchases.values('invoice_date', 'store_id').annotate(
+        total=Sum('total_amount', default=0)
+    ).order_by()
+    
+    for row in expense_rows:
+        store_totals[(row['invoice_date'], row['store_id'])]['expenses'] += row['total']
+    
+    # Job cards by day, store, status and priority; the store falls back to the scooter's
+    job_cards = job_cards.annotate(
+        day=TruncDate('date_created'),
+        store_ref=Coalesce('store', 'scooter__store')
+    )
+    job_card_rows = job_cards.values('day', 'store_ref', 'status', 'priority').annotate(
+        job_card_count=Count('id')
+    ).order_by()
+    
+    for row in job_card_rows:
+        rows[DailyJobCardRollup].append(DailyJobCardRollup(
+            date=row['day'],
+            store_id=row['store_ref'],
+            status=row['status'],
+            priority=row['priority'],
+            job_cards=row['job_card_count']
+        ))
+        totals = store_totals[(row['day'], row['store_ref'])]
+        totals['job_cards'] += row['job_card_count']
+        if row['status'] == 'completed':
+            totals['job_cards_completed'] += row['job_card_count']
+    
+    # Completion time for completed job cards (days from creation to completion)
+    completed = job_cards.filter(status='completed', actual_completion__isnull=False).values_list(
+        'day', 'store_ref', 'actual_completion'
+    ).order_by()
+    
+    for day, store_id, actual_completion in completed.iterator():
+        store_totals[(day, store_id)]['completion_days_total'] += max((actual_completion - day).days, 0)
+    
+    # Parts consumed on job cards by day, store and part
+    parts_rows = job_card_items.annotate(
+        day=TruncDate('job_card__date_created'),
+        store_ref=Coalesce('job_card__store', 'job_card__scooter__store')
+    ).values('day', 'store_ref', 'part__part_number', 'part__name').annotate(
+        total_quantity=Sum('quantity', default=0),
+        total_cost=Sum('total_price', default=0)
+    ).order_by()
+    
+    for row in parts_rows:
+        rows[DailyPartsUsageRollup].append(DailyPartsUsageRollup(
+            date=row['day'],
+            store_id=row['store_ref'],
+            part_number=row['part__part_number'],
+            part_name=row['part__name'],
+            quantity=row['total_quantity'],
+            cost=row['total_cost']
+        ))
+        totals = store_totals[(row['day'], row['store_ref'])]
+        totals['parts_consumed'] += row['total_quantity']
+        totals['parts_cost'] += row['total_cost']
+    
+    for (day, store_id), totals in store_totals.items():
+        rows[DailyStoreRollup].append(DailyStoreRollup(date=day, store_id=store_id, **totals))
+    
+    return rows
+
+
+def _replace_rollups(days=None):
+    """Recompute and replace the rollup rows for the given days (all days when None)"""
+    rows = _compute_rollups(days)
+    
+    with transaction.atomic():
+        for model in ROLLUP_MODELS:
+            existing = model.objects.all()
+            if days is not None:
+                existing = existing.filter(date__in=days)
+            existing.delete()
+            model.objects.bulk_create(rows[model], batch_size=1000)
+
+
+def refresh_daily_rollups(full=False, recent_days=0):
+    """
+    Bring the daily rollups up to date
+    
+    Args:
+        full: Rebuild every day from scratch (also done on the first run)
+        recent_days: Additionally recompute this many days back from today,
+                     to pick up deletions and rows moved between days
+    
+    Returns:
+        int: Number of days recomputed, or None for a full rebuild
+    """
+    started = timezone.now()
+    watermark, _ = RollupWatermark.objects.get_or_create(name=ROLLUP_NAME)
+    
+    if full or watermark.last_processed is None:
+        _replace_rollups()
+        days_processed = None
+    else:
+        days = _changed_days(watermark.last_processed)
+        today = timezone.localdate()
+        days.update(today - timezone.timedelta(days=offset) for offset in range(recent_days))
+        
+        days = sorted(days)
+        for start in range(0, len(days), DAYS_PER_BATCH):
+            _replace_rollups(days[start:start + DAYS_PER_BATCH])
+        days_processed = len(days)
+    
+    # Rows changed while this run was reading are picked up by the next run
+    watermark.last_processed = started
+    watermark.last_run_days = days_processed or 0
+    watermark.save()
+    
+    return days_processed
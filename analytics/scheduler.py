@@ -0,0 +1,321 @@
+"""
+Scheduled report runner for ReportSchedule
+
+run_due_schedules() finds active schedules whose next_run_date has passed
+with one query on the (is_active, next_run_date) index, claims each one by
+moving next_run_date forward with a conditional UPDATE, builds the claimed
+reports in a bounded process pool, saves them as SavedReport and emails the
+recipients in one batch.
+
+A schedule is only claimed by the scheduler whose UPDATE still saw the old
+next_run_date, so several schedulers can run at once without firing a
+schedule twice. Claiming happens before the report is built: a report that
+fails to build is skipped until the schedule's next run.
+"""
+import calendar
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+import django
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from inventory.models import Parts
+from inventory.utils import get_store_fleet_summary
+from utils.notifications import send_scheduled_report_emails
+from .models import (ReportSchedule, SavedReport, DailyStoreRollup, DailyRentalRollup,
+                     DailyJobCardRollup, DailyPartsUsageRollup)
+
+logger = logging.getLogger(__name__)
+
+# Rows kept in each detail list of a saved report
+TOP_ROWS = 10
+
+
+def next_run_after(run_date, frequency, now):
+    """
+    Advance run_date by the schedule frequency until it is after now
+    (missed runs are not caught up)
+    """
+    while run_date <= now:
+        if frequency == 'daily':
+            run_date += timedelta(days=1)
+        elif frequency == 'weekly':
+            run_date += timedelta(days=7)
+        else:
+            # Monthly/quarterly: same day of month, clamped to the month's length
+            months = 3 if frequency == 'quarterly' else 1
+            month_index = run_date.month - 1 + months
+            year = run_date.year + month_index // 12
+            month = month_index % 12 + 1
+            day = min(run_date.day, calendar.monthrange(year, month)[1])
+            run_date = run_date.replace(year=year, month=month, day=day)
+    return run_date
+
+
+def _inventory_report(start_date, end_date, include_raw_data):
+    """Current stock value and fleet status (not date dependent)"""
+    parts_totals = Parts.objects.aggregate(
+        parts=Count('id'),
+        value=Sum(F('current_stock') * F('unit_price'), default=0)
+    )
+    fleet = get_store_fleet_summary()
+    
+    data = {
+        'summary': {
+            'total_parts': parts_totals['parts'],
+            'inventory_value': parts_totals['value'],
+            'low_stock_parts': Parts.objects.filter(current_stock__lte=F('reorder_level')).count(),
+            'scooters': fleet['totals']['total'],
+            'scooters_available': fleet['totals']['available'],
+        }
+    }
+    if include_raw_data:
+        data['category_values'] = list(Parts.objects.values('category').annotate(
+            total_value=Sum(F('current_stock') * F('unit_price'), default=0),
+            part_count=Count('id')
+        ).order_by('-total_value'))
+        data['fleet_by_store'] = fleet['stores']
+    return data
+
+
+def _rental_report(start_date, end_date, include_raw_data):
+    """Rental counts and revenue from the daily rental rollups"""
+    rollups = DailyRentalRollup.objects.filter(date__range=[start_date, end_date])
+    totals = rollups.aggregate(rentals=Sum('rentals', default=0), revenue=Sum('revenue', default=0))
+    
+    data = {
+        'summary': {
+            'total_rentals': totals['rentals'],
+            'total_revenue': totals['revenue'],
+        }
+    }
+    if include_raw_data:
+        data['status_distribution'] = list(
+            rollups.values('status').annotate(count=Sum('rentals')).order_by('status')
+        )
+        data['revenue_by_scooter'] = list(rollups.values('scooter_make', 'scooter_model').annotate(
+            revenue=Sum('revenue', default=0),
+            rental_count=Sum('rentals')
+        ).order_by('-revenue')[:TOP_ROWS])
+    return data
+
+
+def _maintenance_report(start_date, end_date, include_raw_data):
+    """Job card and parts usage totals from the daily rollups"""
+    day_range = [start_date, end_date]
+    totals = DailyStoreRollup.objects.filter(date__range=day_range).aggregate(
+        jobs=Sum('job_cards', default=0),
+        completed=Sum('job_cards_completed', default=0),
+        completion_days=Sum('completion_days_total', default=0)
+    )
+    
+    data = {
+        'summary': {
+            'total_jobs': totals['jobs'],
+            'completed_jobs': totals['completed'],
+            'completion_rate': round(totals['completed'] / totals['jobs'] * 100, 1) if totals['jobs'] else 0,
+            'avg_completion_days': round(totals['completion_days'] / totals['completed'], 1) if totals['completed'] else 0,
+        }
+    }
+    if include_raw_data:
+        data['jobs_by_priority'] = list(DailyJobCardRollup.objects.filter(date__range=day_range).values(
+            'priority'
+        ).annotate(count=Sum('job_cards')).order_by('priority'))
+        data['parts_usage'] = list(DailyPartsUsageRollup.objects.filter(date__range=day_range).values(
+            'part_name'
+        ).annotate(count=Sum('quantity'), total_cost=Sum('cost')).order_by('-count')[:TOP_ROWS])
+    return data
+
+
+def _financial_report(start_date, end_date, include_raw_data):
+    """Revenue, expenses and profit from the daily store rollups"""
+    rollups = DailyStoreRollup.objects.filter(date__range=[start_date, end_date])
+    totals = rollups.aggregate(revenue=Sum('rental_revenue', default=0), expenses=Sum('expenses', default=0))
+    profit = totals['revenue'] - totals['expenses']
+    
+    data = {
+        'summary': {
+            'total_revenue': totals['revenue'],
+            'total_expenses': totals['expenses'],
+            'total_profit': profit,
+            'profit_margin': round(profit / totals['revenue'] * 100, 1) if totals['revenue'] else 0,
+        }
+    }
+    if include_raw_data:
+        data['monthly'] = list(rollups.annotate(month=TruncMonth('date')).values('month').annotate(
+            revenue=Sum('rental_revenue', default=0),
+            expenses=Sum('expenses', default=0)
+        ).order_by('month'))
+    return data
+
+
+def _custom_report(start_date, end_date, include_raw_data):
+    """Per-store totals from the daily store rollups"""
+    rollups = DailyStoreRollup.objects.filter(date__range=[start_date, end_date])
+    totals = rollups.aggregate(
+        rentals=Sum('rentals', default=0),
+        revenue=Sum('rental_revenue', default=0),
+        expenses=Sum('expenses', default=0),
+        job_cards=Sum('job_cards', default=0)
+    )
+    
+    data = {'summary': {
+        'rentals': totals['rentals'],
+        'rental_revenue': totals['revenue'],
+        'expenses': totals['expenses'],
+        'job_cards': totals['job_cards'],
+    }}
+    if include_raw_data:
+        data['stores'] = list(rollups.values('store__name').annotate(
+            rentals=Sum('rentals'),
+            revenue=Sum('rental_revenue'),
+            expenses=Sum('expenses'),
+            job_cards=Sum('job_cards')
+        ).order_by('store__name'))
+    return data
+
+
+# Report type -> function(start_date, end_date, include_raw_data) returning report data
+REPORT_BUILDERS = {
+    'inventory': _inventory_report,
+    'sales': _rental_report,
+    'rentals': _rental_report,
+    'maintenance': _maintenance_report,
+    'financial': _financial_report,
+    'custom': _custom_report,
+}
+
+
+def build_report_data(report_type, start_date, end_date, include_raw_data=True):
+    """
+    Build the JSON data saved for a scheduled report
+    
+    Args:
+        report_type: One of ReportSchedule.REPORT_TYPES
+        start_date, end_date: Dates covered by the report
+        include_raw_data: Include the detail lists, not just the summary
+    
+    Returns:
+        dict: JSON-serialisable report data
+    """
+    data = REPORT_BUILDERS[report_type](start_date, end_date, include_raw_data)
+    data['report_type'] = report_type
+    data['start_date'] = start_date
+    data['end_date'] = end_date
+    
+    # Decimals and dates as JSON-safe values
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def _init_worker():
+    """Set up Django in a report pool process"""
+    django.setup()
+
+
+def _build_in_worker(schedule_id, report_type, start_date, end_date, include_raw_data):
+    """Pool task: build one schedule's report, returning (schedule_id, data or None, error)"""
+    try:
+        return schedule_id, build_report_data(report_type, start_date, end_date, include_raw_data), ''
+    except Exception as e:
+        return schedule_id, None, str(e)
+    finally:
+        connections.close_all()
+
+
+def claim_schedule(schedule, now):
+    """
+    Move a due schedule's next_run_date forward if no other scheduler has yet
+    
+    Args:
+        schedule: Dict with the schedule's id, frequency and next_run_date
+        now: Current time
+    
+    Returns:
+        bool: True if this call claimed the run
+    """
+    next_run = next_run_after(schedule['next_run_date'], schedule['frequency'], now)
+    return ReportSchedule.objects.filter(
+        pk=schedule['id'], is_active=True, next_run_date=schedule['next_run_date']
+    ).update(next_run_date=next_run, last_run_date=now) == 1
+
+
+def run_due_schedules(workers=2, limit=50, now=None):
+    """
+    Run every due report schedule once
+    
+    Args:
+        workers: Maximum report builder processes (1 builds in this process)
+        limit: Maximum schedules handled per call
+        now: Current time (default: timezone.now())
+    
+    Returns:
+        dict: due, claimed, generated, failed and emailed counts
+    """
+    now = now or timezone.now()
+    
+    # One query on the (is_active, next_run_date) index
+    due = list(ReportSchedule.objects.filter(
+        is_active=True, next_run_date__lte=now
+    ).order_by('next_run_date').values(
+        'id', 'name', 'report_type', 'frequency', 'next_run_date', 'date_range_days',
+        'include_raw_data', 'include_charts', 'created_by_id'
+    )[:limit])
+    
+    claimed = [schedule for schedule in due if claim_schedule(schedule, now)]
+    result = {'due': len(due), 'claimed': len(claimed), 'generated': 0, 'failed': 0, 'emailed': 0}
+    if not claimed:
+        return result
+    
+    end_date = now.date()
+    tasks = [
+        (schedule['id'], schedule['report_type'], end_date - timedelta(days=schedule['date_range_days']),
+         end_date, schedule['include_raw_data'])
+        for schedule in claimed
+    ]
+    
+    if workers > 1 and len(tasks) > 1:
+        # Pool processes open their own connections; don't share this process's
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker) as pool:
+            outcomes = list(pool.map(_build_in_worker, *zip(*tasks)))
+    else:
+        outcomes = []
+        for task in tasks:
+            try:
+                outcomes.append((task[0], build_report_data(*task[1:]), ''))
+            except Exception as e:
+                outcomes.append((task[0], None, str(e)))
+    
+    # Recipients of all claimed schedules in one query
+    recipients = {}
+    for schedule_id, user_id, email in ReportSchedule.recipients.through.objects.filter(
+        reportschedule_id__in=[schedule['id'] for schedule in claimed]
+    ).values_list('reportschedule_id', 'user_id', 'user__email'):
+        recipients.setdefault(schedule_id, []).append((user_id, email))
+    
+    schedules = {schedule['id']: schedule for schedule in claimed}
+    deliveries = []
+    for schedule_id, data, error in outcomes:
+        schedule = schedules[schedule_id]
+        if data is None:
+            logger.error('Scheduled report error (%s): %s', schedule['name'], error)
+            result['failed'] += 1
+            continue
+        
+        data['include_charts'] = schedule['include_charts']
+        report = SavedReport.objects.create(
+            title=f"{schedule['name']} ({data['start_date']} to {data['end_date']})",
+            report_schedule_id=schedule_id,
+            report_data=data,
+            generated_by_id=schedule['created_by_id'],
+        )
+        report.allowed_users.set([user_id for user_id, _ in recipients.get(schedule_id, [])])
+        deliveries.append((report, [email for _, email in recipients.get(schedule_id, []) if email]))
+        result['generated'] += 1
+    
+    result['emailed'] = send_scheduled_report_emails(deliveries)
+    return result
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase
+from analytics.models import ReportSchedule, SavedReport
+from analytics.scheduler import claim_schedule, next_run_after, run_due_schedules
+from utils.testing import ViewBudgetTestCase
+
+
+def moment(year, month, day, hour=6):
+    return datetime(year, month, day, hour, tzinfo=dt_timezone.utc)
+
+
+class AnalyticsViewBudgetTests(ViewBudgetTestCase):
+    
+    def test_analytics_dashboard(self):
+        # Session, user, the user's dashboards (none, so no widgets)
+        self.assertViewBudget('analytics:analytics_dashboard', queries=3)
+    
+    def test_alerts_dashboard(self):
+        # Session, user, counts by status, counts by type, page of alerts
+        self.assertViewBudget('analytics:alerts_dashboard', queries=5)
+    
+    def test_alert_count_api(self):
+        # Session, user, open alert count
+        self.assertViewBudget('analytics:alert_count_api', queries=3, max_ms=300)
+    
+    def test_export_job_list(self):
+        # Session, user, the user's recent export jobs
+        self.assertViewBudget('analytics:export_job_list', queries=3)
+
+
+class NextRunAfterTests(TestCase):
+    
+    def test_monthly_clamps_to_the_end_of_shorter_months(self):
+        self.assertEqual(next_run_after(moment(2025, 1, 31), 'monthly', moment(2025, 1, 31)), moment(2025, 2, 28))
+        self.assertEqual(next_run_after(moment(2024, 1, 31), 'monthly', moment(2024, 1, 31)), moment(2024, 2, 29))
+        self.assertEqual(next_run_after(moment(2025, 3, 31), 'monthly', moment(2025, 3, 31)), moment(2025, 4, 30))
+    
+    def test_quarterly_clamps_and_crosses_the_year(self):
+        self.assertEqual(next_run_after(moment(2024, 11, 30), 'quarterly', moment(2024, 11, 30)), moment(2025, 2, 28))
+        self.assertEqual(next_run_after(moment(2023, 11, 30), 'quarterly', moment(2023, 11, 30)), moment(2024, 2, 29))
+        self.assertEqual(next_run_after(moment(2025, 10, 15), 'quarterly', moment(2025, 10, 15)), moment(2026, 1, 15))
+    
+    def test_missed_runs_are_not_caught_up(self):
+        self.assertEqual(next_run_after(moment(2025, 1, 1), 'daily', moment(2025, 1, 10, 12)), moment(2025, 1, 11))
+        self.assertEqual(next_run_after(moment(2025, 1, 1), 'weekly', moment(2025, 1, 20)), moment(2025, 1, 22))
+        self.assertEqual(next_run_after(moment(2025, 1, 15), 'monthly', moment(2025, 4, 1)), moment(2025, 4, 15))
+
+
+class ScheduledReportRunTests(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        # Inserted directly, as saving a User also creates its profile twice
+        User.objects.bulk_create([User(username='reports', email='reports@example.com')])
+        cls.user = User.objects.get(username='reports')
+    
+    def setUp(self):
+        self.schedule = ReportSchedule.objects.create(
+            name='Monthly inventory', report_type='inventory', frequency='monthly',
+            next_run_date=moment(2025, 1, 31), created_by=self.user,
+        )
+        self.schedule.recipients.add(self.user)
+    
+    def schedule_values(self):
+        return ReportSchedule.objects.values('id', 'frequency', 'next_run_date').get(pk=self.schedule.pk)
+    
+    def test_only_one_claim_wins(self):
+        now = moment(2025, 1, 31, 7)
+        first, second = self.schedule_values(), self.schedule_values()
+        
+        self.assertTrue(claim_schedule(first, now))
+        self.assertFalse(claim_schedule(second, now))
+        
+        self.schedule.refresh_from_db()
+        self.assertEqual((self.schedule.next_run_date, self.schedule.last_run_date), (moment(2025, 2, 28), now))
+    
+    def test_inactive_schedule_is_not_claimed(self):
+        ReportSchedule.objects.filter(pk=self.schedule.pk).update(is_active=False)
+        
+        self.assertFalse(claim_schedule(self.schedule_values(), moment(2025, 1, 31, 7)))
+    
+    @mock.patch('utils.notifications.USE_SENDGRID', False)
+    def test_run_due_schedules_saves_and_emails_the_report(self):
+        result = run_due_schedules(workers=1, now=moment(2025, 1, 31, 7))
+        
+        self.assertEqual(result, {'due': 1, 'claimed': 1, 'generated': 1, 'failed': 0, 'emailed': 1})
+        report = SavedReport.objects.get(report_schedule=self.schedule)
+        self.assertEqual(report.report_data['report_type'], 'inventory')
+        self.assertEqual(list(report.allowed_users.all()), [self.user])
+        self.assertEqual(mail.outbox[0].to, ['reports@example.com'])
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.next_run_date, moment(2025, 2, 28))
+        
+        # Nothing is due until the next run date
+        self.assertEqual(run_due_schedules(workers=1, now=moment(2025, 2, 1))['due'], 0)
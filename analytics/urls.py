@@ -15,4 +15,10 @@ urlpatterns = [
     path('alerts/<int:alert_id>/acknowledge/', views.acknowledge_alert, name='acknowledge_alert'),
     path('alerts/<int:alert_id>/resolve/', views.resolve_alert, name='resolve_alert'),
     path('export/<str:report_type>/', views.export_report, name='export_report'),
+    path('exports/', views.export_job_list, name='export_job_list'),
+    path('exports/status/', views.export_job_status, name='export_job_status'),
+    path('exports/queue/<str:export_type>/', views.export_job_create, name='export_job_create'),
+    path('exports/<int:job_id>/status/', views.export_job_status, name='export_job_status_detail'),
+    path('exports/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
+    path('profiling/', views.request_profile_summary, name='request_profile_summary'),
 ]
\ No newline at end of file
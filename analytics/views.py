@@ -1,32 +1,36 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Count, Sum, Avg, F, Q
-from django.db.models.functions import TruncMonth, TruncWeek, TruncDay
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.conf import settings
+from django.http import JsonResponse, FileResponse, Http404, QueryDict
+from django.urls import reverse
+from django.db.models import Count, Sum, F
+from django.db.models.functions import TruncMonth, ExtractWeekDay
 from django.utils import timezone
 from django.contrib import messages
 from datetime import timedelta, datetime
-import json
-import csv
 import tempfile
 import os
 
-from inventory.models import Scooter, Parts, StockTransfer, Store, Purchase, PurchaseItem, InventoryAlert
-from service.models import JobCard, JobCardItem
+from inventory.models import Scooter, Parts, StockTransfer, Store, PurchaseItem, InventoryAlert
 from customers.models import Customer, Rental, Payment
-from .models import ReportSchedule, SavedReport, Dashboard, DashboardWidget
+from utils.export_utils import stream_csv, EXPORT_CHUNK_SIZE
+from .models import (ReportSchedule, SavedReport, Dashboard, DashboardWidget, ExportJob, CustomerStats,
+                     DailyStoreRollup, DailyRentalRollup, DailyJobCardRollup, DailyPartsUsageRollup)
+from .customer_stats import get_segment_counts, get_top_customers, get_stats_watermark
+from .exports import queue_export, export_download_name
+from .profiling import read_samples, summarize_profiles
 
 
 @login_required
 def analytics_dashboard(request):
     """Main analytics dashboard view"""
     # Check if user has a custom default dashboard
-    user_dashboards = Dashboard.objects.filter(owner=request.user)
-    default_dashboard = user_dashboards.filter(is_default=True).first()
+    user_dashboards = list(Dashboard.objects.filter(owner=request.user).order_by('pk'))
+    default_dashboard = next((dashboard for dashboard in user_dashboards if dashboard.is_default), None)
     
-    if not default_dashboard and user_dashboards.exists():
+    if not default_dashboard and user_dashboards:
         # If no default is set but dashboards exist, use the first one
-        default_dashboard = user_dashboards.first()
+        default_dashboard = user_dashboards[0]
     
     context = {
         'user_dashboards': user_dashboards,
@@ -96,34 +100,37 @@ def rental_report(request):
         except ValueError:
             messages.error(request, 'Invalid date format. Using default date range.')
     
+    # Read from the daily rollups (see analytics.rollups) instead of the rental table
+    rollups_in_period = DailyRentalRollup.objects.filter(date__range=[start_date.date(), end_date.date()])
+    
     # Basic stats
-    rentals_in_period = Rental.objects.filter(start_date__range=[start_date, end_date])
-    total_rentals = rentals_in_period.count()
-    total_revenue = rentals_in_period.aggregate(sum=Sum('total_amount'))['sum'] or 0
+    totals = rollups_in_period.aggregate(rentals=Sum('rentals', default=0), revenue=Sum('revenue', default=0))
+    total_rentals = totals['rentals']
+    total_revenue = totals['revenue']
     
     # Rental status distribution
-    status_distribution = rentals_in_period.values('status').annotate(count=Count('id'))
+    status_distribution = rollups_in_period.values('status').annotate(count=Sum('rentals')).order_by('status')
     
     # Revenue by scooter make/model
-    revenue_by_scooter = rentals_in_period.values(
-        'scooter__make', 'scooter__model'
+    revenue_by_scooter = rollups_in_period.values(
+        'scooter_make', 'scooter_model'
     ).annotate(
-        revenue=Sum('total_amount', default=0),
-        rental_count=Count('id')
+        revenue=Sum('revenue', default=0),
+        rental_count=Sum('rentals')
     ).order_by('-revenue')
     
     # Rentals by day of week
-    rentals_by_day = rentals_in_period.annotate(
-        day=F('start_date__week_day')
+    rentals_by_day = list(rollups_in_period.annotate(
+        day=ExtractWeekDay('date')
     ).values('day').annotate(
-        count=Count('id')
-    ).order_by('day')
+        count=Sum('rentals')
+    ).order_by('day'))
     
     # Convert day number to name
     day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     for item in rentals_by_day:
         # Django's week_day is 1 (Sunday) to 7 (Saturday), adjusting to 0-6 for our array
-        item['day_name'] = day_names[(item['day'] % 7) - 1]
+        item['day_name'] = day_names[(item['day'] + 5) % 7]
     
     context = {
         'title': 'Rental Analytics',
@@ -147,34 +154,34 @@ def maintenance_report(request):
     end_date = timezone.now()
     start_date = end_date - timedelta(days=90)
     
+    # Read from the daily rollups (see analytics.rollups) instead of job cards and items
+    day_range = [start_date.date(), end_date.date()]
+    
     # Job card statistics
-    job_cards = JobCard.objects.filter(date_created__range=[start_date, end_date])
-    total_jobs = job_cards.count()
-    completed_jobs = job_cards.filter(status='completed').count()
+    job_totals = DailyStoreRollup.objects.filter(date__range=day_range).aggregate(
+        jobs=Sum('job_cards', default=0),
+        completed=Sum('job_cards_completed', default=0),
+        completion_days=Sum('completion_days_total', default=0)
+    )
+    total_jobs = job_totals['jobs']
+    completed_jobs = job_totals['completed']
     completion_rate = (completed_jobs / total_jobs * 100) if total_jobs > 0 else 0
     
     # Parts usage analysis
-    parts_usage = JobCardItem.objects.filter(
-        job_card__date_created__range=[start_date, end_date]
-    ).values('part__name').annotate(
+    parts_usage = DailyPartsUsageRollup.objects.filter(date__range=day_range).values('part_name').annotate(
         count=Sum('quantity'),
-        total_cost=Sum(F('quantity') * F('price'))
+        total_cost=Sum('cost')
     ).order_by('-count')
     
-    # Average job completion time
-    job_duration = job_cards.filter(
-        status='completed', 
-        completion_date__isnull=False
-    ).annotate(
-        duration=F('completion_date') - F('date_created')
-    ).aggregate(avg_duration=Avg('duration'))
-    
-    # The result is in days as a timedelta
-    avg_days = job_duration['avg_duration'].days if job_duration['avg_duration'] else 0
-    avg_hours = (job_duration['avg_duration'].seconds / 3600) if job_duration['avg_duration'] else 0
+    # Average job completion time (creation to completion) in days
+    avg_duration = (job_totals['completion_days'] / completed_jobs) if completed_jobs > 0 else 0
+    avg_days = int(avg_duration)
+    avg_hours = (avg_duration - avg_days) * 24
     
     # Job cards by priority
-    jobs_by_priority = job_cards.values('priority').annotate(count=Count('id')).order_by('priority')
+    jobs_by_priority = DailyJobCardRollup.objects.filter(date__range=day_range).values(
+        'priority'
+    ).annotate(count=Sum('job_cards')).order_by('priority')
     
     context = {
         'title': 'Maintenance Analytics',
@@ -200,23 +207,18 @@ def financial_report(request):
     end_date = timezone.now()
     start_date = end_date - timedelta(days=365)
     
-    # Monthly revenue from rentals
-    monthly_revenue = Rental.objects.filter(
-        start_date__range=[start_date, end_date]
+    # Monthly revenue and expenses from the daily rollups (see analytics.rollups)
+    monthly_totals = DailyStoreRollup.objects.filter(
+        date__range=[start_date.date(), end_date.date()]
     ).annotate(
-        month=TruncMonth('start_date')
+        month=TruncMonth('date')
     ).values('month').annotate(
-        revenue=Sum('total_amount', default=0)
+        revenue=Sum('rental_revenue', default=0),
+        expenses=Sum('expenses', default=0)
     ).order_by('month')
     
-    # Monthly expenses from purchases
-    monthly_expenses = Purchase.objects.filter(
-        invoice_date__range=[start_date, end_date]
-    ).annotate(
-        month=TruncMonth('invoice_date')
-    ).values('month').annotate(
-        expenses=Sum('total_amount', default=0)
-    ).order_by('month')
+    monthly_revenue = [item for item in monthly_totals if item['revenue']]
+    monthly_expenses = [item for item in monthly_totals if item['expenses']]
     
     # Combine revenue and expenses by month
     financial_data = {}
@@ -275,51 +277,44 @@ def export_report(request, report_type):
     """Export report data as CSV"""
     
     if report_type == 'inventory':
-        # Inventory export
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="inventory_report.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Part Number', 'Name', 'Store', 'Category', 'Current Stock', 'Reorder Level', 'Unit Price', 'Total Value'])
+        # Inventory export, streamed from plain tuples (no model instances)
+        parts = Parts.objects.values_list(
+            'part_number', 'name', 'store__name', 'category', 'current_stock', 'reorder_level', 'unit_price'
+        ).order_by('id').iterator(chunk_size=EXPORT_CHUNK_SIZE)
         
-        parts = Parts.objects.all().select_related('store')
-        for part in parts:
-            total_value = part.current_stock * part.unit_price
-            writer.writerow([
-                part.part_number,
-                part.name,
-                part.store.name,
-                part.category,
-                part.current_stock,
-                part.reorder_level,
-                part.unit_price,
-                total_value
-            ])
-            
-        return response
+        rows = (
+            (part_number, name, store_name, category, current_stock, reorder_level, unit_price,
+             current_stock * unit_price)
+            for part_number, name, store_name, category, current_stock, reorder_level, unit_price in parts
+        )
         
+        return stream_csv(
+            rows,
+            ['Part Number', 'Name', 'Store', 'Category', 'Current Stock', 'Reorder Level', 'Unit Price', 'Total Value'],
+            'inventory_report'
+        )
+    
     elif report_type == 'rentals':
-        # Rental export
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="rental_report.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Rental Number', 'Customer', 'Scooter', 'Start Date', 'End Date', 'Status', 'Total Amount'])
+        # Rental export, streamed from plain tuples (no model instances)
+        status_names = dict(Rental.STATUS_CHOICES)
+        rentals = Rental.objects.values_list(
+            'rental_number', 'customer__first_name', 'customer__last_name', 'scooter__make', 'scooter__model',
+            'start_date', 'end_date', 'status', 'total_amount'
+        ).order_by('id').iterator(chunk_size=EXPORT_CHUNK_SIZE)
         
-        rentals = Rental.objects.all().select_related('customer', 'scooter')
-        for rental in rentals:
-            writer.writerow([
-                rental.rental_number,
-                rental.customer.get_full_name(),
-                f"{rental.scooter.make} {rental.scooter.model}",
-                rental.start_date,
-                rental.end_date or 'N/A',
-                rental.get_status_display(),
-                rental.total_amount
-            ])
-            
-        return response
+        rows = (
+            (rental_number, f"{first_name} {last_name}", f"{make} {model}", start_date,
+             end_date or 'N/A', status_names.get(status, status), total_amount)
+            for (rental_number, first_name, last_name, make, model,
+                 start_date, end_date, status, total_amount) in rentals
+        )
         
+        return stream_csv(
+            rows,
+            ['Rental Number', 'Customer', 'Scooter', 'Start Date', 'End Date', 'Status', 'Total Amount'],
+            'rental_report'
+        )
+    
     else:
         messages.error(request, f"Export for {report_type} reports is not supported.")
         return redirect('analytics:analytics_dashboard')
@@ -337,6 +332,9 @@ def alerts_dashboard(request):
     else:
         alerts = InventoryAlert.objects.filter(status=alert_status)
     
+    # The table shows each alert's part, scooter and store
+    alerts = alerts.select_related('part', 'scooter', 'store')
+    
     # Count by status for the sidebar
     alert_counts = InventoryAlert.objects.values('status').annotate(count=Count('id'))
     
@@ -426,19 +424,9 @@ def customer_analysis(request):
         count=Count('id')
     ).order_by('month')
     
-    # Get top customers by rental spend
-    top_customers = Customer.objects.annotate(
-        total_spent=Sum('rentals__total_amount', default=0),
-        rental_count=Count('rentals')
-    ).order_by('-total_spent')[:10]
-    
-    # Customer segmentation by rental frequency
-    frequency_segments = {
-        'new': Customer.objects.annotate(rental_count=Count('rentals')).filter(rental_count=1).count(),
-        'occasional': Customer.objects.annotate(rental_count=Count('rentals')).filter(rental_count__range=[2, 5]).count(),
-        'regular': Customer.objects.annotate(rental_count=Count('rentals')).filter(rental_count__range=[6, 15]).count(),
-        'frequent': Customer.objects.annotate(rental_count=Count('rentals')).filter(rental_count__gt=15).count(),
-    }
+    # Top customers and segments by rental frequency, from the CustomerStats table
+    top_customers = get_top_customers(10)
+    frequency_segments = get_segment_counts()
     
     context = {
         'title': 'Customer Analytics',
@@ -446,6 +434,8 @@ def customer_analysis(request):
         'new_customers': new_customers,
         'top_customers': top_customers,
         'frequency_segments': frequency_segments,
+        'segments': [(label, frequency_segments[segment]) for segment, label in CustomerStats.SEGMENT_CHOICES],
+        'stats_updated': get_stats_watermark(),
     }
     
     return render(request, 'analytics/customer_analysis.html', context)
@@ -457,4 +447,110 @@ def alert_count_api(request):
     # Count non-resolved alerts only
     alert_count = InventoryAlert.objects.exclude(status='resolved').count()
     
-    return JsonResponse({'count': alert_count})
\ No newline at end of file
+    return JsonResponse({'count': alert_count})
+
+
+@login_required
+def export_job_create(request, export_type):
+    """Queue a background export of a list or report with the filters it was showing"""
+    if request.method != 'POST':
+        return redirect('analytics:export_job_list')
+    
+    # Filters arrive as the list page's query string
+    filters = QueryDict(request.POST.get('filters', '')).dict()
+    filters.pop('export', None)
+    
+    try:
+        job = queue_export(export_type, request.user, filters, request.POST.get('file_format', 'xlsx'))
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('analytics:export_job_list')
+    
+    messages.success(request, f'{job.get_export_type_display()} export queued. It will be ready to download below.')
+    return redirect('analytics:export_job_list')
+
+
+def _user_export_jobs(user):
+    """Export jobs visible to a user: their own, or all of them for superusers"""
+    jobs = ExportJob.objects.select_related('requested_by')
+    if not user.is_superuser:
+        jobs = jobs.filter(requested_by=user)
+    return jobs
+
+
+def _export_job_status(job):
+    """JSON-serialisable status of an export job for the polling endpoint"""
+    return {
+        'id': job.id,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'row_count': job.row_count,
+        'error': job.error,
+        'finished': job.is_finished,
+        'download_url': reverse('analytics:export_job_download', args=[job.id]) if job.status == 'completed' else None,
+    }
+
+
+@login_required
+def export_job_list(request):
+    """List the user's export jobs; unfinished ones are polled until ready"""
+    jobs = _user_export_jobs(request.user)[:50]
+    
+    return render(request, 'analytics/export_jobs.html', {
+        'title': 'Exports',
+        'jobs': jobs,
+    })
+
+
+@login_required
+def export_job_status(request, job_id=None):
+    """API endpoint polled for the status of one or more export jobs (?ids=1,2,3)"""
+    if job_id:
+        job_ids = [job_id]
+    else:
+        job_ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.isdigit()]
+    
+    jobs = _user_export_jobs(request.user).filter(id__in=job_ids)
+    return JsonResponse({'jobs': [_export_job_status(job) for job in jobs]})
+
+
+@login_required
+def export_job_download(request, job_id):
+    """Download the file produced by a completed export job"""
+    job = get_object_or_404(_user_export_jobs(request.user), id=job_id)
+    
+    if job.status != 'completed' or not job.file:
+        raise Http404("Export is not ready")
+    
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=export_download_name(job))
+
+
+def is_staff(user):
+    """Check if user is a staff member"""
+    return user.is_staff
+
+
+# Time windows offered on the request profile page, in hours
+PROFILE_WINDOWS = [1, 24, 24 * 7]
+
+
+@login_required
+@user_passes_test(is_staff)
+def request_profile_summary(request):
+    """Slowest endpoints (p50/p95/p99) from the request profiling log (staff only)"""
+    try:
+        hours = int(request.GET.get('hours', 24))
+    except ValueError:
+        hours = 24
+    
+    samples = read_samples(since=timezone.now().timestamp() - hours * 3600)
+    
+    return render(request, 'analytics/request_profiles.html', {
+        'title': 'Request Profiles',
+        'endpoints': summarize_profiles(samples),
+        'sample_count': len(samples),
+        'hours': hours,
+        'windows': PROFILE_WINDOWS,
+        'profiling_enabled': getattr(settings, 'REQUEST_PROFILING', False),
+        'sample_rate': getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 1.0),
+    })
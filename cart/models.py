@@ -1,15 +1,77 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models import F, Sum, DecimalField, ExpressionWrapper
 from landing.models import Product
 
+class Cart(models.Model):
+    """Shopping cart, found by the cart id kept in the session or by the signed-in user"""
+    cart_id = models.CharField(max_length=36, unique=True)
+    user = models.OneToOneField('auth.User', on_delete=models.CASCADE, null=True, blank=True, related_name='cart')
+    # Kept up to date by recalculate(), so the navbar count and totals need no item query
+    item_count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Cart {self.cart_id} ({self.item_count} items)"
+    
+    def recalculate(self):
+        """Recompute the cached item count and total from the cart items (one query)"""
+        totals = self.items.aggregate(
+            count=Sum('quantity'),
+            total=Sum(ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=12, decimal_places=2))),
+        )
+        self.item_count = totals['count'] or 0
+        self.total = totals['total'] or Decimal('0')
+        self.save(update_fields=['item_count', 'total', 'date_updated'])
+    
+    def add_product(self, product, quantity=1):
+        """Add a product, snapshotting its current price if it is new to the cart"""
+        item, created = CartItem.objects.get_or_create(
+            cart=self,
+            product=product,
+            defaults={'quantity': quantity, 'unit_price': product.get_display_price()},
+        )
+        if not created:
+            CartItem.objects.filter(pk=item.pk).update(quantity=F('quantity') + quantity)
+        self.recalculate()
+    
+    def set_quantity(self, product_id, quantity):
+        """Change an item's quantity; returns False if the product is not in the cart"""
+        updated = self.items.filter(product_id=product_id).update(quantity=quantity)
+        if updated:
+            self.recalculate()
+        return bool(updated)
+    
+    def remove_product(self, product_id):
+        """Remove a product; returns False if it was not in the cart"""
+        deleted, _ = self.items.filter(product_id=product_id).delete()
+        if deleted:
+            self.recalculate()
+        return bool(deleted)
+    
+    def clear(self):
+        self.items.all().delete()
+        self.recalculate()
+
+
 class CartItem(models.Model):
     """Model for cart items"""
-    session_id = models.CharField(max_length=255)
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    # Price when the product was added; checkout compares it with the current price
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     date_added = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product'], name='cart_item_unique_product'),
+        ]
+    
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
     
     def get_total_price(self):
-        return self.product.price * self.quantity
\ No newline at end of file
+        return self.unit_price * self.quantity
@@ -8,5 +8,7 @@ urlpatterns = [
     path('add/<int:product_id>/', views.cart_add, name='cart_add'),
     path('remove/<int:product_id>/', views.cart_remove, name='cart_remove'),
     path('update/<int:product_id>/', views.cart_update, name='cart_update'),
+    path('clear/', views.cart_clear, name='cart_clear'),
+    path('count/', views.cart_count, name='cart_count'),
     path('checkout/', views.checkout, name='checkout'),
 ]
\ No newline at end of file
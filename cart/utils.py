@@ -0,0 +1,73 @@
+import uuid
+from django.db import transaction
+from landing.models import Product
+from .models import Cart, CartItem
+
+
+def get_cart(request, create=False):
+    """
+    The visitor's cart: the signed-in user's cart, else the one whose id is in the session
+    
+    Args:
+        request: The current request
+        create: Create an empty cart if there is none
+    
+    Returns:
+        Cart or None
+    """
+    cart_id = request.session.get('cart_id')
+    user = request.user if request.user.is_authenticated else None
+    
+    cart = None
+    if user is not None:
+        cart = Cart.objects.filter(user=user).first()
+        if cart_id and (cart is None or cart.cart_id != cart_id):
+            cart = _adopt_session_cart(cart, cart_id, user)
+    elif cart_id:
+        cart = Cart.objects.filter(cart_id=cart_id, user__isnull=True).first()
+    
+    if cart is None and create:
+        cart = Cart.objects.create(cart_id=str(uuid.uuid4()), user=user)
+    if cart is not None and cart_id != cart.cart_id:
+        request.session['cart_id'] = cart.cart_id
+    
+    # Carts kept in the session before carts moved to the database
+    if 'cart' in request.session:
+        legacy_cart = request.session.pop('cart')
+        if legacy_cart:
+            cart = cart or Cart.objects.create(cart_id=str(uuid.uuid4()), user=user)
+            request.session['cart_id'] = cart.cart_id
+            _import_session_cart(cart, legacy_cart)
+    
+    return cart
+
+
+@transaction.atomic
+def _adopt_session_cart(user_cart, cart_id, user):
+    """Give a signed-in user the cart they filled in before signing in, merged into their own"""
+    session_cart = Cart.objects.filter(cart_id=cart_id, user__isnull=True).first()
+    if session_cart is None:
+        return user_cart
+    if user_cart is None:
+        session_cart.user = user
+        session_cart.save(update_fields=['user', 'date_updated'])
+        return session_cart
+    
+    for item in session_cart.items.select_related('product'):
+        user_cart.add_product(item.product, item.quantity)
+    session_cart.delete()
+    return user_cart
+
+
+def _import_session_cart(cart, legacy_cart):
+    """Move a session cart ({product id: {'quantity': ...}}) into the database cart"""
+    quantities = {int(product_id): item.get('quantity', 1) for product_id, item in legacy_cart.items() if str(product_id).isdigit()}
+    existing = set(cart.items.values_list('product_id', flat=True))
+    
+    # Current prices for every product in one query
+    products = Product.objects.filter(id__in=quantities).only('id', 'price', 'sale_price')
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, product=product, quantity=quantities[product.id], unit_price=product.get_display_price())
+        for product in products if product.id not in existing
+    ])
+    cart.recalculate()
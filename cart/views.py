@@ -1,50 +1,43 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.db import transaction
 from django.http import JsonResponse
 from landing.models import Product
+from .models import CartItem
+from .utils import get_cart
 import uuid
 
-def get_cart_id(request):
-    """Get or create a cart ID for the current session"""
-    if 'cart_id' not in request.session:
-        request.session['cart_id'] = str(uuid.uuid4())
-    return request.session['cart_id']
-
-def get_cart(request):
-    """Get the current cart items from session"""
-    cart_id = get_cart_id(request)
-    cart = request.session.get('cart', {})
-    return cart
+def cart_lines(cart):
+    """Cart items as template rows, with the product's current price (one query)"""
+    if cart is None:
+        return []
+    
+    lines = []
+    for item in cart.items.select_related('product').order_by('date_added'):
+        current_price = item.product.get_display_price()
+        lines.append({
+            'id': item.product_id,
+            'name': item.product.name,
+            'quantity': item.quantity,
+            'price': item.unit_price,
+            'current_price': current_price if current_price != item.unit_price else None,
+            'subtotal': item.get_total_price(),
+            'image': item.product.get_image_url(),
+        })
+    return lines
 
 def cart_add(request, product_id):
     """Add a product to cart"""
     product = get_object_or_404(Product, id=product_id)
-    cart_id = get_cart_id(request)
-    cart = request.session.get('cart', {})
-    
-    # Convert to string for session storage
-    product_id_str = str(product_id)
-    
-    if product_id_str in cart:
-        # If product already in cart, increment quantity
-        cart[product_id_str]['quantity'] += 1
-    else:
-        # Add product to cart
-        cart[product_id_str] = {
-            'quantity': 1,
-            'price': float(product.price),
-            'name': product.name,
-            'image': product.image.url if product.image else '/static/images/products/placeholder.jpg'
-        }
-    
-    request.session['cart'] = cart
+    cart = get_cart(request, create=True)
+    cart.add_product(product)
     
     # If AJAX request, return JSON response
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
             'status': 'success',
             'message': f"{product.name} added to your cart",
-            'cart_count': sum(item['quantity'] for item in cart.values())
+            'cart_count': cart.item_count
         })
     
     messages.success(request, f"{product.name} added to your cart")
@@ -52,82 +45,97 @@ def cart_add(request, product_id):
 
 def cart_remove(request, product_id):
     """Remove a product from cart"""
-    cart = request.session.get('cart', {})
-    product_id_str = str(product_id)
+    cart = get_cart(request)
     
-    if product_id_str in cart:
-        del cart[product_id_str]
-        request.session['cart'] = cart
+    if cart and cart.remove_product(product_id):
         messages.success(request, "Item removed from your cart")
     
     return redirect('cart:cart_detail')
 
+def cart_clear(request):
+    """Remove every item from the cart"""
+    cart = get_cart(request)
+    
+    if cart and cart.item_count:
+        cart.clear()
+        messages.success(request, "Your cart has been cleared")
+    
+    return redirect('cart:cart_detail')
+
 def cart_update(request, product_id):
     """Update cart item quantity"""
-    cart = request.session.get('cart', {})
-    product_id_str = str(product_id)
-    quantity = int(request.POST.get('quantity', 1))
+    cart = get_cart(request)
+    try:
+        quantity = int(request.POST.get('quantity', 1))
+    except ValueError:
+        quantity = 0
     
-    if quantity > 0 and product_id_str in cart:
-        cart[product_id_str]['quantity'] = quantity
-        request.session['cart'] = cart
+    if cart and quantity > 0:
+        cart.set_quantity(product_id, quantity)
     
     return redirect('cart:cart_detail')
 
+def cart_count(request):
+    """Number of items in the cart, for the navbar badge"""
+    cart = get_cart(request)
+    return JsonResponse({'cart_count': cart.item_count if cart else 0})
+
 def cart_detail(request):
     """View the cart contents"""
-    cart = request.session.get('cart', {})
-    cart_items = []
-    total = 0
-    
-    # Convert cart from session format to a list of items
-    for product_id, item_data in cart.items():
-        subtotal = item_data['price'] * item_data['quantity']
-        total += subtotal
-        
-        cart_items.append({
-            'id': product_id,
-            'name': item_data['name'],
-            'quantity': item_data['quantity'],
-            'price': item_data['price'],
-            'subtotal': subtotal,
-            'image': item_data['image']
-        })
+    cart = get_cart(request)
     
     return render(request, 'cart/cart_detail.html', {
-        'cart_items': cart_items,
-        'total': total
+        'cart_items': cart_lines(cart),
+        'total': cart.total if cart else 0
     })
 
 def checkout(request):
     """Checkout process"""
-    cart = request.session.get('cart', {})
-    cart_items = []
-    total = 0
+    cart = get_cart(request)
     
     # If cart is empty, redirect to cart detail
-    if not cart:
+    if cart is None or not cart.item_count:
         messages.warning(request, "Your cart is empty")
         return redirect('cart:cart_detail')
     
-    # Convert cart from session format to a list of items
-    for product_id, item_data in cart.items():
-        subtotal = item_data['price'] * item_data['quantity']
-        total += subtotal
-        
-        cart_items.append({
-            'id': product_id,
-            'name': item_data['name'],
-            'quantity': item_data['quantity'],
-            'price': item_data['price'],
-            'subtotal': subtotal,
-            'image': item_data['image']
-        })
-    
     if request.method == 'POST':
         # In a real app, this would validate form data and process payment
-        # For now, just clear the cart and show confirmation
-        request.session['cart'] = {}
+        with transaction.atomic():
+            items = list(cart.items.all())
+            
+            # Lock the products so stock cannot be sold twice by concurrent checkouts
+            products = Product.objects.select_for_update().in_bulk([item.product_id for item in items])
+            
+            unavailable = [
+                products[item.product_id].name if item.product_id in products else 'A product'
+                for item in items
+                if item.product_id not in products
+                or not products[item.product_id].is_active
+                or products[item.product_id].stock < item.quantity
+            ]
+            if unavailable:
+                messages.error(request, f"Not enough stock for: {', '.join(unavailable)}. Please update your cart.")
+                return redirect('cart:cart_detail')
+            
+            # Prices changed since the items were added: show the new total before taking the order
+            changed = [item for item in items if item.unit_price != products[item.product_id].get_display_price()]
+            if changed:
+                for item in changed:
+                    item.unit_price = products[item.product_id].get_display_price()
+                CartItem.objects.bulk_update(changed, ['unit_price'])
+                cart.recalculate()
+                messages.warning(request, "Some prices have changed since you added them. Please review your order.")
+                return redirect('cart:checkout')
+            
+            for item in items:
+                products[item.product_id].stock -= item.quantity
+            Product.objects.bulk_update(list(products.values()), ['stock'])
+            
+            # Keep the order lines for the confirmation page, then empty the cart
+            cart_items = cart_lines(cart)
+            total = cart.total
+            cart.clear()
+        
         messages.success(request, "Your order has been placed successfully")
         
         # You would typically save the order to the database here
@@ -139,6 +147,6 @@ def checkout(request):
         })
     
     return render(request, 'cart/checkout.html', {
-        'cart_items': cart_items,
-        'total': total
+        'cart_items': cart_lines(cart),
+        'total': cart.total
     })
\ No newline at end of file
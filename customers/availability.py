@@ -0,0 +1,331 @@
+"""
+Scooter availability index
+
+Answers "which category-B scooters at store X are free from Friday to
+Monday" from an in-process interval index instead of the scooter status
+flag. Each bookable scooter has a sorted list of busy windows:
+
+- active/overdue rentals from start_date to expected_end_date (open-ended
+  once the expected return has passed without the scooter coming back)
+- open job cards from date_created to the end of estimated_completion
+  (open-ended when there is no estimate or it has passed)
+- a 'rented' or 'maintenance' status flag with no matching rental or job
+  card, from now on
+
+The index is built once per process (three queries). A committed rental,
+job card or scooter write (see customers.signals) records the scooters it
+touched under a change counter in the Django cache; on its next query every
+process reloads just those scooters' windows (three queries filtered to
+them) instead of the whole index. A process that is more than
+MAX_INDEX_CHANGES changes behind, or whose change entries have expired,
+rebuilds in full, as it does once the index is AVAILABILITY_INDEX_TTL old so
+"now"-relative windows do not go stale.
+"""
+import time
+import uuid
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from inventory.models import Scooter
+from service.models import JobCard
+from .models import Rental
+
+AVAILABILITY_EPOCH_KEY = 'availability:index:epoch'
+AVAILABILITY_COUNTER_KEY = 'availability:index:changes'
+AVAILABILITY_CHANGE_KEY = 'availability:index:change:{}:{}'
+
+# Changes a process applies one scooter at a time before rebuilding the whole index instead
+MAX_INDEX_CHANGES = 100
+
+# Seconds the changed scooter ids are kept in the cache
+CHANGE_TIMEOUT = 3600
+
+# Scooters that are never offered for rent
+UNBOOKABLE_STATUSES = ('retired', 'damaged')
+
+# Rental and job card statuses that keep a scooter busy
+BUSY_RENTAL_STATUSES = ('active', 'overdue')
+OPEN_JOB_CARD_STATUSES = ('pending', 'in_progress', 'on_hold')
+
+# End of a window with no known end
+OPEN_END = datetime.max.replace(tzinfo=dt_timezone.utc)
+
+# Process-local ((epoch, counter), built_at, AvailabilityIndex) loaded by get_availability_index()
+_loaded = (None, 0, None)
+
+
+def _merge_windows(windows):
+    """Merge overlapping (start, end) windows into sorted starts and ends lists"""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [window[0] for window in merged], [window[1] for window in merged]
+
+
+class AvailabilityIndex:
+    """
+    Busy windows per scooter, merged and sorted so a free/busy check is one bisect
+    
+    Scooter ids are bucketed by (store_id, category) so a query only looks at
+    the scooters it could return.
+    """
+    
+    def __init__(self, scooters, windows):
+        """
+        Args:
+            scooters: Iterable of (scooter_id, store_id, category)
+            windows: Iterable of (scooter_id, start, end) busy windows
+        """
+        self._buckets = defaultdict(list)
+        for scooter_id, store_id, category in scooters:
+            self._buckets[(store_id, category)].append(scooter_id)
+        self._bookable = {scooter_id for scooter_ids in self._buckets.values() for scooter_id in scooter_ids}
+        
+        by_scooter = defaultdict(list)
+        for scooter_id, start, end in windows:
+            by_scooter[scooter_id].append((start, end))
+        
+        # Merge overlapping windows so both starts and ends are sorted
+        self._busy = {scooter_id: _merge_windows(scooter_windows) for scooter_id, scooter_windows in by_scooter.items()}
+    
+    def update(self, scooter_ids, scooters, windows):
+        """
+        Replace what the index holds for some scooters
+        
+        Args:
+            scooter_ids: Scooters to replace; ones missing from `scooters` are dropped
+            scooters, windows: The scooters' current rows, as for __init__
+        """
+        scooter_ids = set(scooter_ids)
+        buckets = defaultdict(list)
+        for key, bucket_ids in self._buckets.items():
+            buckets[key] = [scooter_id for scooter_id in bucket_ids if scooter_id not in scooter_ids]
+        for scooter_id, store_id, category in scooters:
+            buckets[(store_id, category)].append(scooter_id)
+        
+        by_scooter = defaultdict(list)
+        for scooter_id, start, end in windows:
+            by_scooter[scooter_id].append((start, end))
+        
+        # New containers are swapped in whole, so threads reading the index never see a half update
+        busy = {scooter_id: windows for scooter_id, windows in self._busy.items() if scooter_id not in scooter_ids}
+        busy.update((scooter_id, _merge_windows(scooter_windows)) for scooter_id, scooter_windows in by_scooter.items())
+        self._busy = busy
+        self._bookable = {scooter_id for bucket_ids in buckets.values() for scooter_id in bucket_ids}
+        self._buckets = buckets
+    
+    def is_free(self, scooter_id, start, end):
+        """True if the scooter is bookable and has no busy window overlapping [start, end)"""
+        if scooter_id not in self._bookable:
+            return False
+        
+        busy = self._busy.get(scooter_id)
+        if not busy:
+            return True
+        starts, ends = busy
+        
+        # First window ending after the requested start; free unless it starts before the requested end
+        index = bisect_right(ends, start)
+        return index == len(ends) or starts[index] >= end
+    
+    def free_scooters(self, start, end, store_id=None, category=None):
+        """
+        Ids of bookable scooters free for the whole of [start, end)
+        
+        Args:
+            start, end: Requested window (aware datetimes)
+            store_id: Limit to one store (optional)
+            category: Limit to one scooter category (optional)
+        """
+        return [
+            scooter_id
+            for (bucket_store_id, bucket_category), scooter_ids in self._buckets.items()
+            if (store_id is None or bucket_store_id == store_id)
+            and (category is None or bucket_category == category)
+            for scooter_id in scooter_ids
+            if self.is_free(scooter_id, start, end)
+        ]
+    
+    def free_counts(self, start, end, category=None):
+        """Number of free scooters per store for [start, end)"""
+        counts = defaultdict(int)
+        for (store_id, bucket_category), scooter_ids in self._buckets.items():
+            if category is None or bucket_category == category:
+                counts[store_id] += sum(1 for scooter_id in scooter_ids if self.is_free(scooter_id, start, end))
+        return dict(counts)
+
+
+def load_availability(scooter_ids=None, now=None):
+    """
+    Bookable scooters and their busy windows from the database (three queries)
+    
+    Args:
+        scooter_ids: Only load these scooters (default: all)
+        now: Time "now"-relative windows start from (default: the current time)
+    
+    Returns:
+        (scooters, windows) as taken by AvailabilityIndex
+    """
+    now = now or timezone.now()
+    
+    scooters = Scooter.objects.exclude(status__in=UNBOOKABLE_STATUSES)
+    rentals = Rental.objects.filter(status__in=BUSY_RENTAL_STATUSES, end_date__isnull=True)
+    job_cards = JobCard.objects.filter(status__in=OPEN_JOB_CARD_STATUSES)
+    if scooter_ids is not None:
+        scooters = scooters.filter(id__in=scooter_ids)
+        rentals = rentals.filter(scooter_id__in=scooter_ids)
+        job_cards = job_cards.filter(scooter_id__in=scooter_ids)
+    
+    scooters = list(scooters.values_list('id', 'store_id', 'category', 'status'))
+    
+    windows = []
+    rented = set()
+    for scooter_id, start, expected_end, status in rentals.values_list(
+        'scooter_id', 'start_date', 'expected_end_date', 'status'
+    ):
+        # Not back yet after the expected return: busy until it is
+        end = OPEN_END if status == 'overdue' or expected_end <= now else expected_end
+        windows.append((scooter_id, start, end))
+        rented.add(scooter_id)
+    
+    in_service = set()
+    for scooter_id, created, estimated_completion in job_cards.values_list(
+        'scooter_id', 'date_created', 'estimated_completion'
+    ):
+        end = OPEN_END
+        if estimated_completion:
+            end = timezone.make_aware(datetime.combine(estimated_completion + timedelta(days=1), dt_time.min))
+            if end <= now:
+                end = OPEN_END
+        windows.append((scooter_id, created, end))
+        in_service.add(scooter_id)
+    
+    # Status flags without a rental/job card behind them still block the scooter from now on
+    for scooter_id, _, _, status in scooters:
+        if (status == 'rented' and scooter_id not in rented) or (status == 'maintenance' and scooter_id not in in_service):
+            windows.append((scooter_id, now, OPEN_END))
+    
+    return [(scooter_id, store_id, category) for scooter_id, store_id, category, _ in scooters], windows
+
+
+def build_availability_index(now=None):
+    """Build the availability index from the database (three queries)"""
+    return AvailabilityIndex(*load_availability(now=now))
+
+
+def _availability_version():
+    """Current (epoch, change counter), starting a new epoch if the cache has lost either"""
+    values = cache.get_many([AVAILABILITY_EPOCH_KEY, AVAILABILITY_COUNTER_KEY])
+    if len(values) < 2:
+        # A counter restarting at 0 must not match indexes loaded under the old one
+        values = {AVAILABILITY_EPOCH_KEY: uuid.uuid4().hex, AVAILABILITY_COUNTER_KEY: 0}
+        cache.set_many(values, timeout=None)
+    return values[AVAILABILITY_EPOCH_KEY], values[AVAILABILITY_COUNTER_KEY]
+
+
+def invalidate_availability(scooter_ids=None):
+    """
+    Make every process reload scooters' availability on its next query
+    
+    Args:
+        scooter_ids: Scooters whose rentals, job cards or status changed;
+            None rebuilds the whole index everywhere
+    """
+    global _loaded
+    if scooter_ids is not None:
+        epoch, _ = _availability_version()
+        try:
+            counter = cache.incr(AVAILABILITY_COUNTER_KEY)
+        except ValueError:
+            counter = None
+        if counter is not None:
+            cache.set(AVAILABILITY_CHANGE_KEY.format(epoch, counter), sorted(scooter_ids), timeout=CHANGE_TIMEOUT)
+            return
+    
+    _loaded = (None, 0, None)
+    cache.set_many({AVAILABILITY_EPOCH_KEY: uuid.uuid4().hex, AVAILABILITY_COUNTER_KEY: 0}, timeout=None)
+
+
+def _changed_scooters(epoch, since, counter):
+    """Scooter ids changed after `since` up to `counter`, or None if some changes are no longer cached"""
+    keys = [AVAILABILITY_CHANGE_KEY.format(epoch, number) for number in range(since + 1, counter + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return None
+    return {scooter_id for scooter_ids in changes.values() for scooter_id in scooter_ids}
+
+
+def get_availability_index():
+    """The availability index, brought up to date with writes since it was loaded"""
+    global _loaded
+    epoch, counter = _availability_version()
+    loaded_version, built_at, index = _loaded
+    
+    ttl = getattr(settings, 'AVAILABILITY_INDEX_TTL', 60)
+    changed = None
+    if index is not None and time.monotonic() - built_at <= ttl and loaded_version and loaded_version[0] == epoch:
+        since = loaded_version[1]
+        if since == counter:
+            return index
+        if since < counter <= since + MAX_INDEX_CHANGES:
+            changed = _changed_scooters(epoch, since, counter)
+    
+    if changed is None:
+        index = build_availability_index()
+        built_at = time.monotonic()
+    else:
+        index.update(changed, *load_availability(changed))
+    _loaded = ((epoch, counter), built_at, index)
+    return index
+
+
+def get_free_scooter_ids(start, end, store_id=None, category=None):
+    """Ids of scooters free for the whole of [start, end), optionally for one store/category"""
+    return get_availability_index().free_scooters(start, end, store_id=store_id, category=category)
+
+
+def is_scooter_free(scooter_id, start, end):
+    """
+    True if the scooter can be booked for [start, end)
+    
+    Checked against the database rather than the shared index, so a caller
+    holding a lock on the scooter sees every booking committed before it.
+    """
+    return AvailabilityIndex(*load_availability([scooter_id])).is_free(scooter_id, start, end)
+
+
+def parse_window(start_value, end_value):
+    """
+    Parse a requested rental window from form/query values
+    
+    Accepts datetimes ('YYYY-MM-DDTHH:MM', as sent by datetime-local inputs)
+    or dates ('YYYY-MM-DD'; the end date is included in full).
+    
+    Returns:
+        (start, end) aware datetimes, or None if either value is missing,
+        invalid or the window is empty
+    """
+    bounds = []
+    for value, is_end in ((start_value, False), (end_value, True)):
+        try:
+            day = parse_date(value or '')
+            parsed = parse_datetime(value or '') if day is None else None
+        except ValueError:
+            return None
+        if day is not None:
+            parsed = datetime.combine(day + timedelta(days=1) if is_end else day, dt_time.min)
+        elif parsed is None:
+            return None
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        bounds.append(parsed)
+    
+    start, end = bounds
+    return (start, end) if start < end else None
@@ -1,6 +1,10 @@
 from django import forms
 from .models import Customer, Rental, PaymentMethod, Payment
 from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from inventory.models import Scooter
+from inventory.pricing import get_tariff_table
+from utils.search import TypeaheadSelect
 
 class CustomerForm(forms.ModelForm):
     class Meta:
@@ -12,6 +16,28 @@ class CustomerForm(forms.ModelForm):
             'address': forms.Textarea(attrs={'rows': 2}),
         }
 
+def _tier_label(min_days, max_days, rate):
+    """One tariff tier as shown in the pricing guide, e.g. '2-10 days: R300/day'"""
+    if max_days == min_days:
+        days = f"{min_days} day" if min_days == 1 else f"{min_days} days"
+    elif max_days is None:
+        days = f"{min_days}+ days"
+    else:
+        days = f"{min_days}-{max_days} days"
+    return f"{days}: R{rate:.0f}/day" if rate == int(rate) else f"{days}: R{rate:.2f}/day"
+
+def rate_guide_html(on_date=None):
+    """Pricing guide listing the default tariff tiers of every scooter category"""
+    table = get_tariff_table()
+    categories = [
+        (label.replace(' - ', ' (', 1) + ')', ', '.join(_tier_label(*tier) for tier in table.tiers(category, on_date=on_date)))
+        for category, label in Scooter.CATEGORY_CHOICES
+    ]
+    return format_html(
+        '<div class="mt-3 mb-3"><strong>Pricing Guide by Category:</strong><ul class="small">{}</ul></div>',
+        format_html_join('', '<li>{}: {}</li>', ((label, tiers or 'No tariff set') for label, tiers in categories)),
+    )
+
 class RentalForm(forms.ModelForm):
     class Meta:
         model = Rental
@@ -19,6 +45,9 @@ class RentalForm(forms.ModelForm):
                  'rate_type', 'rate_amount', 'deposit_amount', 'status', 'mileage_start', 
                  'mileage_end', 'deposit_returned', 'notes']
         widgets = {
+            'customer': TypeaheadSelect('customers', attrs={
+                'data-placeholder': 'Type a name, email, phone or licence number',
+            }),
             'start_date': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'expected_end_date': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
             'notes': forms.Textarea(attrs={'rows': 3}),
@@ -26,7 +55,7 @@ class RentalForm(forms.ModelForm):
         help_texts = {
             'rate_type': 'Daily rates use category-based pricing based on rental duration.',
             'scooter': 'Select a scooter category: A (Sym Orbit 125cc), B (Jet 14 200cc), C (Citycom 300cc), or D (Vespa 150/300cc).',
-            'rate_amount': 'For daily rentals, rate is calculated based on category and duration: 1 day, 2-10 days, 11-29 days, or 30+ days.'
+            'rate_amount': 'For daily rentals, rate is calculated based on category and duration (see the pricing guide below).'
         }
     
     def __init__(self, *args, **kwargs):
@@ -56,19 +85,8 @@ class RentalForm(forms.ModelForm):
             # Set expected end date to 24 hours from now
             self.initial['expected_end_date'] = (now + timezone.timedelta(days=1)).strftime('%Y-%m-%dT%H:%M')
             
-            # Add pricing guide text
-            pricing_guide = """
-            <div class="mt-3 mb-3">
-                <strong>Pricing Guide by Category:</strong>
-                <ul class="small">
-                    <li>Category A (Sym Orbit 125cc): 1 day: R400, 2-10 days: R300/day, 11-29 days: R225/day, 30+ days: R120/day</li>
-                    <li>Category B (Jet 14 200cc): 1 day: R450, 2-10 days: R350/day, 11-29 days: R255/day, 30+ days: R150/day</li>
-                    <li>Category C (Citycom 300cc): 1 day: R550, 2-10 days: R500/day, 11-29 days: R350/day, 30+ days: R250/day</li>
-                    <li>Category D (Vespa 150/300cc): 1 day: R850, 2-10 days: R600/day, 11-29 days: R400/day, 30+ days: R250/day</li>
-                </ul>
-            </div>
-            """
-            self.fields['rate_amount'].help_text += pricing_guide
+            # Add pricing guide text from the active tariffs
+            self.fields['rate_amount'].help_text += rate_guide_html()
 
 class PaymentMethodForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from customers.overdue import run_overdue_sweep, SWEEP_BATCH_SIZE
+from utils.workers import run_worker_loop
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Mark active rentals past their expected return as overdue and raise overdue rental alerts'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'OVERDUE_SWEEP_INTERVAL', 300),
+            help='Seconds between sweeps (default: OVERDUE_SWEEP_INTERVAL setting)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SWEEP_BATCH_SIZE,
+            help=f'Rentals marked overdue per UPDATE (default: {SWEEP_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run a single sweep and exit (for cron/systemd timers)',
+        )
+    
+    def handle(self, *args, **options):
+        interval = max(options['interval'], 1)
+        batch_size = options['batch_size']
+        run_once = options['once']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        
+        self.stdout.write(f'Overdue sweeper started (interval: {interval}s)')
+        
+        def step():
+            rentals_marked, alerts_created = run_overdue_sweep(interval_seconds=interval, batch_size=batch_size)
+            self.stdout.write(f'Marked {rentals_marked} rentals overdue, created {alerts_created} new alerts.')
+            logger.info('Overdue sweep marked %s rentals and created %s alerts', rentals_marked, alerts_created)
+        
+        run_worker_loop(self, 'Overdue sweeper', step, interval, run_once)
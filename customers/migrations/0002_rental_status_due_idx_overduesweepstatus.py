@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-16 23:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+        ('inventory', '0012_seed_rental_tariffs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverdueSweepStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_run_started', models.DateTimeField(blank=True, null=True)),
+                ('last_run_finished', models.DateTimeField(blank=True, null=True)),
+                ('next_run', models.DateTimeField(blank=True, null=True)),
+                ('interval_seconds', models.PositiveIntegerField(default=300)),
+                ('rentals_marked', models.PositiveIntegerField(default=0, help_text='Rentals marked overdue by the last run')),
+                ('alerts_created', models.PositiveIntegerField(default=0, help_text='Overdue rental alerts created by the last run')),
+                ('duration_seconds', models.FloatField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Overdue sweep status',
+                'verbose_name_plural': 'Overdue sweep status',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['status', 'expected_end_date'], name='rental_status_due_idx'),
+        ),
+    ]
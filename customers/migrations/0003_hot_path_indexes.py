@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-16 23:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_rental_status_due_idx_overduesweepstatus'),
+        ('inventory', '0013_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['start_date'], name='rental_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['date_updated'], name='rental_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+from utils.trigram import trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        # Customer search on name, email, phone and driver's licence (PostgreSQL only, see utils.trigram)
+        trigram_indexes('customers', [
+            ('customer', 'first_name', 'customer_first_name_trgm_idx'),
+            ('customer', 'last_name', 'customer_last_name_trgm_idx'),
+            ('customer', 'email', 'customer_email_trgm_idx'),
+            ('customer', 'phone', 'customer_phone_trgm_idx'),
+            ('customer', 'driver_license', 'customer_license_trgm_idx'),
+        ]),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-16 23:54
+
+from django.db import migrations
+
+STATUS_FIELDS = ['last_run_started', 'last_run_finished', 'next_run', 'interval_seconds', 'duration_seconds', 'last_error']
+
+
+def copy_overdue_sweep_status(apps, schema_editor):
+    OverdueSweepStatus = apps.get_model('customers', 'OverdueSweepStatus')
+    WorkerStatus = apps.get_model('inventory', 'WorkerStatus')
+    for status in OverdueSweepStatus.objects.all()[:1]:
+        WorkerStatus.objects.create(
+            worker='overdue_sweep',
+            counts={'rentals_marked': status.rentals_marked, 'alerts_created': status.alerts_created},
+            **{field: getattr(status, field) for field in STATUS_FIELDS}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_search_indexes'),
+        ('inventory', '0016_workerstatus'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_overdue_sweep_status, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='OverdueSweepStatus',
+        ),
+    ]
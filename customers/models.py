@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.validators import MinValueValidator, RegexValidator
 from inventory.models import Scooter
+from inventory.pricing import get_daily_rate, rental_days
+from inventory.querysets import StoreScopedManager
 
 class Customer(models.Model):
     """Model representing a customer"""
@@ -62,15 +64,15 @@ class Rental(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
     
+    # Rentals belong to the scooter's store
+    objects = StoreScopedManager('scooter__store')
+    
     def __str__(self):
         return f"Rental #{self.rental_number} - {self.customer} - {self.scooter}"
     
     def calculate_total(self):
         """Calculate the total amount based on rate and duration"""
         if self.end_date:
-            from django.utils import timezone
-            from datetime import timedelta
-            
             duration = self.end_date - self.start_date
             
             if self.rate_type == 'hourly':
@@ -80,13 +82,11 @@ class Rental(models.Model):
                 return self.rate_amount * hours
             else:  # daily
                 # Calculate days, rounding up
-                days = duration.days
-                if duration.seconds > 0:
-                    days += 1  # Round up to next day
+                days = rental_days(self.start_date, self.end_date)
                 
                 # For completed rentals, recalculate with actual days
                 # This handles cases where rental duration changed
-                daily_rate = self.scooter.get_rate_for_days(days)
+                daily_rate = get_daily_rate(self.scooter, days, self.start_date)
                 return daily_rate * days
         return None
     
@@ -96,15 +96,9 @@ class Rental(models.Model):
             if self.rate_type == 'hourly':
                 self.rate_amount = self.scooter.hourly_rate
             else:  # daily rate
-                # Calculate days for rental duration
-                from datetime import timedelta
-                duration = self.expected_end_date - self.start_date
-                days = duration.days
-                if duration.seconds > 0:
-                    days += 1  # Round up to next day
-                    
-                # Apply category-based pricing
-                self.rate_amount = self.scooter.get_rate_for_days(days)
+                # Apply category-based pricing from the tariff table
+                days = rental_days(self.start_date, self.expected_end_date)
+                self.rate_amount = get_daily_rate(self.scooter, days, self.start_date)
             
             # Update scooter status to rented
             self.scooter.status = 'rented'
@@ -122,6 +116,16 @@ class Rental(models.Model):
             self.scooter.save()
         
         super().save(*args, **kwargs)
+    
+    class Meta:
+        indexes = [
+            # Overdue sweep: active rentals past their expected return
+            models.Index(fields=['status', 'expected_end_date'], name='rental_status_due_idx'),
+            # Rentals by start date (reports and rollups)
+            models.Index(fields=['start_date'], name='rental_start_idx'),
+            # Incremental analytics rollups (changed since the watermark)
+            models.Index(fields=['date_updated'], name='rental_updated_idx'),
+        ]
 
 class PaymentMethod(models.Model):
     """Model representing a customer's payment method"""
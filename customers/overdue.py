@@ -0,0 +1,64 @@
+"""
+Overdue rental sweeper
+
+Active rentals whose expected return has passed are marked 'overdue' by a
+periodic sweep (python manage.py sweep_overdue_rentals) rather than by the
+rental list, so viewing rentals never writes to the table. Each batch is
+picked on the (status, expected_end_date) index and updated by primary key;
+the sweep then raises overdue rental alerts and records itself on its
+WorkerStatus row.
+"""
+from django.utils import timezone
+from inventory.utils import check_for_overdue_rentals
+from utils.workers import record_worker_run
+from .models import Rental
+
+# Rentals marked overdue per UPDATE
+SWEEP_BATCH_SIZE = 500
+
+
+def mark_overdue_rentals(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Mark active rentals past their expected return date as overdue
+    
+    Args:
+        now: Cut-off time (default: timezone.now())
+        batch_size: Rentals updated per UPDATE statement
+    
+    Returns:
+        int: Number of rentals marked overdue
+    """
+    now = now or timezone.now()
+    marked = 0
+    
+    while True:
+        rental_ids = list(Rental.objects.filter(
+            status='active', expected_end_date__lt=now
+        ).order_by('expected_end_date').values_list('pk', flat=True)[:batch_size])
+        if not rental_ids:
+            break
+        
+        # Re-check the status so a rental returned meanwhile is left alone;
+        # update() skips auto_now, so date_updated is set explicitly
+        marked += Rental.objects.filter(pk__in=rental_ids, status='active').update(
+            status='overdue', date_updated=now
+        )
+        if len(rental_ids) < batch_size:
+            break
+    
+    return marked
+
+
+def run_overdue_sweep(interval_seconds=300, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Run one overdue sweep and record it on the overdue sweep's WorkerStatus row
+    
+    Returns:
+        tuple: (rentals marked overdue, overdue rental alerts created)
+    """
+    def sweep():
+        rentals_marked = mark_overdue_rentals(batch_size=batch_size)
+        return {'rentals_marked': rentals_marked, 'alerts_created': check_for_overdue_rentals(batch_size=batch_size)}
+    
+    counts = record_worker_run('overdue_sweep', sweep, interval_seconds=interval_seconds)
+    return counts.get('rentals_marked', 0), counts.get('alerts_created', 0)
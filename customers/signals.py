@@ -0,0 +1,44 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from inventory.models import Scooter
+from service.models import JobCard
+from .models import Rental
+from .availability import invalidate_availability
+
+# Models the availability index is built from; any write makes their scooters' windows stale
+AVAILABILITY_SOURCE_MODELS = (Rental, JobCard, Scooter)
+
+
+def _affected_scooters(instance):
+    """Scooters whose availability a write to `instance` can change"""
+    if isinstance(instance, Scooter):
+        return {instance.pk}
+
+    # A rental or job card moved to another scooter frees the one it was loaded with
+    return {scooter_id for scooter_id in (instance.scooter_id, getattr(instance, '_loaded_scooter_id', None)) if scooter_id}
+
+
+def remember_loaded_scooter(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred scooter_id is not loaded here
+    instance._loaded_scooter_id = instance.__dict__.get('scooter_id')
+
+
+def invalidate_availability_on_write(sender, instance, **kwargs):
+    scooter_ids = _affected_scooters(instance)
+    if isinstance(instance, (Rental, JobCard)):
+        instance._loaded_scooter_id = instance.scooter_id
+
+    # Only once committed, so other processes reload the new rows rather than the old ones
+    transaction.on_commit(partial(invalidate_availability, scooter_ids))
+
+
+for model in AVAILABILITY_SOURCE_MODELS:
+    post_save.connect(invalidate_availability_on_write, sender=model,
+                      dispatch_uid=f'availability_save_{model.__name__}')
+    post_delete.connect(invalidate_availability_on_write, sender=model,
+                        dispatch_uid=f'availability_delete_{model.__name__}')
+
+for model in (Rental, JobCard):
+    post_init.connect(remember_loaded_scooter, sender=model,
+                      dispatch_uid=f'availability_init_{model.__name__}')
@@ -0,0 +1,28 @@
+from customers.models import Customer, Rental
+from utils.testing import ViewBudgetTestCase
+
+
+class CustomersViewBudgetTests(ViewBudgetTestCase):
+    
+    def test_customer_list(self):
+        # Session, user, count, page
+        self.assertViewBudget('customers:customer_list', queries=4)
+    
+    def test_customer_detail(self):
+        # Session, user, customer, payment methods, active rentals, completed rentals
+        customer = Customer.objects.filter(rentals__isnull=False).order_by('-pk').first()
+        self.assertViewBudget('customers:customer_detail', [customer.pk], queries=6)
+    
+    def test_rental_list(self):
+        # Session, user, count, overdue sweep status, page with customers and scooters
+        self.assertViewBudget('customers:rental_list', queries=5)
+    
+    def test_rental_detail(self):
+        # Session, user, rental with customer, scooter, store and creator, payments with methods
+        rental = Rental.objects.filter(payments__isnull=False).order_by('-pk').first()
+        self.assertViewBudget('customers:rental_detail', [rental.pk], queries=4)
+    
+    def test_rental_create_form(self):
+        # Session, user, last rental number, tariffs, availability index
+        # (scooters, rentals, job cards), free scooter options
+        self.assertViewBudget('customers:rental_create', queries=8, max_ms=1000)
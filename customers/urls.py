@@ -14,6 +14,7 @@ urlpatterns = [
     # Rental URLs
     path('rentals/', views.rental_list, name='rental_list'),
     path('rentals/add/', views.rental_create, name='rental_create'),
+    path('rentals/available-scooters/', views.available_scooters, name='available_scooters'),
     path('rentals/<int:pk>/update/', views.rental_update, name='rental_update'),
     path('rentals/<int:pk>/detail/', views.rental_detail, name='rental_detail'),
     path('rentals/<int:pk>/complete/', views.rental_complete, name='rental_complete'),
@@ -1,27 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Sum
+from django.db import transaction
+from django.db.models import Sum
 from django.utils import timezone
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from datetime import timedelta
 from .models import Customer, Rental, PaymentMethod, Payment
-from inventory.models import Scooter
+from inventory.models import Scooter, WorkerStatus
 from .forms import CustomerForm, RentalForm, PaymentMethodForm, PaymentForm
+from utils.search import search
+from .availability import get_free_scooter_ids, is_scooter_free, parse_window, UNBOOKABLE_STATUSES
 
 # Customer Views
 @login_required
 def customer_list(request):
     query = request.GET.get('q', '')
     
+    # Ranked search on name, email, phone and driver's licence (see utils.search)
     if query:
-        customers_queryset = Customer.objects.filter(
-            Q(first_name__icontains=query) | 
-            Q(last_name__icontains=query) | 
-            Q(email__icontains=query) | 
-            Q(phone__icontains=query) |
-            Q(driver_license__icontains=query)
-        )
+        customers_queryset = search('customers', query)
     else:
         customers_queryset = Customer.objects.all()
     
@@ -104,11 +103,6 @@ def rental_list(request):
     else:
         rentals_queryset = Rental.objects.all()
     
-    # Check for overdue rentals and update their status
-    today = timezone.now()
-    overdue_rentals = rentals_queryset.filter(status='active', expected_end_date__lt=today)
-    overdue_rentals.update(status='overdue')
-    
     # Get the queryset with all needed relations
     rentals_queryset = rentals_queryset.select_related('customer', 'scooter').order_by('-date_created')
     
@@ -128,7 +122,9 @@ def rental_list(request):
     context = {
         'rentals': rentals,
         'status_filter': status_filter,
-        'status_choices': Rental.STATUS_CHOICES
+        'status_choices': Rental.STATUS_CHOICES,
+        # Overdue statuses are set by the sweeper (sweep_overdue_rentals), not here
+        'overdue_sweep_status': WorkerStatus.current('overdue_sweep')
     }
     
     return render(request, 'customers/rental_list.html', context)
@@ -137,28 +133,58 @@ def rental_list(request):
 def rental_create(request):
     if request.method == 'POST':
         form = RentalForm(request.POST)
+        # Any bookable scooter can be chosen; availability is checked for the requested dates below
+        form.fields['scooter'].queryset = Scooter.objects.exclude(status__in=UNBOOKABLE_STATUSES)
         if form.is_valid():
             rental = form.save(commit=False)
             
-            # Ensure scooter is available
-            scooter = rental.scooter
-            if scooter.status != 'available':
-                messages.error(request, f'Scooter {scooter} is not available for rent.')
-                return redirect('customers:rental_create')
-            
-            rental.mileage_start = scooter.mileage
-            rental.created_by = request.user
-            rental.save()
+            with transaction.atomic():
+                # Lock the scooter so two bookings of it are checked and saved one after the other
+                scooter = rental.scooter = Scooter.objects.select_for_update().get(pk=rental.scooter_id)
+                
+                # Ensure scooter is free for the whole rental (rentals, open job cards and status)
+                is_free = is_scooter_free(scooter.id, rental.start_date, rental.expected_end_date)
+                if is_free:
+                    rental.mileage_start = scooter.mileage
+                    rental.created_by = request.user
+                    rental.save()
             
-            messages.success(request, 'Rental created successfully.')
-            return redirect('customers:rental_detail', pk=rental.pk)
+            if not is_free:
+                form.add_error('scooter', f'Scooter {scooter} is not available for the selected dates.')
+            else:
+                messages.success(request, 'Rental created successfully.')
+                return redirect('customers:rental_detail', pk=rental.pk)
     else:
-        # Only show available scooters
+        # Only show scooters free for the requested window (default: the form's initial dates)
         form = RentalForm()
-        form.fields['scooter'].queryset = Scooter.objects.filter(status='available')
+        window = parse_window(
+            request.GET.get('start', form.initial['start_date']),
+            request.GET.get('end', form.initial['expected_end_date'])
+        )
+        free_ids = get_free_scooter_ids(*window) if window else []
+        form.fields['scooter'].queryset = Scooter.objects.filter(id__in=free_ids)
     
     return render(request, 'customers/rental_form.html', {'form': form, 'title': 'Create New Rental'})
 
+@login_required
+def available_scooters(request):
+    """API endpoint listing scooters free for a window (?start=&end=[&store=&category=])"""
+    window = parse_window(request.GET.get('start'), request.GET.get('end'))
+    if not window:
+        return JsonResponse({'error': 'A valid start and end are required.'}, status=400)
+    
+    store_id = request.GET.get('store')
+    free_ids = get_free_scooter_ids(
+        *window,
+        store_id=int(store_id) if store_id and store_id.isdigit() else None,
+        category=request.GET.get('category') or None
+    )
+    scooters = Scooter.objects.filter(id__in=free_ids).order_by('category', 'make', 'model')
+    
+    return JsonResponse({
+        'scooters': [{'id': scooter.id, 'label': str(scooter)} for scooter in scooters]
+    })
+
 @login_required
 def rental_update(request, pk):
     rental = get_object_or_404(Rental, pk=pk)
@@ -180,11 +206,11 @@ def rental_update(request, pk):
 
 @login_required
 def rental_detail(request, pk):
-    rental = get_object_or_404(Rental, pk=pk)
-    payments = rental.payments.all()
+    rental = get_object_or_404(Rental.objects.select_related('customer', 'scooter__store', 'created_by'), pk=pk)
+    payments = list(rental.payments.select_related('payment_method'))
     
-    # Calculate payment stats
-    total_paid = payments.filter(status='completed').aggregate(Sum('amount'))['amount__sum'] or 0
+    # Calculate payment stats from the payments already loaded
+    total_paid = sum(payment.amount for payment in payments if payment.status == 'completed')
     balance_due = (rental.total_amount or 0) - total_paid
     
     context = {
@@ -212,7 +238,7 @@ def rental_complete(request, pk):
             if mileage_end < rental.mileage_start:
                 messages.error(request, 'End mileage cannot be less than start mileage.')
                 return redirect('customers:rental_detail', pk=rental.pk)
-                
+            
             rental.mileage_end = mileage_end
             rental.end_date = timezone.now()
             rental.status = 'completed'
@@ -0,0 +1,226 @@
+"""
+Cached metrics for the staff dashboard
+
+Dashboard cards, charts and recent-activity lists are computed once per
+store filter and kept in the Django cache. Writes to the models they are
+built from bump a shared version key (see dashboard.signals), which makes
+every cached entry stale at once; DASHBOARD_METRICS_TTL bounds staleness
+for changes that bypass model signals (bulk_create, update()).
+"""
+import json
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum, Q, F
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from inventory.models import Scooter, Parts, StockTransfer, InventoryAlert
+from inventory.utils import get_low_stock_items_for_dashboard, get_store_fleet_summary
+from service.models import JobCard
+from customers.models import Customer, Rental
+
+METRICS_KEY_PREFIX = 'dashboard:metrics'
+METRICS_VERSION_KEY = 'dashboard:metrics:version'
+
+
+def _metrics_version():
+    """Current metrics version, creating one if the cache has none"""
+    version = cache.get(METRICS_VERSION_KEY)
+    if version is None:
+        cache.add(METRICS_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(METRICS_VERSION_KEY)
+    return version
+
+
+def invalidate_dashboard_metrics():
+    """Mark every cached dashboard metrics entry as stale"""
+    cache.set(METRICS_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_dashboard_metrics(store_id=None):
+    """
+    Get dashboard metrics for a store (or all stores when store_id is None),
+    from the cache when available
+    """
+    key = f"{METRICS_KEY_PREFIX}:{_metrics_version()}:{store_id or 'all'}"
+    metrics = cache.get(key)
+    
+    if metrics is None:
+        metrics = compute_dashboard_metrics(store_id)
+        cache.set(key, metrics, timeout=getattr(settings, 'DASHBOARD_METRICS_TTL', 300))
+    
+    return metrics
+
+
+def compute_dashboard_metrics(store_id=None):
+    """
+    Compute dashboard cards, chart data and recent-activity lists from the database
+    Store filtering applies to the scooter counts and status chart
+    """
+    # Get all alerts
+    all_alerts_count = InventoryAlert.objects.exclude(status='resolved').count()
+    
+    # Get recent rentals with select_related for better performance - limit to 2 items
+    recent_rentals = list(Rental.objects.select_related('customer', 'scooter').order_by('-start_date')[:2])
+    
+    # Get recent job cards with select_related for better performance - limit to 2 items
+    recent_job_cards = list(JobCard.objects.select_related('scooter', 'technician').order_by('-date_created')[:2])
+    
+    # Get low stock alerts with select_related for better performance - limit to 2 items
+    low_stock_alerts = list(Parts.objects.select_related('store').filter(
+        current_stock__lte=F('reorder_level')
+    ).order_by('current_stock')[:2])
+    
+    # Get formatted low stock items for the dashboard widget (the same 2 parts)
+    low_stock_items_widget = get_low_stock_items_for_dashboard(low_stock_parts=low_stock_alerts)
+    
+    # Get low stock count for card display
+    low_stock_count = Parts.objects.filter(current_stock__lte=F('reorder_level')).count()
+    
+    # Get recent stock transfers with select_related for better performance - limit to 2 items
+    recent_stock_transfers = list(StockTransfer.objects.select_related(
+        'source_store', 'destination_store', 'part'
+    ).order_by('-transfer_date')[:2])
+    
+    # Get pending transfers count
+    pending_transfers_count = StockTransfer.objects.filter(status='pending').count()
+    
+    # Per-store scooter counts and fleet totals for the selected store
+    # (two grouped queries; the store list also feeds the dropdown)
+    fleet_summary = get_store_fleet_summary(store_id=store_id)
+    store_scooter_data = fleet_summary['stores']
+    fleet_totals = fleet_summary['totals']
+    
+    # Get counts for dashboard cards for the selected store
+    total_scooters = fleet_totals['total']
+    available_scooters = fleet_totals['available']
+    unavailable_scooters = fleet_totals['unavailable']
+    
+    # Customer and rental card counts, one conditional aggregate per table
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    
+    customer_counts = Customer.objects.aggregate(
+        total=Count('id'),
+        new_last_30_days=Count('id', filter=Q(date_created__gte=thirty_days_ago))
+    )
+    total_customers = customer_counts['total']
+    new_customers_last_30_days = customer_counts['new_last_30_days']
+    
+    rental_counts = Rental.objects.aggregate(
+        active=Count('id', filter=Q(status='active')),
+        new_last_30_days=Count('id', filter=Q(date_created__gte=thirty_days_ago))
+    )
+    active_rentals_count = rental_counts['active']
+    new_rentals_last_30_days = rental_counts['new_last_30_days']
+    
+    # CHART DATA
+    
+    # 1. Scooter Status Distribution Chart (statuses present in the fleet, alphabetical)
+    scooter_status_data = sorted(
+        status for status, _ in Scooter.STATUS_CHOICES if fleet_totals[status]
+    )
+    scooter_status_labels = [status.capitalize() for status in scooter_status_data]
+    scooter_status_counts = [fleet_totals[status] for status in scooter_status_data]
+    
+    # 2. Rental Trends by Month (Last 6 months)
+    six_months_ago = timezone.now() - timedelta(days=180)
+    rental_trends = Rental.objects.filter(
+        start_date__gte=six_months_ago
+    ).annotate(
+        month=TruncMonth('start_date')
+    ).values('month').annotate(
+        count=Count('id')
+    ).order_by('month')
+    
+    rental_trends_labels = [item['month'].strftime('%b %Y') for item in rental_trends]
+    rental_trends_data = [item['count'] for item in rental_trends]
+    
+    # 3. Job Card Status Distribution
+    job_card_status = list(JobCard.objects.values('status').annotate(count=Count('status')).order_by('status'))
+    active_job_cards = next((item['count'] for item in job_card_status if item['status'] == 'in_progress'), 0)
+    job_card_status_labels = [item['status'].replace('_', ' ').capitalize() for item in job_card_status]
+    job_card_status_counts = [item['count'] for item in job_card_status]
+    
+    # 4. Weekly Revenue from Rentals (Last 8 weeks)
+    eight_weeks_ago = timezone.now() - timedelta(weeks=8)
+    weekly_revenue = Rental.objects.filter(
+        start_date__gte=eight_weeks_ago,
+        status__in=['completed', 'active']
+    ).annotate(
+        week=TruncWeek('start_date')
+    ).values('week').annotate(
+        revenue=Sum('total_amount')
+    ).order_by('week')
+    
+    weekly_revenue_labels = [item['week'].strftime('%d %b') for item in weekly_revenue]
+    weekly_revenue_data = [float(item['revenue'] or 0) for item in weekly_revenue]
+    
+    # 5. Top 5 Most Rented Scooter Models
+    top_rented_scooters = Rental.objects.values(
+        'scooter__make', 'scooter__model'
+    ).annotate(
+        count=Count('id')
+    ).order_by('-count')[:5]
+    
+    top_scooter_labels = [f"{item['scooter__make']} {item['scooter__model']}" for item in top_rented_scooters]
+    top_scooter_data = [item['count'] for item in top_rented_scooters]
+    
+    # 6. Maintenance Job Cards by Month
+    maintenance_trends = JobCard.objects.filter(
+        date_created__gte=six_months_ago
+    ).annotate(
+        month=TruncMonth('date_created')
+    ).values('month').annotate(
+        count=Count('id')
+    ).order_by('month')
+    
+    maintenance_labels = [item['month'].strftime('%b %Y') for item in maintenance_trends]
+    maintenance_data = [item['count'] for item in maintenance_trends]
+    
+    return {
+        'recent_rentals': recent_rentals,
+        'recent_job_cards': recent_job_cards,
+        'low_stock_alerts': low_stock_alerts,
+        'low_stock_items_widget': low_stock_items_widget,
+        'all_alerts_count': all_alerts_count,
+        'recent_stock_transfers': recent_stock_transfers,
+        'total_scooters': total_scooters,
+        'available_scooters': available_scooters,
+        'unavailable_scooters': unavailable_scooters,
+        'total_customers': total_customers,
+        'active_job_cards': active_job_cards,
+        'active_rentals_count': active_rentals_count,
+        'low_stock_count': low_stock_count,
+        'pending_transfers_count': pending_transfers_count,
+        'new_rentals_last_30_days': new_rentals_last_30_days,
+        'new_customers_last_30_days': new_customers_last_30_days,
+        'stores': store_scooter_data,
+        'store_scooter_data': store_scooter_data,
+        
+        # Chart Data (JSON serialized)
+        'scooter_status_chart': {
+            'labels': json.dumps(scooter_status_labels),
+            'data': json.dumps(scooter_status_counts)
+        },
+        'rental_trends_chart': {
+            'labels': json.dumps(rental_trends_labels),
+            'data': json.dumps(rental_trends_data)
+        },
+        'job_card_status_chart': {
+            'labels': json.dumps(job_card_status_labels),
+            'data': json.dumps(job_card_status_counts)
+        },
+        'weekly_revenue_chart': {
+            'labels': json.dumps(weekly_revenue_labels),
+            'data': json.dumps(weekly_revenue_data)
+        },
+        'top_scooter_chart': {
+            'labels': json.dumps(top_scooter_labels),
+            'data': json.dumps(top_scooter_data)
+        },
+        'maintenance_trends_chart': {
+            'labels': json.dumps(maintenance_labels),
+            'data': json.dumps(maintenance_data)
+        }
+    }
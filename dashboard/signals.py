@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from inventory.models import Scooter, Parts, StockTransfer, InventoryAlert
+from service.models import JobCard
+from customers.models import Customer, Rental
+from .metrics import invalidate_dashboard_metrics
+
+# Models the dashboard metrics are computed from; any write makes the cached metrics stale
+DASHBOARD_SOURCE_MODELS = (Rental, Scooter, JobCard, Parts, StockTransfer, InventoryAlert, Customer)
+
+
+def invalidate_dashboard_metrics_on_write(sender, **kwargs):
+    invalidate_dashboard_metrics()
+
+
+for model in DASHBOARD_SOURCE_MODELS:
+    post_save.connect(invalidate_dashboard_metrics_on_write, sender=model,
+                      dispatch_uid=f'dashboard_metrics_save_{model.__name__}')
+    post_delete.connect(invalidate_dashboard_metrics_on_write, sender=model,
+                        dispatch_uid=f'dashboard_metrics_delete_{model.__name__}')
@@ -0,0 +1,13 @@
+from utils.testing import ViewBudgetTestCase
+
+
+class DashboardViewBudgetTests(ViewBudgetTestCase):
+    
+    def test_dashboard(self):
+        # Session, user, alert worker status and 16 metric queries (cards,
+        # recent activity, fleet summary and six charts), cached afterwards
+        self.assertViewBudget('dashboard:index', queries=19, max_ms=1000)
+    
+    def test_scooter_counts_api(self):
+        # Session, user, one grouped status count
+        self.assertViewBudget('dashboard:get_scooter_counts', queries=3, max_ms=300)
@@ -7,4 +7,5 @@ urlpatterns = [
     path('', views.dashboard, name='index'),
     path('logout/', views.custom_logout, name='custom_logout'),
     path('api/scooter-counts/', views.get_scooter_counts, name='get_scooter_counts'),
+    path('api/search/', views.search_api, name='search_api'),
 ]
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Store, Scooter, Parts, StockTransfer, ScooterMaintenanceHistory
+from .models import (Store, Scooter, Parts, StockTransfer, ScooterMaintenanceHistory, WorkerStatus, RentalTariff,
+                     StockMovement)
+from .stock import create_part, set_stock_levels
 
 @admin.register(Store)
 class StoreAdmin(admin.ModelAdmin):
@@ -27,6 +29,34 @@ class PartsAdmin(admin.ModelAdmin):
             'fields': ('current_stock', 'reorder_level', 'unit_price', 'location_in_store')
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        # Stock changes are recorded in the stock ledger
+        if not change:
+            create_part(obj, user=request.user)
+            return
+        
+        obj.save(update_fields=[name for name in form.fields if name != 'current_stock'] + ['date_updated'])
+        if 'current_stock' in form.changed_data:
+            set_stock_levels([(obj, form.cleaned_data['current_stock'])], user=request.user)
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('date_created', 'part', 'quantity', 'balance_after', 'reason', 'reference', 'created_by')
+    list_filter = ('reason', 'part__store')
+    list_select_related = ('part', 'created_by')
+    search_fields = ('part__part_number', 'part__name', 'reference')
+    date_hierarchy = 'date_created'
+    
+    # The ledger is append-only; movements are written by inventory.stock
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 @admin.register(StockTransfer)
 class StockTransferAdmin(admin.ModelAdmin):
@@ -52,3 +82,15 @@ class ScooterMaintenanceHistoryAdmin(admin.ModelAdmin):
     list_filter = ('maintenance_date', 'performed_by')
     search_fields = ('scooter__vin', 'scooter__make', 'scooter__model', 'description')
     date_hierarchy = 'maintenance_date'
+
+@admin.register(WorkerStatus)
+class WorkerStatusAdmin(admin.ModelAdmin):
+    list_display = ('worker', 'last_run_finished', 'next_run', 'interval_seconds', 'counts', 'duration_seconds')
+    readonly_fields = ('worker', 'last_run_started', 'last_run_finished', 'next_run', 'interval_seconds',
+                       'counts', 'duration_seconds', 'last_error')
+
+@admin.register(RentalTariff)
+class RentalTariffAdmin(admin.ModelAdmin):
+    list_display = ('category', 'min_days', 'max_days', 'daily_rate', 'store', 'effective_from', 'effective_to', 'is_active')
+    list_filter = ('category', 'store', 'is_active')
+    date_hierarchy = 'effective_from'
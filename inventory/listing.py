@@ -0,0 +1,192 @@
+"""
+Inventory list engine: filters, keyset pagination and cached counts
+
+The scooter and parts lists (and their queued exports) share the filters
+below. Lists are paged with keyset ("seek") pagination: a page is the next
+INVENTORY_LIST_PAGE_SIZE rows after the last row of the previous page in
+(sort field, id) order, so every page costs one indexed LIMIT query however
+deep it is and however large the fleet. The cursor handed to the next page
+is that last row's sort value and id.
+
+Totals are counted separately and cached per filter combination. Writes to
+scooters or parts bump a shared version key (see inventory.signals), which
+makes every cached count stale at once; INVENTORY_LIST_COUNT_TTL bounds
+staleness for changes that bypass model signals (bulk_create, update()).
+"""
+import base64
+import binascii
+import hashlib
+import json
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db.models import Q
+from utils.search import search_filter
+from .utils import get_scooter_status_counts
+
+LIST_COUNT_KEY_PREFIX = 'inventory:list_counts'
+LIST_COUNT_VERSION_KEY = 'inventory:list_counts:version'
+
+# Sortable columns; each sort is (column, id) so pages never skip or repeat rows
+SCOOTER_SORT_FIELDS = ['vin', 'make', 'model', 'year', 'category', 'status', 'mileage']
+SCOOTER_DEFAULT_SORT = 'vin'
+PARTS_SORT_FIELDS = ['part_number', 'name', 'category', 'current_stock', 'reorder_level', 'unit_price']
+PARTS_DEFAULT_SORT = 'part_number'
+
+
+def get_sort(params, valid_fields, default):
+    """The requested sort ('field' or '-field') if the field is whitelisted, else the default"""
+    sort = params.get('sort') or default
+    return sort if sort.lstrip('-') in valid_fields else default
+
+
+def filter_scooters(queryset, params):
+    """Apply the scooter list's status, category and License No/VIN search filters"""
+    status_filter = params.get('status')
+    if status_filter and status_filter != 'all':
+        queryset = queryset.filter(status=status_filter)
+    
+    category_filter = params.get('category')
+    if category_filter and category_filter != 'all':
+        queryset = queryset.filter(category=category_filter)
+    
+    search_query = params.get('search', '').strip()
+    if search_query:
+        queryset = queryset.filter(search_filter('scooters', search_query))
+    
+    return queryset
+
+
+def filter_parts(queryset, params):
+    """Apply the parts list's store and Part Number/Name search filters"""
+    store_id = params.get('store')
+    if store_id and store_id.isdigit():
+        queryset = queryset.filter(store_id=int(store_id))
+    
+    search_query = params.get('search', '').strip()
+    if search_query:
+        queryset = queryset.filter(search_filter('parts', search_query))
+    
+    return queryset
+
+
+def encode_cursor(obj, field):
+    """Cursor pointing just past obj in a list sorted on field"""
+    value = getattr(obj, field)
+    payload = json.dumps([value if isinstance(value, (int, str)) else str(value), obj.pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, field):
+    """
+    Read a cursor made by encode_cursor
+    
+    Returns:
+        (sort value, pk), or None if the cursor is missing or invalid
+    """
+    if not cursor:
+        return None
+    
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        value = model._meta.get_field(field).to_python(value)
+        # Sort columns are never null, so a null value cannot come from encode_cursor
+        if value is None:
+            return None
+        return value, int(pk)
+    except (binascii.Error, ValueError, TypeError, ValidationError):
+        return None
+
+
+class KeysetPage:
+    """One page of a keyset-paginated list"""
+    
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+    
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def paginate_keyset(queryset, sort, cursor=None, page_size=None):
+    """
+    Fetch the page of queryset that follows the cursor
+    
+    Args:
+        queryset: Filtered queryset to page through
+        sort: Field to sort on, '-' prefixed for descending
+        cursor: next_cursor of the previous page, or None for the first page
+        page_size: Rows per page (default INVENTORY_LIST_PAGE_SIZE)
+    
+    Returns:
+        KeysetPage
+    """
+    page_size = page_size or getattr(settings, 'INVENTORY_LIST_PAGE_SIZE', 50)
+    field = sort.lstrip('-')
+    descending = sort.startswith('-')
+    
+    # Ties on the sort field are broken by id, in the same direction
+    queryset = queryset.order_by(sort, '-pk' if descending else 'pk')
+    
+    # Seek past the last row of the previous page instead of counting an OFFSET
+    position = decode_cursor(cursor, queryset.model, field)
+    if position is not None:
+        value, pk = position
+        lookup = 'lt' if descending else 'gt'
+        queryset = queryset.filter(Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'pk__{lookup}': pk}))
+    
+    # One extra row tells whether there is another page
+    rows = list(queryset[:page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1], field) if len(rows) > page_size else None
+    return KeysetPage(rows[:page_size], next_cursor)
+
+
+def next_page_query(params, page):
+    """Query string for the page after this one, keeping the current filters and sort"""
+    query = params.copy()
+    query.pop('partial', None)
+    query['after'] = page.next_cursor
+    return query.urlencode()
+
+
+def _list_count_version():
+    """Current list count version, creating one if the cache has none"""
+    version = cache.get(LIST_COUNT_VERSION_KEY)
+    if version is None:
+        cache.add(LIST_COUNT_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(LIST_COUNT_VERSION_KEY)
+    return version
+
+
+def invalidate_list_counts():
+    """Mark every cached scooter and parts list count as stale"""
+    cache.set(LIST_COUNT_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def _cached_for_queryset(queryset, kind, compute):
+    """compute(), cached under the queryset's SQL so each filter combination has its own entry"""
+    try:
+        sql = str(queryset.order_by().query)
+    except EmptyResultSet:
+        return compute()
+    
+    digest = hashlib.md5(sql.encode(), usedforsecurity=False).hexdigest()
+    key = f"{LIST_COUNT_KEY_PREFIX}:{_list_count_version()}:{kind}:{digest}"
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout=getattr(settings, 'INVENTORY_LIST_COUNT_TTL', 300))
+    return value
+
+
+def get_cached_count(queryset):
+    """Number of rows in a filtered list, from the cache when available"""
+    return _cached_for_queryset(queryset, 'count', queryset.count)
+
+
+def get_cached_scooter_status_counts(queryset):
+    """get_scooter_status_counts for a scooter queryset, from the cache when available"""
+    return _cached_for_queryset(queryset, 'status', lambda: get_scooter_status_counts(queryset))
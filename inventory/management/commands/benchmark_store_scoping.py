@@ -0,0 +1,97 @@
+from statistics import median
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from customers.models import Rental
+from inventory.models import Scooter, Parts, StockTransfer, Purchase, InventoryAlert, Store
+from service.models import JobCard
+import time
+
+SCOPED_MODELS = [Scooter, Parts, StockTransfer, Purchase, InventoryAlert, JobCard, Rental]
+
+
+def legacy_filter_by_store(queryset, store):
+    """The hasattr-based store filter the removed users.utils.filter_by_user_store used, kept as the benchmark baseline"""
+    if hasattr(queryset.model, 'store'):
+        return queryset.filter(store=store)
+    
+    if hasattr(queryset.model, 'scooter') and hasattr(queryset.model.scooter.field.related_model, 'store'):
+        return queryset.filter(scooter__store=store)
+    
+    if hasattr(queryset.model, 'part') and hasattr(queryset.model.part.field.related_model, 'store'):
+        return queryset.filter(part__store=store)
+    
+    if hasattr(queryset.model, 'source_store') and hasattr(queryset.model, 'destination_store'):
+        return queryset.filter(
+            Q(source_store=store) | Q(destination_store=store)
+        )
+    
+    return queryset
+
+
+class Command(BaseCommand):
+    help = 'Compare store-scoped querysets with the previous hasattr-based store filter'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--store',
+            type=int,
+            help='Store id to scope to (default: the first store)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=2000,
+            help='Querysets scoped per model and method; the median is reported (default: 2000)',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=20,
+            help='Times each scoped count query is run (default: 20)',
+        )
+    
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['queries'] < 1:
+            raise CommandError('--repeat and --queries must be at least 1')
+        
+        store = Store.objects.filter(pk=options['store']).first() if options['store'] else Store.objects.order_by('pk').first()
+        if store is None:
+            raise CommandError('No such store' if options['store'] else 'No stores in the database')
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Scoping to {store.name} (times in microseconds / milliseconds)'))
+        
+        for model in SCOPED_MODELS:
+            base = model.objects.select_related()
+            methods = {
+                'hasattr helper': lambda queryset: legacy_filter_by_store(queryset, store),
+                'declared paths': lambda queryset: queryset.for_store(store),
+            }
+            
+            # Scoping an existing queryset is the per-call cost; SQL compilation is the same for both.
+            # The methods take turns so neither benefits from running second
+            samples = {label: [] for label in methods}
+            for _ in range(options['repeat']):
+                for label, scope in methods.items():
+                    start_time = time.perf_counter()
+                    scope(base)
+                    samples[label].append((time.perf_counter() - start_time) * 1_000_000)
+            
+            line = [f'  {model.__name__}:']
+            counts = {}
+            for label, scope in methods.items():
+                query_samples = []
+                for _ in range(options['queries']):
+                    start_time = time.perf_counter()
+                    counts[label] = scope(base).count()
+                    query_samples.append((time.perf_counter() - start_time) * 1000)
+                line.append(
+                    f'{label} {median(samples[label]):.1f} us to scope, '
+                    f'{median(query_samples):.2f} ms to count {counts[label]} rows;'
+                )
+            
+            self.stdout.write(' '.join(line))
+            if len(set(counts.values())) > 1:
+                self.stdout.write(self.style.WARNING(
+                    f'    row counts differ: {model.__name__} declares {model._store_paths}'
+                ))
+        
+        self.stdout.write(self.style.SUCCESS(f'Benchmarked {len(SCOPED_MODELS)} models.'))
@@ -0,0 +1,69 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from inventory.models import StockTransfer, Store
+from inventory.transfers import complete_transfers
+
+
+class Command(BaseCommand):
+    help = 'Complete open stock transfers in one batch, adding their quantities to the destination stores'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'transfer_numbers',
+            nargs='*',
+            help='Transfer numbers to complete (default: every open transfer matching the filters)',
+        )
+        parser.add_argument(
+            '--from-store',
+            type=int,
+            help='Only transfers out of this store id',
+        )
+        parser.add_argument(
+            '--to-store',
+            type=int,
+            help='Only transfers into this store id',
+        )
+        parser.add_argument(
+            '--status',
+            choices=['pending', 'in_transit'],
+            help='Only transfers with this status (default: pending and in transit)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the transfers that would be completed without changing anything',
+        )
+    
+    def handle(self, *args, **options):
+        transfers = StockTransfer.objects.filter(status__in=[options['status']] if options['status'] else ['pending', 'in_transit'])
+        
+        if options['transfer_numbers']:
+            transfers = transfers.filter(transfer_number__in=options['transfer_numbers'])
+            unknown = set(options['transfer_numbers']) - set(
+                StockTransfer.objects.filter(transfer_number__in=options['transfer_numbers']).values_list('transfer_number', flat=True)
+            )
+            if unknown:
+                raise CommandError(f"Unknown transfer numbers: {', '.join(sorted(unknown))}")
+        
+        for option, field in (('from_store', 'source_store_id'), ('to_store', 'destination_store_id')):
+            if options[option] is not None:
+                if not Store.objects.filter(pk=options[option]).exists():
+                    raise CommandError(f"Store {options[option]} does not exist")
+                transfers = transfers.filter(**{field: options[option]})
+        
+        if options['dry_run']:
+            count = 0
+            for transfer in transfers.select_related('part', 'source_store', 'destination_store').order_by('pk').iterator():
+                self.stdout.write(
+                    f"  {transfer.transfer_number}: {transfer.quantity} x {transfer.part.part_number} "
+                    f"{transfer.source_store.name} -> {transfer.destination_store.name}"
+                )
+                count += 1
+            self.stdout.write(f"{count} transfers would be completed.")
+            return
+        
+        start_time = time.monotonic()
+        completed = complete_transfers(transfers)
+        self.stdout.write(self.style.SUCCESS(
+            f'Completed {len(completed)} stock transfers in {time.monotonic() - start_time:.2f}s.'
+        ))
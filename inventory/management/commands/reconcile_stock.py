@@ -0,0 +1,62 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from inventory.models import Parts, Store
+from inventory.stock import stock_discrepancies, rebuild_stock_balances
+
+
+class Command(BaseCommand):
+    help = 'Compare parts stock levels with the stock ledger and optionally correct the differences'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rebuild current stock from the ledger for parts that differ',
+        )
+        parser.add_argument(
+            '--adopt',
+            action='store_true',
+            help='Keep current stock and record the differences in the ledger as adjustments '
+                 '(for stock loaded outside the ledger)',
+        )
+        parser.add_argument(
+            '--store',
+            type=int,
+            help='Only check the parts of this store id',
+        )
+        parser.add_argument(
+            '--show',
+            type=int,
+            default=20,
+            help='Differences listed in the report (default: 20)',
+        )
+    
+    def handle(self, *args, **options):
+        if options['fix'] and options['adopt']:
+            raise CommandError('Use either --fix or --adopt, not both')
+        
+        parts = Parts.objects.all()
+        if options['store'] is not None:
+            if not Store.objects.filter(pk=options['store']).exists():
+                raise CommandError(f"Store {options['store']} does not exist")
+            parts = parts.filter(store_id=options['store'])
+        
+        # Report the differences found in one pass over parts and their ledger sums
+        start_time = time.monotonic()
+        discrepancies = stock_discrepancies(parts).select_related('store').order_by('store__name', 'part_number')
+        total = discrepancies.count()
+        for part in discrepancies[:max(options['show'], 0)]:
+            self.stdout.write(
+                f"  {part.store.name} / {part.part_number}: stock {part.current_stock}, ledger {part.ledger_balance}"
+            )
+        if total > options['show']:
+            self.stdout.write(f"  ... and {total - options['show']} more")
+        self.stdout.write(f"{total} parts differ from the ledger ({time.monotonic() - start_time:.2f}s).")
+        
+        if not total or not (options['fix'] or options['adopt']):
+            return
+        
+        start_time = time.monotonic()
+        corrected = rebuild_stock_balances(parts, adopt=options['adopt'])
+        action = 'Recorded ledger adjustments for' if options['adopt'] else 'Rebuilt stock from the ledger for'
+        self.stdout.write(self.style.SUCCESS(f'{action} {corrected} parts in {time.monotonic() - start_time:.2f}s.'))
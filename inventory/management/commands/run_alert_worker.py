@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from inventory.utils import run_alert_engine
+from utils.workers import run_worker_loop
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Run the background inventory alert worker, generating alerts on a fixed interval'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'INVENTORY_ALERT_INTERVAL', 300),
+            help='Seconds between alert generation runs (default: INVENTORY_ALERT_INTERVAL setting)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run a single alert generation cycle and exit (for cron/systemd timers)',
+        )
+        
+    def handle(self, *args, **options):
+        interval = max(options['interval'], 1)
+        run_once = options['once']
+        
+        self.stdout.write(f'Alert worker started (interval: {interval}s)')
+        
+        def step():
+            alerts_created = run_alert_engine(interval_seconds=interval)
+            self.stdout.write(f'Created {alerts_created} new alerts.')
+            logger.info('Alert worker run created %s alerts', alerts_created)
+        
+        run_worker_loop(self, 'Alert worker', step, interval, run_once)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-16 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_purchase_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertEngineStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_run_started', models.DateTimeField(blank=True, null=True)),
+                ('last_run_finished', models.DateTimeField(blank=True, null=True)),
+                ('next_run', models.DateTimeField(blank=True, null=True)),
+                ('interval_seconds', models.PositiveIntegerField(default=300)),
+                ('alerts_created', models.PositiveIntegerField(default=0, help_text='New alerts created by the last run')),
+                ('duration_seconds', models.FloatField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Alert engine status',
+                'verbose_name_plural': 'Alert engine status',
+            },
+        ),
+    ]
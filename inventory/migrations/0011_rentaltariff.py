@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-16 22:59
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_alertenginestatus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentalTariff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('A', 'Category A - Sym Orbit 125cc'), ('B', 'Category B - Jet 14 200cc'), ('C', 'Category C - Citycom 300cc'), ('D', 'Category D - Vespa 150/300cc')], max_length=1)),
+                ('min_days', models.PositiveIntegerField(default=1, help_text='Shortest rental (in days) this rate applies to')),
+                ('max_days', models.PositiveIntegerField(blank=True, help_text='Longest rental this rate applies to (blank for no limit)', null=True)),
+                ('daily_rate', models.DecimalField(decimal_places=2, max_digits=8, validators=[django.core.validators.MinValueValidator(0)])),
+                ('effective_from', models.DateField(help_text='First rental start date this rate applies to')),
+                ('effective_to', models.DateField(blank=True, help_text='Last rental start date this rate applies to (blank for no end)', null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('store', models.ForeignKey(blank=True, help_text='Store this rate overrides the default for (blank for all stores)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rental_tariffs', to='inventory.store')),
+            ],
+            options={
+                'ordering': ['category', 'store', 'min_days', '-effective_from'],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+import datetime
+from decimal import Decimal
+from django.db import migrations
+
+# Rates previously hard-coded in Scooter.get_rate_for_days:
+# category -> (1 day, 2-10 days, 11-29 days, 30+ days)
+DEFAULT_RATES = {
+    'A': (400, 300, 225, 120),
+    'B': (450, 350, 255, 150),
+    'C': (550, 500, 350, 250),
+    'D': (850, 600, 400, 250),
+}
+
+TIERS = ((1, 1), (2, 10), (11, 29), (30, None))
+
+
+def seed_tariffs(apps, schema_editor):
+    RentalTariff = apps.get_model('inventory', 'RentalTariff')
+    RentalTariff.objects.bulk_create([
+        RentalTariff(
+            category=category,
+            min_days=min_days,
+            max_days=max_days,
+            daily_rate=Decimal(rate),
+            effective_from=datetime.date(2000, 1, 1),
+        )
+        for category, rates in DEFAULT_RATES.items()
+        for (min_days, max_days), rate in zip(TIERS, rates)
+    ])
+
+
+def remove_tariffs(apps, schema_editor):
+    apps.get_model('inventory', 'RentalTariff').objects.filter(store__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_rentaltariff'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_tariffs, remove_tariffs),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-16 23:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_seed_rental_tariffs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryalert',
+            index=models.Index(fields=['part', 'alert_type', 'status'], name='alert_part_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryalert',
+            index=models.Index(fields=['scooter', 'alert_type', 'status'], name='alert_scooter_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryalert',
+            index=models.Index(condition=models.Q(('status__in', ['new', 'acknowledged'])), fields=['alert_type', 'title'], name='alert_open_type_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parts',
+            index=models.Index(fields=['store', 'current_stock'], name='parts_store_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parts',
+            index=models.Index(condition=models.Q(('current_stock__lte', models.F('reorder_level'))), fields=['store'], name='parts_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scooter',
+            index=models.Index(fields=['store', 'status'], name='scooter_store_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransfer',
+            index=models.Index(fields=['status', 'transfer_date'], name='transfer_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+from utils.trigram import trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_hot_path_indexes'),
+    ]
+
+    operations = [
+        # Part number/name and VIN/licence number search (PostgreSQL only, see utils.trigram)
+        trigram_indexes('inventory', [
+            ('parts', 'part_number', 'parts_part_number_trgm_idx'),
+            ('parts', 'name', 'parts_name_trgm_idx'),
+            ('scooter', 'vin', 'scooter_vin_trgm_idx'),
+            ('scooter', 'license_number', 'scooter_license_trgm_idx'),
+        ]),
+    ]
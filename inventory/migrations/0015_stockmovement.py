@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-16 23:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    """Start the ledger with each part's current stock as its opening balance"""
+    Parts = apps.get_model('inventory', 'Parts')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    batch = []
+    for part_id, current_stock in Parts.objects.exclude(current_stock=0).values_list('pk', 'current_stock').iterator():
+        batch.append(StockMovement(part_id=part_id, quantity=current_stock, balance_after=current_stock, reason='opening'))
+        if len(batch) >= 1000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('inventory', '0014_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, help_text='Positive for stock in, negative for stock out', max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, help_text="Part's stock level after this movement", max_digits=12)),
+                ('reason', models.CharField(choices=[('opening', 'Opening Balance'), ('adjustment', 'Stock Count Adjustment'), ('purchase', 'Purchase'), ('purchase_correction', 'Purchase Correction'), ('transfer_out', 'Transfer Out'), ('transfer_in', 'Transfer In'), ('job_card', 'Used on Job Card'), ('job_card_return', 'Returned from Job Card')], max_length=30)),
+                ('reference', models.CharField(blank=True, help_text='Job card, transfer or invoice number', max_length=100)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='inventory.parts')),
+            ],
+            options={
+                'ordering': ['-date_created', '-id'],
+                'indexes': [models.Index(fields=['part', 'date_created'], name='stockmovement_part_date_idx'), models.Index(fields=['reference'], name='stockmovement_reference_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-16 23:54
+
+from django.db import migrations, models
+
+STATUS_FIELDS = ['last_run_started', 'last_run_finished', 'next_run', 'interval_seconds', 'duration_seconds', 'last_error']
+
+
+def copy_alert_engine_status(apps, schema_editor):
+    AlertEngineStatus = apps.get_model('inventory', 'AlertEngineStatus')
+    WorkerStatus = apps.get_model('inventory', 'WorkerStatus')
+    for status in AlertEngineStatus.objects.all()[:1]:
+        WorkerStatus.objects.create(
+            worker='alert_engine',
+            counts={'alerts_created': status.alerts_created},
+            **{field: getattr(status, field) for field in STATUS_FIELDS}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_stockmovement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker', models.CharField(choices=[('alert_engine', 'Alert engine'), ('overdue_sweep', 'Overdue rental sweep')], max_length=30, unique=True)),
+                ('last_run_started', models.DateTimeField(blank=True, null=True)),
+                ('last_run_finished', models.DateTimeField(blank=True, null=True)),
+                ('next_run', models.DateTimeField(blank=True, null=True)),
+                ('interval_seconds', models.PositiveIntegerField(default=300)),
+                ('counts', models.JSONField(blank=True, default=dict, help_text="What the last run did, e.g. {'alerts_created': 3}")),
+                ('duration_seconds', models.FloatField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Worker status',
+                'verbose_name_plural': 'Worker status',
+            },
+        ),
+        migrations.RunPython(copy_alert_engine_status, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='AlertEngineStatus',
+        ),
+    ]
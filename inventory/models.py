@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import F, Q
 from django.core.validators import MinValueValidator
+from .querysets import StoreScopedManager
 
 class Store(models.Model):
     """Model representing a physical store location that holds inventory"""
@@ -73,50 +75,25 @@ class Scooter(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
     
+    # Store scoping (see inventory.querysets)
+    objects = StoreScopedManager('store')
+    
     def __str__(self):
         return f"{self.year} {self.make} {self.model} ({self.vin}) - {self.get_category_display()}"
         
-    def get_rate_for_days(self, days):
+    def get_rate_for_days(self, days, on_date=None):
         """
         Calculate the appropriate daily rate based on the scooter category and rental duration
+        Rates come from the RentalTariff table (see inventory.pricing)
         """
-        if self.category == 'A':
-            if days == 1:
-                return 400
-            elif 2 <= days <= 10:
-                return 300
-            elif 11 <= days <= 29:
-                return 225
-            else:  # 30+ days
-                return 120
-        elif self.category == 'B':
-            if days == 1:
-                return 450
-            elif 2 <= days <= 10:
-                return 350
-            elif 11 <= days <= 29:
-                return 255
-            else:  # 30+ days
-                return 150
-        elif self.category == 'C':
-            if days == 1:
-                return 550
-            elif 2 <= days <= 10:
-                return 500
-            elif 11 <= days <= 29:
-                return 350
-            else:  # 30+ days
-                return 250
-        elif self.category == 'D':
-            if days == 1:
-                return 850
-            elif 2 <= days <= 10:
-                return 600
-            elif 11 <= days <= 29:
-                return 400
-            else:  # 30+ days
-                return 250
-        return self.daily_rate  # Default fallback
+        from .pricing import get_daily_rate
+        return get_daily_rate(self, days, on_date)
+    
+    class Meta:
+        indexes = [
+            # Fleet counts and availability per store
+            models.Index(fields=['store', 'status'], name='scooter_store_status_idx'),
+        ]
 
 class Parts(models.Model):
     """Model representing parts inventory"""
@@ -132,6 +109,9 @@ class Parts(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
     
+    # Store scoping (see inventory.querysets)
+    objects = StoreScopedManager('store')
+    
     def __str__(self):
         return f"{self.part_number} - {self.name}"
     
@@ -140,6 +120,52 @@ class Parts(models.Model):
         verbose_name_plural = "Parts"
         # Make part number unique only within a store
         unique_together = ['part_number', 'store']
+        indexes = [
+            # Parts list and stock reports per store
+            models.Index(fields=['store', 'current_stock'], name='parts_store_stock_idx'),
+            # Low stock checks only look at parts at or below their reorder level
+            models.Index(fields=['store'], condition=Q(current_stock__lte=F('reorder_level')), name='parts_low_stock_idx'),
+        ]
+
+class StockMovement(models.Model):
+    """
+    One change to a part's stock level, written by inventory.stock.apply_movements
+    
+    The ledger is append-only: corrections are new movements. A part's
+    movements sum to its current_stock (see the reconcile_stock command).
+    """
+    REASON_CHOICES = (
+        ('opening', 'Opening Balance'),
+        ('adjustment', 'Stock Count Adjustment'),
+        ('purchase', 'Purchase'),
+        ('purchase_correction', 'Purchase Correction'),
+        ('transfer_out', 'Transfer Out'),
+        ('transfer_in', 'Transfer In'),
+        ('job_card', 'Used on Job Card'),
+        ('job_card_return', 'Returned from Job Card'),
+    )
+    
+    part = models.ForeignKey(Parts, on_delete=models.CASCADE, related_name='stock_movements')
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, help_text="Positive for stock in, negative for stock out")
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2, help_text="Part's stock level after this movement")
+    reason = models.CharField(max_length=30, choices=REASON_CHOICES)
+    reference = models.CharField(max_length=100, blank=True, help_text="Job card, transfer or invoice number")
+    created_by = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    
+    # Store scoping (see inventory.querysets)
+    objects = StoreScopedManager('part__store')
+    
+    def __str__(self):
+        return f"{self.part_id}: {self.quantity:+} ({self.get_reason_display()})"
+    
+    class Meta:
+        ordering = ['-date_created', '-id']
+        indexes = [
+            # A part's history, newest first, and per-part sums for reconciliation
+            models.Index(fields=['part', 'date_created'], name='stockmovement_part_date_idx'),
+            models.Index(fields=['reference'], name='stockmovement_reference_idx'),
+        ]
 
 class StockTransfer(models.Model):
     """Model representing transfers of parts between stores"""
@@ -162,8 +188,17 @@ class StockTransfer(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
     
+    # Visible to both stores involved in the transfer
+    objects = StoreScopedManager('source_store', 'destination_store')
+    
     def __str__(self):
         return f"Transfer #{self.transfer_number} - {self.part.name} ({self.quantity})"
+    
+    class Meta:
+        indexes = [
+            # Pending/in transit transfers by date
+            models.Index(fields=['status', 'transfer_date'], name='transfer_status_date_idx'),
+        ]
 
 class Purchase(models.Model):
     """Model representing purchases from suppliers (invoices)"""
@@ -187,6 +222,9 @@ class Purchase(models.Model):
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
     
+    # A purchase belongs to its default store and to every store its items are for
+    objects = StoreScopedManager('store', 'items__store')
+    
     def __str__(self):
         return f"Invoice #{self.invoice_number} - {self.supplier.name}"
     
@@ -286,8 +324,78 @@ class InventoryAlert(models.Model):
     date_acknowledged = models.DateTimeField(null=True, blank=True)
     date_resolved = models.DateTimeField(null=True, blank=True)
     
+    # Store scoping (see inventory.querysets)
+    objects = StoreScopedManager('store')
+    
     def __str__(self):
         return f"{self.get_alert_type_display()}: {self.title}"
     
     class Meta:
         ordering = ['-severity', '-date_created']
+        indexes = [
+            # Duplicate checks for part and scooter alerts
+            models.Index(fields=['part', 'alert_type', 'status'], name='alert_part_type_status_idx'),
+            models.Index(fields=['scooter', 'alert_type', 'status'], name='alert_scooter_type_status_idx'),
+            # Open alerts only (overdue rental alerts are matched by title)
+            models.Index(fields=['alert_type', 'title'], condition=Q(status__in=['new', 'acknowledged']),
+                         name='alert_open_type_title_idx'),
+        ]
+
+
+class WorkerStatus(models.Model):
+    """A background worker's last and next run, one row per worker (see utils.workers)"""
+    WORKER_CHOICES = (
+        ('alert_engine', 'Alert engine'),
+        ('overdue_sweep', 'Overdue rental sweep'),
+    )
+    
+    worker = models.CharField(max_length=30, choices=WORKER_CHOICES, unique=True)
+    last_run_started = models.DateTimeField(null=True, blank=True)
+    last_run_finished = models.DateTimeField(null=True, blank=True)
+    next_run = models.DateTimeField(null=True, blank=True)
+    interval_seconds = models.PositiveIntegerField(default=300)
+    counts = models.JSONField(default=dict, blank=True, help_text="What the last run did, e.g. {'alerts_created': 3}")
+    duration_seconds = models.FloatField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"{self.get_worker_display()} (last run: {self.last_run_finished or 'never'})"
+    
+    @classmethod
+    def current(cls, worker):
+        """Return a worker's status row without creating it, or None if it has never run"""
+        return cls.objects.filter(worker=worker).first()
+    
+    @property
+    def is_stale(self):
+        """True when the worker has missed its next scheduled run by more than one interval"""
+        from django.utils import timezone
+        if not self.next_run:
+            return True
+        return timezone.now() > self.next_run + timezone.timedelta(seconds=self.interval_seconds)
+    
+    class Meta:
+        verbose_name = "Worker status"
+        verbose_name_plural = "Worker status"
+
+
+class RentalTariff(models.Model):
+    """Daily rental rate for a scooter category and rental length, optionally for one store"""
+    category = models.CharField(max_length=1, choices=Scooter.CATEGORY_CHOICES)
+    min_days = models.PositiveIntegerField(default=1, help_text="Shortest rental (in days) this rate applies to")
+    max_days = models.PositiveIntegerField(null=True, blank=True, help_text="Longest rental this rate applies to (blank for no limit)")
+    daily_rate = models.DecimalField(max_digits=8, decimal_places=2, validators=[MinValueValidator(0)])
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, null=True, blank=True, related_name='rental_tariffs',
+                              help_text="Store this rate overrides the default for (blank for all stores)")
+    effective_from = models.DateField(help_text="First rental start date this rate applies to")
+    effective_to = models.DateField(null=True, blank=True, help_text="Last rental start date this rate applies to (blank for no end)")
+    is_active = models.BooleanField(default=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        days = f"{self.min_days}-{self.max_days}" if self.max_days else f"{self.min_days}+"
+        return f"Category {self.category}, {days} days: R{self.daily_rate}/day ({self.store or 'all stores'})"
+    
+    class Meta:
+        ordering = ['category', 'store', 'min_days', '-effective_from']
@@ -0,0 +1,205 @@
+"""
+Rental pricing engine
+
+Daily rates come from the RentalTariff table (scooter category x rental
+length tier, with optional per-store overrides and effective dates). The
+active tariffs are loaded once per process into a TariffTable and reused
+until a tariff is saved or deleted, which bumps a version key in the Django
+cache so every process reloads on its next quote.
+
+quote_rentals() prices many rentals in one pass for reports and what-if
+analyses; pass it a TariffTable built from unsaved RentalTariff objects to
+try out new rates.
+"""
+import uuid
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime
+from django.core.cache import cache
+from django.utils import timezone
+from .models import RentalTariff
+
+TARIFF_VERSION_KEY = 'pricing:tariffs:version'
+
+# Process-local (version, TariffTable) loaded by get_tariff_table()
+_loaded = (None, None)
+
+
+def _local_date(on_date=None):
+    """The date of on_date (a date or datetime) in the current time zone, today if None"""
+    if on_date is None:
+        return timezone.localdate()
+    if isinstance(on_date, datetime):
+        return timezone.localdate(on_date) if timezone.is_aware(on_date) else on_date.date()
+    return on_date
+
+
+def rental_days(start, end):
+    """Number of days charged for a rental from start to end (part days round up)"""
+    duration = end - start
+    days = duration.days
+    if duration.seconds > 0:
+        days += 1  # Round up to next day
+    return days
+
+
+class TariffTable:
+    """
+    Lookup structure for tariffs
+    
+    Tariffs are grouped by (store_id, category) and, within that, by effective
+    period, newest first; each period keeps its tiers sorted by min_days so a
+    lookup is a bisect rather than a scan.
+    """
+    
+    def __init__(self, tariffs):
+        periods = defaultdict(lambda: defaultdict(list))
+        for tariff in tariffs:
+            period = (tariff.effective_from, tariff.effective_to)
+            periods[(tariff.store_id, tariff.category)][period].append(
+                (tariff.min_days, tariff.max_days, tariff.daily_rate)
+            )
+        
+        self._periods = {}
+        for key, key_periods in periods.items():
+            self._periods[key] = [
+                (effective_from, effective_to,
+                 [tier[0] for tier in tiers], [tier[1] for tier in tiers], [tier[2] for tier in tiers])
+                for (effective_from, effective_to), tiers in sorted(
+                    ((period, sorted(tiers, key=lambda tier: tier[0])) for period, tiers in key_periods.items()),
+                    key=lambda item: item[0][0],
+                    reverse=True
+                )
+            ]
+    
+    def _lookup(self, key, days, on_date):
+        for effective_from, effective_to, min_days, max_days, rates in self._periods.get(key, ()):
+            if effective_from > on_date or (effective_to and effective_to < on_date):
+                continue
+            
+            index = bisect_right(min_days, days) - 1
+            if index >= 0 and (max_days[index] is None or days <= max_days[index]):
+                return rates[index]
+        return None
+    
+    def daily_rate(self, category, days, store_id=None, on_date=None):
+        """
+        Daily rate for a rental, preferring the store's own tariffs
+        
+        Args:
+            category: Scooter category (A-D)
+            days: Rental length in days
+            store_id: Store the scooter belongs to (optional)
+            on_date: Rental start date (default: today)
+        
+        Returns:
+            Decimal rate, or None if no tariff covers the rental
+        """
+        on_date = _local_date(on_date)
+        days = max(days, 1)
+        
+        rate = None
+        if store_id is not None:
+            rate = self._lookup((store_id, category), days, on_date)
+        if rate is None:
+            rate = self._lookup((None, category), days, on_date)
+        return rate
+    
+    def tiers(self, category, store_id=None, on_date=None):
+        """
+        Rate tiers in effect for a category, for showing a price list
+        
+        Returns:
+            List of (min_days, max_days, daily_rate) tuples sorted by min_days;
+            the store's own tariffs when it has any in effect, else the defaults
+        """
+        on_date = _local_date(on_date)
+        
+        for key in ([(store_id, category)] if store_id is not None else []) + [(None, category)]:
+            for effective_from, effective_to, min_days, max_days, rates in self._periods.get(key, ()):
+                if effective_from <= on_date and (effective_to is None or effective_to >= on_date):
+                    return list(zip(min_days, max_days, rates))
+        return []
+
+
+def _tariff_version():
+    """Current tariff version, creating one if the cache has none"""
+    version = cache.get(TARIFF_VERSION_KEY)
+    if version is None:
+        cache.add(TARIFF_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(TARIFF_VERSION_KEY)
+    return version
+
+
+def invalidate_tariffs():
+    """Make every process reload its tariff table on the next quote"""
+    global _loaded
+    _loaded = (None, None)
+    cache.set(TARIFF_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def get_tariff_table():
+    """The active tariffs as a TariffTable, loaded once per tariff version"""
+    global _loaded
+    version = _tariff_version()
+    loaded_version, table = _loaded
+    if table is None or loaded_version != version:
+        table = TariffTable(RentalTariff.objects.filter(is_active=True))
+        _loaded = (version, table)
+    return table
+
+
+def get_daily_rate(scooter, days, on_date=None):
+    """
+    Daily rate for renting a scooter for a number of days
+    
+    Falls back to the scooter's own daily_rate when no tariff covers it
+    """
+    rate = get_tariff_table().daily_rate(scooter.category, days, scooter.store_id, on_date)
+    return rate if rate is not None else scooter.daily_rate
+
+
+def quote_rentals(quotes, table=None):
+    """
+    Price many rentals at once
+    
+    Args:
+        quotes: Iterable of (category, store_id, days, start_date) tuples
+        table: TariffTable to price with (default: the active tariffs)
+    
+    Returns:
+        List of (daily_rate, total) tuples in the same order; both are None
+        when no tariff covers a rental
+    """
+    table = table or get_tariff_table()
+    
+    # Rentals sharing a category, store, length and start day get the same rate
+    rates = {}
+    results = []
+    for category, store_id, days, start_date in quotes:
+        start_date = _local_date(start_date)
+        key = (category, store_id, days, start_date)
+        if key not in rates:
+            rates[key] = table.daily_rate(category, days, store_id, start_date)
+        rate = rates[key]
+        results.append((rate, rate * max(days, 1) if rate is not None else None))
+    return results
+
+
+def quote_rental_queryset(rentals, table=None):
+    """
+    Price daily rentals from a Rental queryset without loading model instances,
+    using the actual end date when set and the expected end date otherwise
+    
+    Returns:
+        List of (rental_id, daily_rate, total) tuples
+    """
+    rows = list(rentals.values_list(
+        'id', 'scooter__category', 'scooter__store_id', 'start_date', 'expected_end_date', 'end_date'
+    ))
+    quotes = quote_rentals(
+        ((category, store_id, rental_days(start, end or expected_end), start)
+         for _, category, store_id, start, expected_end, end in rows),
+        table=table
+    )
+    return [(row[0], rate, total) for row, (rate, total) in zip(rows, quotes)]
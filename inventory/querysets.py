@@ -0,0 +1,116 @@
+"""
+Store-scoped querysets
+
+Models that belong to a store declare how to reach it once, on their
+manager:
+
+    objects = StoreScopedManager('store')
+    objects = StoreScopedManager('source_store', 'destination_store')
+    objects = StoreScopedManager('scooter__store')
+
+Each path is a lookup ending in a foreign key to Store; a row is in scope if
+any of its paths leads to the store. The manager binds the paths to the
+model class when the model is created, so related managers built from it
+scope the same way, and the system checks verify every path: a misspelled
+or missing relation fails at startup instead of silently returning every
+store's rows.
+"""
+from django.core import checks
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Q
+
+
+class StoreScopedQuerySet(models.QuerySet):
+    """QuerySet that can be limited to one store or to a user's store scope"""
+    
+    def _spans_many(self):
+        """True if a store path crosses a reverse/many relation (so a join could repeat rows)"""
+        # Worked out on first use, once related models are loaded, and kept on the model
+        model = self.model
+        if '_store_paths_span_many' not in model.__dict__:
+            model._store_paths_span_many = any(_path_spans_many(model, path) for path in model._store_paths)
+        return model._store_paths_span_many
+    
+    def for_store(self, store):
+        """
+        Rows belonging to a store
+        
+        Args:
+            store: Store instance or id; None returns the queryset unchanged (all stores)
+        """
+        if store is None:
+            return self
+        
+        # One Q for all paths, OR-ed together
+        condition = Q(*((path, store) for path in self.model._store_paths), _connector=Q.OR)
+        
+        # Filter through a subquery so a store reached via several related rows does not repeat the row
+        if self._spans_many():
+            return self.filter(pk__in=self.model._base_manager.filter(condition).values('pk'))
+        return self.filter(condition)
+    
+    def for_user(self, user):
+        """Rows in the user's store scope (all rows for admins and users without an assigned store)"""
+        from users.scope import get_store_scope
+        return self.for_store(get_store_scope(user).store)
+
+
+class StoreScopedManager(models.Manager.from_queryset(StoreScopedQuerySet)):
+    """Manager declaring a model's store paths (see module docstring)"""
+    
+    def __init__(self, *store_paths):
+        super().__init__()
+        self.store_paths = store_paths
+    
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        cls._store_paths = self.store_paths
+    
+    def check(self, **kwargs):
+        errors = super().check(**kwargs)
+        if not self.store_paths:
+            errors.append(checks.Error(
+                f'{self.model.__name__}.{self.name} declares no store paths.',
+                obj=self.model,
+                id='inventory.E001',
+            ))
+        for path in self.store_paths:
+            error = _path_error(self.model, path)
+            if error:
+                errors.append(checks.Error(
+                    f"{self.model.__name__} store path '{path}' {error}.",
+                    obj=self.model,
+                    id='inventory.E002',
+                ))
+        return errors
+
+
+def _walk_path(model, path):
+    """The fields along a lookup path, starting from model"""
+    fields = []
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        fields.append(field)
+        model = field.related_model
+        if model is None:
+            break
+    return fields
+
+
+def _path_error(model, path):
+    """Why a store path is invalid, or None"""
+    from inventory.models import Store
+    try:
+        fields = _walk_path(model, path)
+    except FieldDoesNotExist:
+        return 'does not resolve to a field'
+    
+    last = fields[-1]
+    if not last.is_relation or last.related_model is not Store:
+        return 'does not end in a relation to Store'
+    return None
+
+
+def _path_spans_many(model, path):
+    return any(field.one_to_many or field.many_to_many for field in _walk_path(model, path))
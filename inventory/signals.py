@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import RentalTariff, Scooter, Parts
+from .pricing import invalidate_tariffs
+from .listing import invalidate_list_counts
+
+
+@receiver(post_save, sender=RentalTariff, dispatch_uid='rental_tariff_save')
+@receiver(post_delete, sender=RentalTariff, dispatch_uid='rental_tariff_delete')
+def invalidate_tariffs_on_write(sender, **kwargs):
+    """Reload the tariff table in every process after a tariff changes"""
+    invalidate_tariffs()
+
+
+@receiver(post_save, sender=Scooter, dispatch_uid='list_counts_scooter_save')
+@receiver(post_delete, sender=Scooter, dispatch_uid='list_counts_scooter_delete')
+@receiver(post_save, sender=Parts, dispatch_uid='list_counts_parts_save')
+@receiver(post_delete, sender=Parts, dispatch_uid='list_counts_parts_delete')
+def invalidate_list_counts_on_write(sender, **kwargs):
+    """Recount the scooter and parts lists after a scooter or part changes"""
+    invalidate_list_counts()
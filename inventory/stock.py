@@ -0,0 +1,227 @@
+"""
+Stock ledger: every change to a part's stock goes through apply_movements()
+
+Each change is recorded as a StockMovement row and applied to
+Parts.current_stock in the same transaction. The affected parts are locked
+with SELECT ... FOR UPDATE in id order (so two requests moving overlapping
+parts queue up instead of deadlocking), checked, and updated with one
+UPDATE ... SET current_stock = current_stock + delta statement. Stock can
+therefore not be oversold by concurrent job cards or transfers, and the
+ledger always sums to current_stock; the reconcile_stock command checks
+that and rebuilds balances from the ledger.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .listing import invalidate_list_counts
+from .models import Parts, StockMovement
+
+# Parts corrected per transaction by rebuild_stock_balances
+RECONCILE_BATCH_SIZE = 1000
+
+
+class InsufficientStock(Exception):
+    """A movement would take parts below zero stock; nothing was applied"""
+    
+    def __init__(self, parts):
+        self.parts = parts
+        super().__init__(f"Insufficient stock for {', '.join(part.name for part in parts)}")
+
+
+def _part_id(part):
+    return part.pk if isinstance(part, Parts) else int(part)
+
+
+def apply_movements(movements, reason, reference='', user=None, clamp=False):
+    """
+    Apply stock changes to parts and record them in the ledger, atomically
+    
+    Args:
+        movements: (part or part id, quantity) pairs, or (part, quantity,
+            reference) triples for movements with their own reference; positive
+            quantities add stock, negative ones remove it. Movements for the
+            same part and reference are combined into one ledger row.
+        reason: One of StockMovement.REASON_CHOICES
+        reference: Job card, transfer or invoice number the movements belong to
+        user: User making the change
+        clamp: Reduce removals that exceed the stock on hand to the stock on
+            hand instead of raising InsufficientStock
+    
+    Returns:
+        List of the StockMovement rows created (movements that net to zero are skipped)
+    
+    Raises:
+        InsufficientStock: A part would go below zero (and clamp is off)
+        Parts.DoesNotExist: A part does not exist
+    """
+    instances = defaultdict(list)
+    entries = defaultdict(Decimal)
+    for part, quantity, *movement_reference in movements:
+        part_id = _part_id(part)
+        entries[part_id, movement_reference[0] if movement_reference else reference] += Decimal(quantity)
+        if isinstance(part, Parts):
+            instances[part_id].append(part)
+    
+    deltas = defaultdict(Decimal)
+    for (part_id, _), quantity in entries.items():
+        deltas[part_id] += quantity
+    
+    if not any(entries.values()):
+        return []
+    
+    with transaction.atomic():
+        # Lock the parts in id order so concurrent movements cannot deadlock
+        balances = dict(
+            Parts.objects.select_for_update().filter(pk__in=deltas).order_by('pk').values_list('pk', 'current_stock')
+        )
+        if len(balances) != len(deltas):
+            raise Parts.DoesNotExist(f"Parts not found: {sorted(set(deltas) - set(balances))}")
+        
+        short = [part_id for part_id, delta in deltas.items() if balances[part_id] + delta < 0]
+        if short and not clamp:
+            raise InsufficientStock(list(Parts.objects.filter(pk__in=short).order_by('part_number')))
+        
+        # Ledger rows in part order, each with the part's running balance
+        rows = []
+        running = dict(balances)
+        for (part_id, movement_reference), quantity in sorted(entries.items(), key=lambda entry: entry[0][0]):
+            if clamp:
+                quantity = max(quantity, -running[part_id])
+            if not quantity:
+                continue
+            running[part_id] += quantity
+            rows.append(StockMovement(
+                part_id=part_id,
+                quantity=quantity,
+                balance_after=running[part_id],
+                reason=reason,
+                reference=movement_reference,
+                created_by=user,
+            ))
+        
+        deltas = {part_id: running[part_id] - balance for part_id, balance in balances.items() if running[part_id] != balance}
+        if deltas:
+            # One UPDATE for every part, relative to the locked balance
+            Parts.objects.filter(pk__in=deltas).update(
+                current_stock=F('current_stock') + Case(
+                    *(When(pk=part_id, then=Value(delta)) for part_id, delta in deltas.items()),
+                    output_field=DecimalField(max_digits=10, decimal_places=2),
+                ),
+                date_updated=timezone.now(),
+            )
+            
+            # update() sends no post_save, so the list counts are refreshed here
+            transaction.on_commit(invalidate_list_counts)
+        
+        created = StockMovement.objects.bulk_create(rows)
+    
+    # Keep the caller's Parts objects in step with the database
+    for part_id, balance in running.items():
+        for part in instances[part_id]:
+            part.current_stock = balance
+    
+    return created
+
+
+def set_stock_levels(levels, reason='adjustment', reference='', user=None):
+    """
+    Set parts to counted stock levels, recording the differences as movements
+    
+    Args:
+        levels: (part or part id, new stock level) pairs
+        reason: One of StockMovement.REASON_CHOICES
+        reference: Reference stored on the movements
+        user: User making the change
+    
+    Returns:
+        List of the StockMovement rows created
+    """
+    levels = [(part, Decimal(level)) for part, level in levels]
+    
+    with transaction.atomic():
+        # Lock first so the differences are taken from the balances being replaced
+        current = dict(
+            Parts.objects.select_for_update().filter(pk__in=[_part_id(part) for part, _ in levels])
+            .order_by('pk').values_list('pk', 'current_stock')
+        )
+        return apply_movements(
+            ((part, level - current[_part_id(part)]) for part, level in levels),
+            reason, reference, user,
+        )
+
+
+def create_part(part, reference='', user=None):
+    """
+    Save a new part and record its stock as an opening balance
+    
+    Args:
+        part: Unsaved Parts; its current_stock is the opening balance
+        reference: Reference stored on the opening movement
+        user: User creating the part
+    
+    Returns:
+        The saved part
+    """
+    opening = part.current_stock or Decimal(0)
+    
+    with transaction.atomic():
+        part.current_stock = 0
+        part.save()
+        apply_movements([(part, opening)], 'opening', reference, user)
+    
+    return part
+
+
+def ledger_balance():
+    """Expression for a part's stock according to the ledger (the sum of its movements)"""
+    totals = StockMovement.objects.filter(part=OuterRef('pk')).order_by().values('part').annotate(
+        total=Sum('quantity')
+    ).values('total')
+    return Coalesce(Subquery(totals), Value(Decimal(0)), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def stock_discrepancies(queryset=None):
+    """Parts whose current_stock differs from their ledger balance, annotated with ledger_balance"""
+    queryset = Parts.objects.all() if queryset is None else queryset
+    return queryset.annotate(ledger_balance=ledger_balance()).exclude(current_stock=F('ledger_balance'))
+
+
+def rebuild_stock_balances(queryset=None, adopt=False, user=None):
+    """
+    Make current_stock and the ledger agree for every part where they differ
+    
+    Args:
+        queryset: Parts to check (default: all parts)
+        adopt: Keep current_stock and record each difference as an adjustment
+            movement, instead of resetting current_stock to the ledger balance
+        user: User recorded on adjustment movements
+    
+    Returns:
+        Number of parts corrected
+    """
+    part_ids = list(stock_discrepancies(queryset).values_list('pk', flat=True))
+    
+    for start in range(0, len(part_ids), RECONCILE_BATCH_SIZE):
+        batch = part_ids[start:start + RECONCILE_BATCH_SIZE]
+        with transaction.atomic():
+            # Lock first so movements applied meanwhile are part of the sums below
+            list(Parts.objects.select_for_update().filter(pk__in=batch).order_by('pk').values_list('pk', flat=True))
+            
+            if adopt:
+                StockMovement.objects.bulk_create([
+                    StockMovement(part_id=part_id, quantity=current_stock - balance, balance_after=current_stock,
+                                  reason='adjustment', reference='reconcile_stock', created_by=user)
+                    for part_id, current_stock, balance in stock_discrepancies(Parts.objects.filter(pk__in=batch))
+                    .values_list('pk', 'current_stock', 'ledger_balance')
+                ])
+            else:
+                # One UPDATE per batch, each part set to the sum of its movements
+                Parts.objects.filter(pk__in=batch).update(current_stock=ledger_balance(), date_updated=timezone.now())
+    
+    if part_ids and not adopt:
+        invalidate_list_counts()
+    
+    return len(part_ids)
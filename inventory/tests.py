@@ -0,0 +1,268 @@
+import base64
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase
+from inventory.listing import decode_cursor, encode_cursor, paginate_keyset
+from inventory.models import Parts, Scooter, StockMovement, StockTransfer, Store
+from inventory.stock import (InsufficientStock, apply_movements, create_part, rebuild_stock_balances,
+                             stock_discrepancies)
+from inventory.transfers import complete_transfers
+from utils.testing import ViewBudgetTestCase
+
+
+def create_store(name):
+    return Store.objects.create(name=name, location='1 Main Road', contact_person='Manager',
+                                phone='0215550000', email='store@example.com')
+
+
+def create_parts(store, stock_levels):
+    """Parts BRK-1, BRK-2, ... of the store, opened through the ledger at the given stock levels"""
+    return [
+        create_part(Parts(part_number=f'BRK-{n}', name=f'Brake pad {n}', store=store, current_stock=stock,
+                          unit_price=100, category='Brakes', location_in_store=f'Shelf {n}'))
+        for n, stock in enumerate(stock_levels, start=1)
+    ]
+
+
+class InventoryViewBudgetTests(ViewBudgetTestCase):
+    
+    def test_scooter_list(self):
+        # Session, user, grouped status counts, page, total count
+        self.assertViewBudget('inventory:scooter_list', queries=5, max_ms=2000)
+    
+    def test_scooter_detail(self):
+        # Session, user, scooter with its store, maintenance history
+        scooter = Scooter.objects.order_by('-pk').first()
+        self.assertViewBudget('inventory:scooter_detail', [scooter.pk], queries=4)
+    
+    def test_parts_list(self):
+        # Session, user, page, total count, store filter options
+        self.assertViewBudget('inventory:parts_list', queries=5, max_ms=2000)
+    
+    def test_store_list(self):
+        # Session, user, count, page
+        self.assertViewBudget('inventory:store_list', queries=4)
+    
+    def test_stock_transfer_list(self):
+        # Session, user, count, page with stores and parts
+        self.assertViewBudget('inventory:stock_transfer_list', queries=4)
+    
+    def test_supplier_list(self):
+        # Session, user, count, page
+        self.assertViewBudget('inventory:supplier_list', queries=4)
+    
+    def test_purchase_list(self):
+        # Session, user, count, page with suppliers and stores
+        self.assertViewBudget('inventory:purchase_list', queries=4)
+    
+    def test_store_parts_api(self):
+        # Session, user, store, its parts
+        store = Store.objects.order_by('-pk').first()
+        self.assertViewBudget('inventory:store_parts_api', [store.pk], queries=4)
+
+
+class StockLedgerTests(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = create_store('Ledger Store')
+    
+    def setUp(self):
+        self.part, self.other = create_parts(self.store, [10, 2])
+    
+    def assertStock(self, part, stock):
+        part.refresh_from_db()
+        self.assertEqual(part.current_stock, Decimal(stock))
+    
+    def test_movements_are_combined_per_part_and_reference(self):
+        created = apply_movements(
+            [(self.part, 3), (self.part.pk, 2), (self.other, -1), (self.part, -1, 'INV-2')], 'purchase', 'INV-1'
+        )
+        
+        self.assertEqual(
+            sorted((row.part_id, row.reference, row.quantity) for row in created),
+            sorted([(self.part.pk, 'INV-1', 5), (self.part.pk, 'INV-2', -1), (self.other.pk, 'INV-1', -1)]),
+        )
+        self.assertStock(self.part, 14)
+        self.assertStock(self.other, 1)
+        # The caller's objects follow the database, and the last row carries the final balance
+        self.assertEqual(self.part.current_stock, 14)
+        self.assertEqual(StockMovement.objects.filter(part=self.part).latest('pk').balance_after, 14)
+    
+    def test_movements_that_net_to_zero_are_skipped(self):
+        self.assertEqual(apply_movements([(self.part, 4), (self.part, -4)], 'adjustment'), [])
+        self.assertEqual(StockMovement.objects.filter(reason='adjustment').count(), 0)
+    
+    def test_insufficient_stock_applies_nothing(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            apply_movements([(self.part, -5), (self.other, -3)], 'job_card', 'JC000001')
+        
+        self.assertEqual(raised.exception.parts, [self.other])
+        self.assertFalse(StockMovement.objects.filter(reason='job_card').exists())
+        self.assertStock(self.part, 10)
+        self.assertStock(self.other, 2)
+    
+    def test_clamp_stops_at_zero(self):
+        created = apply_movements([(self.part, -5), (self.other, -3)], 'purchase_correction', 'INV-1', clamp=True)
+        
+        self.assertEqual(sorted(row.quantity for row in created), [-5, -2])
+        self.assertStock(self.part, 5)
+        self.assertStock(self.other, 0)
+    
+    def test_rebuild_resets_stock_to_the_ledger_balance(self):
+        apply_movements([(self.part, 6), (self.other, 3)], 'purchase', 'INV-1')
+        apply_movements([(self.part, -4)], 'job_card', 'JC000001')
+        apply_movements([(self.other, -5)], 'transfer_out', 'TR-1')
+        # A change made outside the ledger
+        Parts.objects.filter(pk=self.part.pk).update(current_stock=1)
+        
+        self.assertEqual(list(stock_discrepancies().values_list('pk', 'ledger_balance')), [(self.part.pk, 12)])
+        self.assertEqual(rebuild_stock_balances(), 1)
+        
+        self.assertStock(self.part, 12)
+        self.assertStock(self.other, 0)
+        self.assertFalse(stock_discrepancies().exists())
+    
+    def test_rebuild_adopt_records_the_difference(self):
+        Parts.objects.filter(pk=self.other.pk).update(current_stock=7)
+        
+        self.assertEqual(rebuild_stock_balances(adopt=True), 1)
+        
+        adjustment = StockMovement.objects.get(reason='adjustment')
+        self.assertEqual((adjustment.part_id, adjustment.quantity, adjustment.balance_after), (self.other.pk, 5, 7))
+        self.assertStock(self.other, 7)
+        self.assertFalse(stock_discrepancies().exists())
+
+
+class CompleteTransfersTests(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.source = create_store('Source Store')
+        cls.destination = create_store('Destination Store')
+    
+    def setUp(self):
+        self.part, = create_parts(self.source, [10])
+    
+    def create_transfer(self, number, quantity, status='pending'):
+        return StockTransfer.objects.create(transfer_number=number, source_store=self.source,
+                                            destination_store=self.destination, part=self.part, quantity=quantity,
+                                            transfer_date=date(2025, 1, 31), status=status)
+    
+    def test_missing_destination_part_is_created(self):
+        transfer = self.create_transfer('TR-1', 4)
+        
+        self.assertEqual(complete_transfers([transfer]), [transfer])
+        
+        received = Parts.objects.get(part_number='BRK-1', store=self.destination)
+        self.assertEqual(
+            (received.name, received.unit_price, received.category, received.location_in_store, received.current_stock),
+            ('Brake pad 1', 100, 'Brakes', 'Shelf 1', 4),
+        )
+        movement = StockMovement.objects.get(part=received)
+        self.assertEqual((movement.reason, movement.reference, movement.quantity), ('transfer_in', 'TR-1', 4))
+        transfer.refresh_from_db()
+        self.assertEqual(transfer.status, 'completed')
+    
+    def test_existing_destination_part_is_updated(self):
+        existing, = create_parts(self.destination, [3])
+        Parts.objects.filter(pk=self.part.pk).update(name='Brake pad (front)', unit_price=120)
+        self.create_transfer('TR-1', 4)
+        self.create_transfer('TR-2', 1)
+        
+        self.assertEqual(len(complete_transfers(StockTransfer.objects.all())), 2)
+        
+        existing.refresh_from_db()
+        self.assertEqual((existing.name, existing.unit_price, existing.current_stock), ('Brake pad (front)', 120, 8))
+        self.assertEqual(Parts.objects.filter(part_number='BRK-1').count(), 2)
+        self.assertEqual(
+            sorted(StockMovement.objects.filter(reason='transfer_in').values_list('reference', 'quantity')),
+            [('TR-1', 4), ('TR-2', 1)],
+        )
+    
+    def test_only_pending_and_in_transit_transfers_are_completed(self):
+        transfers = [self.create_transfer(f'TR-{status}', 1, status)
+                     for status in ('pending', 'in_transit', 'completed', 'cancelled')]
+        
+        completed = complete_transfers(transfers)
+        
+        self.assertEqual([transfer.transfer_number for transfer in completed], ['TR-pending', 'TR-in_transit'])
+        self.assertEqual(Parts.objects.get(part_number='BRK-1', store=self.destination).current_stock, 2)
+        self.assertEqual(StockTransfer.objects.get(transfer_number='TR-cancelled').status, 'cancelled')
+    
+    def test_transfer_is_received_once(self):
+        transfer = self.create_transfer('TR-1', 4)
+        complete_transfers([transfer])
+        
+        self.assertEqual(complete_transfers([transfer.pk]), [])
+        
+        self.assertEqual(Parts.objects.get(part_number='BRK-1', store=self.destination).current_stock, 4)
+        self.assertEqual(StockMovement.objects.filter(reason='transfer_in').count(), 1)
+    
+    def test_destination_part_created_meanwhile_is_used(self):
+        transfer = self.create_transfer('TR-1', 4)
+        bulk_create = Parts.objects.bulk_create
+        
+        def create_concurrently(parts, **kwargs):
+            # Another completion creates the same destination part after the lookup
+            create_parts(self.destination, [3])
+            return bulk_create(parts, **kwargs)
+        
+        with mock.patch.object(Parts.objects, 'bulk_create', side_effect=create_concurrently):
+            self.assertEqual(complete_transfers([transfer]), [transfer])
+        
+        received = Parts.objects.get(part_number='BRK-1', store=self.destination)
+        self.assertEqual(received.current_stock, 7)
+        self.assertFalse(stock_discrepancies().exists())
+
+
+class KeysetPaginationTests(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        store = create_store('Listing Store')
+        # Few distinct values, so most pages end in the middle of a run of ties
+        Parts.objects.bulk_create([
+            Parts(part_number=f'P-{n:02d}', name=f'Part {n}', store=store, current_stock=n % 3,
+                  unit_price=Decimal('9.50') * (n % 2 + 1), category=['Brakes', 'Engine'][n % 2])
+            for n in range(11)
+        ])
+    
+    def page_through(self, sort, page_size=3):
+        """The pks of every page in turn, following next_cursor"""
+        pks, cursor = [], None
+        for _ in range(Parts.objects.count() + 1):
+            page = paginate_keyset(Parts.objects.all(), sort, cursor, page_size)
+            self.assertLessEqual(len(page.items), page_size)
+            pks.extend(part.pk for part in page.items)
+            if not page.has_next:
+                return pks
+            cursor = page.next_cursor
+        self.fail('Paging did not end')
+    
+    def test_pages_with_ties_repeat_and_skip_nothing(self):
+        for sort in ['category', '-category', 'unit_price', '-current_stock', 'part_number']:
+            with self.subTest(sort=sort):
+                expected = list(Parts.objects.order_by(sort, '-pk' if sort.startswith('-') else 'pk')
+                                .values_list('pk', flat=True))
+                self.assertEqual(self.page_through(sort), expected)
+    
+    def test_cursor_round_trip(self):
+        part = Parts.objects.order_by('pk').first()
+        self.assertEqual(decode_cursor(encode_cursor(part, 'unit_price'), Parts, 'unit_price'), (part.unit_price, part.pk))
+    
+    def test_bad_cursor_falls_back_to_the_first_page(self):
+        def cursor(payload):
+            return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        
+        first_page = [part.pk for part in paginate_keyset(Parts.objects.all(), 'unit_price', None, 3).items]
+        bad_cursors = [
+            'not a cursor!', cursor('not json'), cursor('[null, 1]'), cursor('["9.50"]'),
+            cursor('["abc", 1]'), cursor('["9.50", "x"]'), cursor('{"a": 1}'),
+        ]
+        for bad in bad_cursors:
+            with self.subTest(cursor=bad):
+                self.assertIsNone(decode_cursor(bad, Parts, 'unit_price'))
+                page = paginate_keyset(Parts.objects.all(), 'unit_price', bad, 3)
+                self.assertEqual([part.pk for part in page.items], first_page)
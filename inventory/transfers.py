@@ -0,0 +1,104 @@
+"""
+Stock transfer completion
+
+complete_transfers() receives any number of transfers at their destination
+stores in one transaction, for single transfers edited to completed and for
+store rebalancing runs that move hundreds of parts at once. The destination
+part of every transfer (same part number, destination store) is looked up
+in one query; missing ones are created with one bulk_create that skips
+parts a concurrent completion created first, and all of them are then
+re-read and get the source part's details with one bulk_update. The
+quantities are added through the stock ledger in one apply_movements() call.
+
+Stock leaves the source store when a transfer is created (see
+stock_transfer_create), so completing a transfer only adds stock.
+"""
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from .models import Parts, StockTransfer
+from .stock import apply_movements
+
+# Details copied from the source part to the destination part on completion
+COPIED_PART_FIELDS = ['name', 'description', 'reorder_level', 'unit_price', 'category', 'location_in_store']
+
+# Rows per bulk INSERT/UPDATE
+TRANSFER_BATCH_SIZE = 500
+
+# Transfers that can still be received (completed and cancelled ones cannot)
+OPEN_TRANSFER_STATUSES = ('pending', 'in_transit')
+
+
+def complete_transfers(transfers, user=None):
+    """
+    Complete stock transfers, adding their quantities to the destination stores
+    
+    Args:
+        transfers: StockTransfer queryset, or transfer ids
+        user: User completing the transfers (recorded on the ledger rows)
+    
+    Returns:
+        List of the transfers completed; ones not pending or in transit are skipped
+    """
+    if isinstance(transfers, QuerySet):
+        transfer_ids = transfers.values('pk')
+    else:
+        transfer_ids = [getattr(transfer, 'pk', transfer) for transfer in transfers]
+    
+    with transaction.atomic():
+        # Lock the transfers so each one is only received once
+        completing = list(
+            StockTransfer.objects.select_for_update(of=('self',)).filter(pk__in=transfer_ids)
+            .filter(status__in=OPEN_TRANSFER_STATUSES).select_related('part').order_by('pk')
+        )
+        if not completing:
+            return []
+        
+        # The source part each destination part (same part number, destination store) takes its details from
+        sources = {(transfer.part.part_number, transfer.destination_store_id): transfer.part for transfer in completing}
+        destination_parts = Parts.objects.filter(
+            part_number__in={part_number for part_number, _ in sources},
+            store_id__in={store_id for _, store_id in sources},
+        )
+        
+        # Missing destination parts start at zero stock and receive the quantity through
+        # the ledger below; ones another completion creates meanwhile are skipped here
+        existing = set(destination_parts.values_list('part_number', 'store_id'))
+        Parts.objects.bulk_create(
+            [
+                Parts(part_number=part_number, store_id=store_id, current_stock=0,
+                      **{field: getattr(source, field) for field in COPIED_PART_FIELDS})
+                for (part_number, store_id), source in sources.items()
+                if (part_number, store_id) not in existing
+            ],
+            batch_size=TRANSFER_BATCH_SIZE, ignore_conflicts=True,
+        )
+        
+        # Re-read the destination parts, whoever created them, and give them the source part's current details
+        now = timezone.now()
+        destination = {}
+        for part in destination_parts:
+            source = sources.get((part.part_number, part.store_id))
+            if source is not None:
+                for field in COPIED_PART_FIELDS:
+                    setattr(part, field, getattr(source, field))
+                part.date_updated = now
+                destination[part.part_number, part.store_id] = part
+        Parts.objects.bulk_update(destination.values(), COPIED_PART_FIELDS + ['date_updated'],
+                                  batch_size=TRANSFER_BATCH_SIZE)
+        
+        apply_movements(
+            [
+                (destination[transfer.part.part_number, transfer.destination_store_id], transfer.quantity,
+                 transfer.transfer_number)
+                for transfer in completing
+            ],
+            'transfer_in', user=user,
+        )
+        
+        for transfer in completing:
+            transfer.status = 'completed'
+            transfer.date_updated = now
+        StockTransfer.objects.bulk_update(completing, ['status', 'date_updated'], batch_size=TRANSFER_BATCH_SIZE)
+    
+    return completing
@@ -27,6 +27,7 @@ urlpatterns = [
     path('stock-transfer/', views.stock_transfer_list, name='stock_transfer_list'),
     path('stock-transfer/add/', views.stock_transfer_create, name='stock_transfer_create'),
     path('stock-transfer/<int:pk>/update/', views.stock_transfer_update, name='stock_transfer_update'),
+    path('stock-transfer/complete/', views.stock_transfer_complete, name='stock_transfer_complete'),
     path('stock-transfer/<int:pk>/delete/', views.stock_transfer_delete, name='stock_transfer_delete'),
     
     # Supplier URLs
@@ -1,119 +1,303 @@
 """
 Utility functions for inventory management
 """
-from django.db.models import F
+import time
+from decimal import Decimal
+from django.db.models import F, Q, Count, Exists, OuterRef, Value
+from django.db.models.functions import Concat
 from django.utils import timezone
-from .models import Parts, Scooter, InventoryAlert
+from .models import Parts, Scooter, Store, InventoryAlert
 
 
-def check_for_low_stock_items():
+# Alerts in these statuses block a duplicate alert for the same object
+OPEN_ALERT_STATUSES = ['new', 'acknowledged']
+
+# Rows per INSERT when creating alerts with bulk_create
+ALERT_BATCH_SIZE = 500
+
+# Days without maintenance before a scooter is flagged
+MAINTENANCE_DUE_DAYS = 90
+
+
+def _open_alerts(alert_type, **filters):
+    """Open alerts of a type, used as an anti-join subquery against candidate rows"""
+    return InventoryAlert.objects.filter(
+        alert_type=alert_type,
+        status__in=OPEN_ALERT_STATUSES,
+        **filters
+    )
+
+
+def check_for_low_stock_items(created_by=None, batch_size=ALERT_BATCH_SIZE):
     """
     Check for parts that are below their reorder level and create alerts
+    Candidates and the anti-join against open alerts run as one query and
+    new alerts are inserted with bulk_create.
     Returns the number of new alerts created
     """
-    # Find parts that are below reorder level
-    low_stock_parts = Parts.objects.filter(current_stock__lte=F('reorder_level'))
-    
-    new_alerts_count = 0
+    # Low stock parts without an open low stock alert
+    low_stock_parts = Parts.objects.filter(
+        current_stock__lte=F('reorder_level')
+    ).exclude(
+        Exists(_open_alerts('low_stock', part=OuterRef('pk')))
+    ).values(
+        'id', 'name', 'part_number', 'current_stock', 'reorder_level', 'store_id', 'store__name'
+    )
     
-    for part in low_stock_parts:
-        # Check if there's already an active alert for this part
-        existing_alert = InventoryAlert.objects.filter(
-            part=part,
-            alert_type='low_stock',
-            status__in=['new', 'acknowledged']
-        ).exists()
+    alerts = []
+    for part in low_stock_parts.iterator(chunk_size=batch_size):
+        # Determine severity based on how low the stock is
+        if part['current_stock'] == 0:
+            severity = 'critical'
+        elif part['current_stock'] <= part['reorder_level'] * Decimal('0.5'):
+            severity = 'high'
+        else:
+            severity = 'medium'
         
-        if not existing_alert:
-            # Create a new alert
-            alert = InventoryAlert(
-                alert_type='low_stock',
-                title=f"Low Stock: {part.name}",
-                description=f"Inventory level for {part.name} ({part.part_number}) is below reorder level. " \
-                            f"Current stock: {part.current_stock}, Reorder level: {part.reorder_level}",
-                severity='high' if part.current_stock == 0 else 'medium',
-                part=part,
-                store=part.store,
-                threshold_value=part.reorder_level,
-                current_value=part.current_stock,
-                dashboard_notification=True
-            )
-            alert.save()
-            new_alerts_count += 1
-    
-    return new_alerts_count
-
-
-def check_for_maintenance_due():
-    """
-    Check for scooters that are due for maintenance based on mileage or time
+        alerts.append(InventoryAlert(
+            alert_type='low_stock',
+            title=f"Low Stock: {part['name']}",
+            description=f"Part #{part['part_number']} in store {part['store__name']} is low on stock. "
+                        f"Current stock: {part['current_stock']}, Reorder level: {part['reorder_level']}.",
+            severity=severity,
+            part_id=part['id'],
+            store_id=part['store_id'],
+            threshold_value=part['reorder_level'],
+            current_value=part['current_stock'],
+            created_by=created_by,
+            dashboard_notification=True
+        ))
+    
+    InventoryAlert.objects.bulk_create(alerts, batch_size=batch_size)
+    return len(alerts)
+
+
+def check_for_maintenance_due(created_by=None, batch_size=ALERT_BATCH_SIZE):
+    """
+    Check for scooters in service that are due for maintenance based on time
+    since their last maintenance (or purchase, if never maintained)
     Returns the number of new alerts created
     """
-    # Get scooters that haven't had maintenance in the last 90 days
-    ninety_days_ago = timezone.now().date() - timezone.timedelta(days=90)
+    today = timezone.now().date()
+    threshold = today - timezone.timedelta(days=MAINTENANCE_DUE_DAYS)
     
-    # Either no maintenance record or last maintenance older than 90 days
+    # Either last maintenance older than the threshold, or never maintained
+    # and purchased before it; skip scooters that already have an open alert
     maintenance_due_scooters = Scooter.objects.filter(
         status__in=['available', 'rented'],
     ).filter(
-        last_maintenance__lt=ninety_days_ago
+        Q(last_maintenance__lt=threshold) |
+        Q(last_maintenance__isnull=True, purchase_date__lt=threshold)
+    ).exclude(
+        Exists(_open_alerts('maintenance_due', scooter=OuterRef('pk')))
+    ).values(
+        'id', 'make', 'model', 'vin', 'last_maintenance', 'purchase_date', 'store_id'
     )
     
-    new_alerts_count = 0
-    
-    for scooter in maintenance_due_scooters:
-        # Check if there's already an active alert for this scooter
-        existing_alert = InventoryAlert.objects.filter(
-            scooter=scooter,
+    alerts = []
+    for scooter in maintenance_due_scooters.iterator(chunk_size=batch_size):
+        if scooter['last_maintenance']:
+            days_since_maintenance = (today - scooter['last_maintenance']).days
+            
+            # Determine severity based on how overdue the maintenance is
+            if days_since_maintenance > 180:  # 6 months
+                severity = 'critical'
+            elif days_since_maintenance > 120:  # 4 months
+                severity = 'high'
+            else:
+                severity = 'medium'
+            
+            description = f"Scooter {scooter['make']} {scooter['model']} (VIN: {scooter['vin']}) " \
+                          f"is due for maintenance. Last maintenance was " \
+                          f"{days_since_maintenance} days ago on {scooter['last_maintenance']}."
+        else:
+            days_since_purchase = (today - scooter['purchase_date']).days
+            severity = 'high'
+            description = f"Scooter {scooter['make']} {scooter['model']} (VIN: {scooter['vin']}) " \
+                          f"has never had maintenance since purchase {days_since_purchase} days ago."
+        
+        alerts.append(InventoryAlert(
             alert_type='maintenance_due',
-            status__in=['new', 'acknowledged']
-        ).exists()
+            title=f"Maintenance Due: {scooter['make']} {scooter['model']}",
+            description=description,
+            severity=severity,
+            scooter_id=scooter['id'],
+            store_id=scooter['store_id'],
+            created_by=created_by,
+            dashboard_notification=True
+        ))
+    
+    InventoryAlert.objects.bulk_create(alerts, batch_size=batch_size)
+    return len(alerts)
+
+
+def check_for_overdue_rentals(created_by=None, batch_size=ALERT_BATCH_SIZE):
+    """
+    Check for active rentals past their expected return date and create alerts
+    An open alert is matched to its rental through the alert title.
+    Returns the number of new alerts created
+    """
+    from customers.models import Rental
+    
+    now = timezone.now()
+    
+    overdue_rentals = Rental.objects.filter(
+        status__in=['active', 'overdue'],
+        expected_end_date__lt=now
+    ).exclude(
+        Exists(_open_alerts(
+            'overdue_rental',
+            title=Concat(Value('Overdue Rental: '), OuterRef('rental_number'))
+        ))
+    ).values(
+        'rental_number', 'expected_end_date', 'scooter_id', 'scooter__store_id',
+        'customer__first_name', 'customer__last_name'
+    )
+    
+    alerts = []
+    for rental in overdue_rentals.iterator(chunk_size=batch_size):
+        # Determine severity based on how overdue the rental is
+        days_overdue = (now - rental['expected_end_date']).days
+        if days_overdue > 7:
+            severity = 'critical'
+        elif days_overdue > 3:
+            severity = 'high'
+        elif days_overdue > 1:
+            severity = 'medium'
+        else:
+            severity = 'low'
         
-        if not existing_alert:
-            # Create a new alert
-            days_since_maintenance = (timezone.now().date() - scooter.last_maintenance).days if scooter.last_maintenance else 999
-            
-            alert = InventoryAlert(
-                alert_type='maintenance_due',
-                title=f"Maintenance Due: {scooter.make} {scooter.model}",
-                description=f"Scooter {scooter.make} {scooter.model} ({scooter.vin}) is due for maintenance. " \
-                            f"Last maintenance was {days_since_maintenance} days ago.",
-                severity='high' if days_since_maintenance > 120 else 'medium',
-                scooter=scooter,
-                store=scooter.store,
-                dashboard_notification=True
-            )
-            alert.save()
-            new_alerts_count += 1
+        alerts.append(InventoryAlert(
+            alert_type='overdue_rental',
+            title=f"Overdue Rental: {rental['rental_number']}",
+            description=f"Rental #{rental['rental_number']} for {rental['customer__first_name']} "
+                        f"{rental['customer__last_name']} is overdue by {days_overdue} days. "
+                        f"Expected return date was {rental['expected_end_date'].strftime('%Y-%m-%d %H:%M')}.",
+            severity=severity,
+            scooter_id=rental['scooter_id'],
+            store_id=rental['scooter__store_id'],
+            created_by=created_by,
+            dashboard_notification=True
+        ))
+    
+    InventoryAlert.objects.bulk_create(alerts, batch_size=batch_size)
+    return len(alerts)
+
+
+# Alert checks run by generate_inventory_alerts, in order
+ALERT_CHECKS = (
+    ('low_stock', check_for_low_stock_items),
+    ('maintenance_due', check_for_maintenance_due),
+    ('overdue_rental', check_for_overdue_rentals),
+)
+
+
+def run_alert_checks(created_by=None, batch_size=ALERT_BATCH_SIZE):
+    """
+    Run all inventory alert checks and report what each one did
+    Returns a dict with per-check 'created' counts and 'seconds' timings
+    plus the overall 'total' and 'seconds'
+    """
+    results = {'total': 0, 'seconds': 0.0, 'checks': {}}
+    
+    for name, check in ALERT_CHECKS:
+        start_time = time.monotonic()
+        created = check(created_by=created_by, batch_size=batch_size)
+        elapsed = time.monotonic() - start_time
+        
+        results['checks'][name] = {'created': created, 'seconds': elapsed}
+        results['total'] += created
+        results['seconds'] += elapsed
     
-    return new_alerts_count
+    return results
 
 
-def generate_inventory_alerts():
+def generate_inventory_alerts(created_by=None, batch_size=ALERT_BATCH_SIZE):
     """
     Run all inventory alert checks and return total number of new alerts
     """
-    total_alerts = 0
+    return run_alert_checks(created_by=created_by, batch_size=batch_size)['total']
+
+
+def run_alert_engine(interval_seconds=300):
+    """
+    Run one alert generation cycle and record it on the alert engine's WorkerStatus
+    row so the dashboard can show the last/next run without scanning inventory.
+    Returns the number of new alerts created
+    """
+    from utils.workers import record_worker_run
+    counts = record_worker_run(
+        'alert_engine',
+        lambda: {'alerts_created': generate_inventory_alerts()},
+        interval_seconds=interval_seconds,
+    )
+    return counts.get('alerts_created', 0)
+
+
+def get_scooter_status_counts(queryset=None):
+    """
+    Count scooters per status with one grouped query
+    Returns a dict with every status from Scooter.STATUS_CHOICES (zero if absent)
+    plus 'total' and 'unavailable' (everything that is not available)
+    """
+    if queryset is None:
+        queryset = Scooter.objects.all()
+    
+    counts = {status: 0 for status, _ in Scooter.STATUS_CHOICES}
+    for row in queryset.order_by().values('status').annotate(count=Count('id')):
+        counts[row['status']] = row['count']
     
-    # Check for low stock
-    total_alerts += check_for_low_stock_items()
+    counts['total'] = sum(counts[status] for status, _ in Scooter.STATUS_CHOICES)
+    counts['unavailable'] = counts['total'] - counts['available']
+    return counts
+
+
+def get_store_fleet_summary(store_id=None, active_only=True):
+    """
+    Per-store scooter counts using conditional aggregation (one grouped query)
+    plus fleet totals for the selected store, or all stores (one more query)
+    Returns a dict with 'stores' (list of dicts with id, name, total,
+    available, rented, maintenance, unavailable) and 'totals'
+    (see get_scooter_status_counts)
+    """
+    stores = Store.objects.all()
+    if active_only:
+        stores = stores.filter(is_active=True)
     
-    # Check for maintenance due
-    total_alerts += check_for_maintenance_due()
+    store_rows = stores.annotate(
+        total=Count('scooters'),
+        available=Count('scooters', filter=Q(scooters__status='available')),
+        rented=Count('scooters', filter=Q(scooters__status='rented')),
+        maintenance=Count('scooters', filter=Q(scooters__status='maintenance')),
+    ).values('id', 'name', 'total', 'available', 'rented', 'maintenance').order_by('name')
     
-    return total_alerts
+    store_data = []
+    for row in store_rows:
+        row['unavailable'] = row['total'] - row['available']
+        store_data.append(row)
+    
+    scooters = Scooter.objects.all()
+    if store_id:
+        scooters = scooters.filter(store_id=store_id)
+    
+    return {
+        'stores': store_data,
+        'totals': get_scooter_status_counts(scooters),
+    }
 
 
-def get_low_stock_items_for_dashboard(limit=5):
+def get_low_stock_items_for_dashboard(limit=5, low_stock_parts=None):
     """
     Get low stock items for the dashboard widget
-    Returns a list of parts with stock_percent calculated
+    Returns a list of parts with stock_percent calculated; pass low_stock_parts
+    to format parts already loaded instead of querying the `limit` lowest
     """
-    low_stock_parts = Parts.objects.filter(
-        current_stock__lte=F('reorder_level')
-    ).select_related('store').order_by(
-        'current_stock'
-    )[:limit]
+    if low_stock_parts is None:
+        low_stock_parts = Parts.objects.filter(
+            current_stock__lte=F('reorder_level')
+        ).select_related('store').order_by(
+            'current_stock'
+        )[:limit]
     
     # Prepare data for the template
     result = []
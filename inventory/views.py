@@ -5,38 +5,47 @@ from django.http import JsonResponse
 from django.db.models import Sum, F, Count
 from django.http import JsonResponse, HttpResponse
 from django.urls import reverse
+from django.template.loader import render_to_string
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from .models import Scooter, Parts, Store, StockTransfer, ScooterMaintenanceHistory, Supplier, Purchase, PurchaseItem
+from django.db import transaction
+from .models import Scooter, Parts, Store, StockTransfer, ScooterMaintenanceHistory, Supplier, Purchase
 from .forms import (ScooterForm, PartsForm, StoreForm, StockTransferForm, MaintenanceHistoryForm,
                    SupplierForm, PurchaseForm, PurchaseItemForm, PurchaseItemFormSet)
-from utils.export_utils import export_to_excel
+from utils.export_utils import export_to_excel, stream_csv, EXPORT_CHUNK_SIZE
 from datetime import datetime
-from users.utils import filter_by_user_store
+from users.scope import get_request_store_scope
+from .listing import (filter_scooters, filter_parts, get_sort, paginate_keyset, next_page_query,
+                      get_cached_count, get_cached_scooter_status_counts,
+                      SCOOTER_SORT_FIELDS, SCOOTER_DEFAULT_SORT, PARTS_SORT_FIELDS, PARTS_DEFAULT_SORT)
+from .stock import apply_movements, set_stock_levels, create_part, InsufficientStock
+from .transfers import complete_transfers
 
 # Scooter views
 @login_required
 def scooter_list(request):
     # Get all scooters and apply store-based access control
     scooters_queryset = Scooter.objects.all().select_related('store')
-    scooters_queryset = filter_by_user_store(scooters_queryset, request.user)
+    scooters_queryset = scooters_queryset.for_user(request.user)
     
-    # Filter by status if specified
-    status_filter = request.GET.get('status')
-    if status_filter and status_filter != 'all':
-        scooters_queryset = scooters_queryset.filter(status=status_filter)
+    # Status counts for the user's fleet, before the status filter is applied
+    status_counts = get_cached_scooter_status_counts(scooters_queryset)
     
-    # Filter by category if specified
+    # Status, category and License No/VIN search filters
+    status_filter = request.GET.get('status')
     category_filter = request.GET.get('category')
-    if category_filter and category_filter != 'all':
-        scooters_queryset = scooters_queryset.filter(category=category_filter)
-    
-    # Search by License No or VIN/Serial
     search_query = request.GET.get('search', '')
-    if search_query:
-        scooters_queryset = scooters_queryset.filter(
-            license_number__icontains=search_query
-        ) | scooters_queryset.filter(
-            vin__icontains=search_query
+    scooters_queryset = filter_scooters(scooters_queryset, request.GET)
+    
+    # Stream CSV if requested (flat memory for large fleets)
+    if request.GET.get('export') == 'csv':
+        return stream_csv(
+            scooters_queryset.values_list(
+                'vin', 'license_number', 'make', 'model', 'category', 'year', 'color', 'status', 'mileage',
+                'store__name', 'purchase_date', 'purchase_price', 'last_maintenance'
+            ).order_by('id').iterator(chunk_size=EXPORT_CHUNK_SIZE),
+            ['VIN/Serial Number', 'License Number', 'Make', 'Model', 'Category', 'Year', 'Color', 'Status', 'Mileage',
+             'Store', 'Purchase Date', 'Purchase Price (R)', 'Last Maintenance'],
+            'Scooter_Inventory'
         )
     
     # Export to Excel if requested
@@ -65,18 +74,29 @@ def scooter_list(request):
             columns=columns,
             filename='Scooter_Inventory',
             title='Scooter Inventory Report',
-            sheet_name='Scooters'
+            sheet_name='Scooters',
+            streaming=True
         )
     
-    # Get all possible statuses for filter dropdown
-    scooter_statuses = Scooter.STATUS_CHOICES
+    # One page after the cursor; the total is counted separately and cached
+    sort_field = get_sort(request.GET, SCOOTER_SORT_FIELDS, SCOOTER_DEFAULT_SORT)
+    page = paginate_keyset(scooters_queryset, sort_field, request.GET.get('after'))
+    next_query = next_page_query(request.GET, page) if page.has_next else None
     
-    # No pagination - all results are returned
-    scooters = scooters_queryset
+    # Rows only, for the "Load more" button and infinite scroll
+    if request.GET.get('partial'):
+        return JsonResponse({
+            'html': render_to_string('inventory/widgets/scooter_rows.html', {'scooters': page.items}, request=request),
+            'next_url': f"{reverse('inventory:scooter_list')}?{next_query}" if next_query else None,
+        })
     
     return render(request, 'inventory/scooter_list.html', {
-        'scooters': scooters, 
-        'statuses': scooter_statuses,
+        'scooters': page.items, 
+        'total_count': get_cached_count(scooters_queryset),
+        'next_query': next_query,
+        'statuses': Scooter.STATUS_CHOICES,
+        'status_counts': status_counts,
+        'current_sort': sort_field,
         'current_status': status_filter or 'all',
         'current_category': category_filter or 'all',
         'search_query': search_query
@@ -116,7 +136,7 @@ def scooter_update(request, pk):
 
 @login_required
 def scooter_detail(request, pk):
-    scooter = get_object_or_404(Scooter, pk=pk)
+    scooter = get_object_or_404(Scooter.objects.select_related('store'), pk=pk)
     maintenance_history = ScooterMaintenanceHistory.objects.filter(scooter=scooter).order_by('-maintenance_date')
     
     context = {
@@ -129,48 +149,31 @@ def scooter_detail(request, pk):
 # Parts views
 @login_required
 def parts_list(request):
-    # Get sort parameter from query string, default to 'part_number'
-    sort_by = request.GET.get('sort', 'part_number')
+    # Whitelisted sort field, default to 'part_number'
+    sort_field = get_sort(request.GET, PARTS_SORT_FIELDS, PARTS_DEFAULT_SORT)
     
     # Get store filter parameter from query string, default to None (all stores)
     store_id = request.GET.get('store', None)
-    
-    # Validate sort parameter to prevent injection
-    valid_sort_fields = ['part_number', 'name', 'category', 'current_stock', 'reorder_level', 'unit_price']
-    
-    # Check if it's a reverse sort (descending)
-    if sort_by.startswith('-') and sort_by[1:] in valid_sort_fields:
-        sort_field = sort_by
-    elif sort_by in valid_sort_fields:
-        sort_field = sort_by
-    else:
-        # Default to part_number if invalid sort field
-        sort_field = 'part_number'
-    
-    # Get all parts with sorting applied
-    parts_query = Parts.objects.all().select_related('store')
-    
-    # Apply store-based access control for non-admin users
-    parts_query = filter_by_user_store(parts_query, request.user)
-    
-    # Apply store filter if provided
-    if store_id and store_id.isdigit():
-        parts_query = parts_query.filter(store_id=int(store_id))
-    
-    # Search by Part Number or Name
     search_query = request.GET.get('search', '')
-    if search_query:
-        parts_query = parts_query.filter(
-            part_number__icontains=search_query
-        ) | parts_query.filter(
-            name__icontains=search_query
-        )
     
-    # Apply sorting
+    # Store-based access control, then the store and Part Number/Name search filters
+    parts_query = Parts.objects.all().select_related('store').for_user(request.user)
+    parts_query = filter_parts(parts_query, request.GET)
+    
+    # Apply sorting (exports only; the list is paged below)
     parts_queryset = parts_query.order_by(sort_field)
     
-    # Get all stores for the store filter dropdown
-    stores = Store.objects.all()
+    # Stream CSV if requested (flat memory for large inventories)
+    if request.GET.get('export') == 'csv':
+        return stream_csv(
+            parts_queryset.values_list(
+                'part_number', 'name', 'category', 'store__name', 'current_stock', 'reorder_level',
+                'unit_price', 'location_in_store', 'description'
+            ).iterator(chunk_size=EXPORT_CHUNK_SIZE),
+            ['Part Number', 'Part Name', 'Category', 'Store Location', 'Current Stock', 'Reorder Level',
+             'Unit Price (R)', 'Location in Store', 'Description'],
+            'Parts_Inventory_Report'
+        )
     
     # Export to Excel if requested
     if 'export' in request.GET:
@@ -212,15 +215,30 @@ def parts_list(request):
             title='Parts Inventory Report',
             sheet_name='Parts Inventory',
             store_name=store_name,
-            additional_info=additional_info
+            additional_info=additional_info,
+            streaming=True
         )
     
-    # No pagination - return all results
-    parts = parts_queryset
+    # One page after the cursor; the total is counted separately and cached
+    page = paginate_keyset(parts_query, sort_field, request.GET.get('after'))
+    next_query = next_page_query(request.GET, page) if page.has_next else None
+    
+    # Rows only, for the "Load more" button and infinite scroll
+    if request.GET.get('partial'):
+        return JsonResponse({
+            'html': render_to_string('inventory/widgets/parts_rows.html', {'parts': page.items}, request=request),
+            'next_url': f"{reverse('inventory:parts_list')}?{next_query}" if next_query else None,
+        })
+    
+    # Stores for the store filter dropdown; store-limited users only have their own
+    scope = get_request_store_scope(request)
+    stores = [scope.store] if scope.is_store_limited else Store.objects.only('id', 'name').order_by('name')
     
     # Pass the current sort field and store filter to the template context
     context = {
-        'parts': parts,
+        'parts': page.items,
+        'total_count': get_cached_count(parts_query),
+        'next_query': next_query,
         'current_sort': sort_field,
         'stores': stores,
         'selected_store_id': store_id if store_id and store_id.isdigit() else None,
@@ -234,7 +252,8 @@ def parts_create(request):
     if request.method == 'POST':
         form = PartsForm(request.POST)
         if form.is_valid():
-            form.save()
+            # The entered stock is recorded as the part's opening balance
+            create_part(form.save(commit=False), user=request.user)
             messages.success(request, 'Part added successfully.')
             return redirect('inventory:parts_list')
     else:
@@ -249,7 +268,12 @@ def parts_update(request, pk):
     if request.method == 'POST':
         form = PartsForm(request.POST, instance=part)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                # Stock is only written through the ledger, as a count adjustment when it was edited
+                part = form.save(commit=False)
+                part.save(update_fields=[name for name in form.fields if name != 'current_stock'] + ['date_updated'])
+                if 'current_stock' in form.changed_data:
+                    set_stock_levels([(part, form.cleaned_data['current_stock'])], user=request.user)
             messages.success(request, 'Part updated successfully.')
             return redirect('inventory:parts_list')
     else:
@@ -278,7 +302,7 @@ def store_list(request):
     except EmptyPage:
         # If page is out of range, deliver last page of results
         stores = paginator.page(paginator.num_pages)
-        
+    
     return render(request, 'inventory/store_list.html', {'stores': stores})
 
 @login_required
@@ -319,7 +343,7 @@ def stock_transfer_list(request):
     transfers_queryset = StockTransfer.objects.all().select_related('source_store', 'destination_store', 'part')
     
     # Apply store-based access control for non-admin users
-    transfers_queryset = filter_by_user_store(transfers_queryset, request.user)
+    transfers_queryset = transfers_queryset.for_user(request.user)
     
     # Export to Excel if requested
     if 'export' in request.GET:
@@ -382,14 +406,17 @@ def stock_transfer_create(request):
             source_store = form.cleaned_data['source_store']
             quantity = form.cleaned_data['quantity']
             
-            if part.store == source_store and part.current_stock >= quantity:
-                # Update stock levels
-                part.current_stock -= quantity
-                part.save()
-                
-                transfer.save()
-                messages.success(request, 'Stock transfer initiated successfully.')
-                return redirect('inventory:stock_transfer_list')
+            if part.store == source_store:
+                try:
+                    with transaction.atomic():
+                        # Take the stock out of the source store
+                        apply_movements([(part, -quantity)], 'transfer_out', transfer.transfer_number, request.user)
+                        transfer.save()
+                except InsufficientStock:
+                    messages.error(request, 'Insufficient stock in source store.')
+                else:
+                    messages.success(request, 'Stock transfer initiated successfully.')
+                    return redirect('inventory:stock_transfer_list')
             else:
                 messages.error(request, 'Insufficient stock in source store.')
     else:
@@ -400,53 +427,28 @@ def stock_transfer_create(request):
 @login_required
 def stock_transfer_update(request, pk):
     transfer = get_object_or_404(StockTransfer, pk=pk)
-    old_status = transfer.status
     
     if request.method == 'POST':
         form = StockTransferForm(request.POST, instance=transfer)
         if form.is_valid():
             new_transfer = form.save(commit=False)
             
-            # If status changed to completed, update destination store stock
-            if old_status != 'completed' and new_transfer.status == 'completed':
-                part = new_transfer.part
+            with transaction.atomic():
+                # Re-read the status under a row lock so a transfer is only received once
+                old_status = StockTransfer.objects.select_for_update().values_list('status', flat=True).get(pk=transfer.pk)
+                completing = old_status != 'completed' and new_transfer.status == 'completed'
                 
-                # First check if the part with the same part number exists in the destination store
-                try:
-                    # Try to find the part with the SAME part number at the destination store
-                    dest_part = Parts.objects.get(
-                        part_number=part.part_number,
-                        store=new_transfer.destination_store
-                    )
-                    # If found, update the stock but maintain all other attributes
-                    dest_part.current_stock += new_transfer.quantity
-                    
-                    # Also ensure all other attributes match the source part 
-                    # (in case they've been updated at the source)
-                    dest_part.name = part.name
-                    dest_part.description = part.description
-                    dest_part.reorder_level = part.reorder_level
-                    dest_part.unit_price = part.unit_price
-                    dest_part.category = part.category
-                    dest_part.location_in_store = part.location_in_store
-                    
-                    dest_part.save()
-                except Parts.DoesNotExist:
-                    # If not found, create a new part with the SAME part number
-                    dest_part = Parts.objects.create(
-                        part_number=part.part_number,  # Use the exact same part number
-                        name=part.name,
-                        description=part.description,
-                        store=new_transfer.destination_store,
-                        current_stock=new_transfer.quantity,
-                        reorder_level=part.reorder_level,
-                        unit_price=part.unit_price,
-                        category=part.category,
-                        location_in_store=part.location_in_store
-                    )
+                # Save the edits first; completing updates the destination store stock and the status
+                if completing:
+                    new_transfer.status = old_status
+                new_transfer.save()
+                completed = complete_transfers([new_transfer.pk], request.user) if completing else None
             
-            new_transfer.save()
-            messages.success(request, 'Stock transfer updated successfully.')
+            # Cancelled transfers keep their status; the other edits are still saved
+            if completed == []:
+                messages.error(request, f'Only pending or in transit transfers can be completed; the transfer is still {new_transfer.get_status_display().lower()}.')
+            else:
+                messages.success(request, 'Stock transfer updated successfully.')
             return redirect('inventory:stock_transfer_list')
     else:
         form = StockTransferForm(instance=transfer)
@@ -457,6 +459,26 @@ def stock_transfer_update(request, pk):
         'transfer': transfer
     })
 
+@login_required
+def stock_transfer_complete(request):
+    """Complete the transfers selected on the transfer list in one batch"""
+    if request.method != 'POST':
+        return redirect('inventory:stock_transfer_list')
+    
+    # Only administrators can edit transfers (the same rule as the list's edit buttons)
+    if not request.user.is_superuser:
+        messages.error(request, 'You do not have permission to complete stock transfers.')
+        return redirect('inventory:stock_transfer_list')
+    
+    transfer_ids = [pk for pk in request.POST.getlist('transfer_ids') if pk.isdigit()]
+    completed = complete_transfers(StockTransfer.objects.for_user(request.user).filter(pk__in=transfer_ids), request.user)
+    
+    if completed:
+        messages.success(request, f'Stock transfers completed: {len(completed)}.')
+    else:
+        messages.info(request, 'No open stock transfers were selected.')
+    return redirect('inventory:stock_transfer_list')
+
 # Supplier views
 @login_required
 def supplier_list(request):
@@ -553,14 +575,8 @@ def purchase_list(request):
     purchases_queryset = Purchase.objects.all().select_related('supplier')
     
     # Apply store-based access control for non-admin users
-    # For purchases, we need to filter related PurchaseItems
-    if not request.user.is_superuser and hasattr(request.user, 'profile') and request.user.profile.store:
-        # Get the user's assigned store
-        user_store = request.user.profile.store
-        
-        # Find purchases that have at least one item linked to the user's store
-        store_purchase_ids = PurchaseItem.objects.filter(store=user_store).values_list('purchase_id', flat=True)
-        purchases_queryset = purchases_queryset.filter(id__in=store_purchase_ids)
+    # (a purchase belongs to its default store and to the stores of its items)
+    purchases_queryset = purchases_queryset.for_store(get_request_store_scope(request).store)
     
     # Export to Excel if requested
     if 'export' in request.GET:
@@ -610,54 +626,59 @@ def purchase_create(request):
         formset = PurchaseItemFormSet(request.POST)  # Initialize formset for POST
         
         if form.is_valid():
-            purchase = form.save(commit=False)
-            purchase.created_by = request.user
-            purchase.save()
-            
-            # Process the formset with the saved purchase instance
-            formset = PurchaseItemFormSet(request.POST, instance=purchase)
-            if formset.is_valid():
-                purchase_items = formset.save(commit=False)
+            # The purchase, its items and the stock they add are saved together or not at all
+            with transaction.atomic():
+                purchase = form.save(commit=False)
+                purchase.created_by = request.user
+                purchase.save()
                 
-                # Calculate total amount and update inventory levels for each purchased item
-                total_amount = 0
-                for item in purchase_items:
-                    # If store is not set, use the purchase default store
-                    if not item.store and purchase.store:
-                        item.store = purchase.store
+                # Process the formset with the saved purchase instance
+                formset = PurchaseItemFormSet(request.POST, instance=purchase)
+                if formset.is_valid():
+                    purchase_items = formset.save(commit=False)
                     
-                    # Calculate item total
-                    item_total = item.quantity * item.unit_price
-                    total_amount += item_total
+                    # Calculate total amount and update inventory levels for each purchased item
+                    total_amount = 0
+                    stock_received = []
+                    for item in purchase_items:
+                        # If store is not set, use the purchase default store
+                        if not item.store and purchase.store:
+                            item.store = purchase.store
+                        
+                        # Calculate item total
+                        item_total = item.quantity * item.unit_price
+                        total_amount += item_total
+                        
+                        if item.part and item.store:
+                            # Current stock of the part goes up by the purchased quantity
+                            stock_received.append((item.part, item.quantity))
+                        
+                        # Save the purchase item
+                        item.save()
                     
-                    if item.part and item.store:
-                        # Update current stock of the part
-                        item.part.current_stock += item.quantity
-                        item.part.save()
+                    # Add the purchased stock in one ledger transaction
+                    apply_movements(stock_received, 'purchase', purchase.invoice_number, request.user)
                     
-                    # Save the purchase item
-                    item.save()
-                
-                # Update the purchase total amount
-                purchase.total_amount = total_amount
-                purchase.save()
-                
-                # Save any deleted items from the formset
-                formset.save()
-                
-                messages.success(request, 'Purchase invoice added successfully and inventory levels updated.')
-                return redirect('inventory:purchase_list')
-            else:
-                # If formset is invalid, delete the purchase object and show errors
-                purchase.delete()
-                for i, error_dict in enumerate(formset.errors):
-                    if error_dict:
-                        for field, errors in error_dict.items():
-                            for error in errors:
-                                messages.error(request, f"Item {i+1} - {field}: {error}")
-                if formset.non_form_errors():
-                    for error in formset.non_form_errors():
-                        messages.error(request, f"Form Error: {error}")
+                    # Update the purchase total amount
+                    purchase.total_amount = total_amount
+                    purchase.save()
+                    
+                    # Save any deleted items from the formset
+                    formset.save()
+                    
+                    messages.success(request, 'Purchase invoice added successfully and inventory levels updated.')
+                    return redirect('inventory:purchase_list')
+                else:
+                    # If formset is invalid, delete the purchase object and show errors
+                    purchase.delete()
+                    for i, error_dict in enumerate(formset.errors):
+                        if error_dict:
+                            for field, errors in error_dict.items():
+                                for error in errors:
+                                    messages.error(request, f"Item {i+1} - {field}: {error}")
+                    if formset.non_form_errors():
+                        for error in formset.non_form_errors():
+                            messages.error(request, f"Form Error: {error}")
         else:
             # Show specific form errors
             for field, errors in form.errors.items():
@@ -681,54 +702,55 @@ def purchase_update(request, pk):
     if request.method == 'POST':
         form = PurchaseForm(request.POST, instance=purchase)
         if form.is_valid():
-            form.save()
-            
-            # Process the formset
-            formset = PurchaseItemFormSet(request.POST, instance=purchase)
-            if formset.is_valid():
-                # Track items that are removed to adjust inventory
-                original_items = {item.id: item for item in purchase.items.all()}
+            # The purchase, its items and the stock corrections are saved together or not at all
+            with transaction.atomic():
+                form.save()
                 
-                # Save the updated formset items
-                purchase_items = formset.save(commit=False)
-                
-                # Update inventory for existing items that changed quantities
-                for item in purchase_items:
-                    if item.id and item.id in original_items:
-                        if item.part and item.store:
-                            # Adjust inventory based on quantity difference
-                            quantity_diff = item.quantity - original_items[item.id].quantity
-                            if quantity_diff != 0:
-                                item.part.current_stock += quantity_diff
-                                item.part.save()
-                    elif item.part and item.store:  # New item added
-                        # Add new item's quantity to inventory
-                        item.part.current_stock += item.quantity
-                        item.part.save()
+                # Process the formset
+                formset = PurchaseItemFormSet(request.POST, instance=purchase)
+                if formset.is_valid():
+                    # Track items that are removed to adjust inventory
+                    original_items = {item.id: item for item in purchase.items.all()}
                     
-                    # Save the purchase item
-                    item.save()
-                
-                # Handle deleted items - reduce inventory
-                for form in formset.deleted_forms:
-                    item_id = form.instance.id
-                    if item_id in original_items:
-                        item = original_items[item_id]
-                        if item.part and item.store:
-                            # Remove deleted item quantity from inventory
-                            item.part.current_stock -= item.quantity
-                            if item.part.current_stock < 0:
-                                item.part.current_stock = 0
-                            item.part.save()
-                
-                # Save formset to handle deletions
-                formset.save()
-                
-                messages.success(request, 'Purchase invoice updated successfully and inventory levels adjusted.')
-                return redirect('inventory:purchase_list')
-            else:
-                for error in formset.errors:
-                    messages.error(request, error)
+                    # Save the updated formset items
+                    purchase_items = formset.save(commit=False)
+                    
+                    # Update inventory for existing items that changed quantities
+                    stock_changes = []
+                    for item in purchase_items:
+                        if item.id and item.id in original_items:
+                            if item.part and item.store:
+                                # Adjust inventory based on quantity difference
+                                quantity_diff = item.quantity - original_items[item.id].quantity
+                                if quantity_diff != 0:
+                                    stock_changes.append((item.part, quantity_diff))
+                        elif item.part and item.store:  # New item added
+                            # Add new item's quantity to inventory
+                            stock_changes.append((item.part, item.quantity))
+                        
+                        # Save the purchase item
+                        item.save()
+                    
+                    # Handle deleted items - reduce inventory
+                    for form in formset.deleted_forms:
+                        item_id = form.instance.id
+                        if item_id in original_items:
+                            item = original_items[item_id]
+                            if item.part and item.store:
+                                # Remove deleted item quantity from inventory
+                                stock_changes.append((item.part, -item.quantity))
+                    
+                    # Apply the changes in one ledger transaction, never taking stock below zero
+                    apply_movements(stock_changes, 'purchase_correction', purchase.invoice_number, request.user, clamp=True)
+                    
+                    # Save formset to handle deletions
+                    formset.save()
+                    
+                    messages.success(request, 'Purchase invoice updated successfully and inventory levels adjusted.')
+                    return redirect('inventory:purchase_list')
+                else:
+                    for error in formset.errors:
+                        messages.error(request, error)
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -877,17 +899,14 @@ def purchase_delete(request, pk):
     purchase = get_object_or_404(Purchase, pk=pk)
     
     if request.method == 'POST':
-        # Adjust inventory levels by removing purchased quantities
-        for item in purchase.items.all():
-            if item.part and item.store:
-                # Decrease inventory by the purchased quantity
-                item.part.current_stock -= item.quantity
-                # Ensure we don't go below zero
-                if item.part.current_stock < 0:
-                    item.part.current_stock = 0
-                item.part.save()
-        
-        purchase.delete()
+        with transaction.atomic():
+            # Adjust inventory levels by removing purchased quantities (without going below zero)
+            apply_movements(
+                [(item.part_id, -item.quantity) for item in purchase.items.all() if item.part_id and item.store_id],
+                'purchase_correction', purchase.invoice_number, request.user, clamp=True,
+            )
+            
+            purchase.delete()
         messages.success(request, 'Purchase invoice deleted successfully and inventory levels adjusted.')
         return redirect('inventory:purchase_list')
     
@@ -904,19 +923,17 @@ def purchase_delete(request, pk):
 def purchase_quote(request):
     """View to create a purchase quote for ordering parts"""
     # Get stores based on user's access rights
-    if request.user.is_superuser or (hasattr(request.user, 'profile') and not request.user.profile.store):
+    user_store = get_request_store_scope(request).store
+    if user_store is None:
         # Admin users can see all stores
         stores = Store.objects.filter(is_active=True).order_by('name')
-    elif hasattr(request.user, 'profile') and request.user.profile.store:
-        # Regular staff can only see their assigned store
-        stores = Store.objects.filter(id=request.user.profile.store.id, is_active=True)
     else:
-        # Fallback (shouldn't normally happen)
-        stores = Store.objects.none()
+        # Regular staff can only see their assigned store
+        stores = Store.objects.filter(id=user_store.id, is_active=True)
     
     # Get parts based on user's store assignment
     all_parts = Parts.objects.all().order_by('category', 'name')
-    parts = filter_by_user_store(all_parts, request.user)
+    parts = all_parts.for_user(request.user)
     
     # Generate a unique quote number
     import datetime
@@ -1051,10 +1068,10 @@ def export_purchase_quote(request):
             col_letter = get_column_letter(col_num)
             # Set a minimum column width, then adjust based on content
             ws.column_dimensions[col_letter].width = 15
-            
+        
         # Set specific column widths
         ws.column_dimensions['B'].width = 40  # Item Name column wider
-            
+        
         # Create response with Excel data
         buffer = BytesIO()
         wb.save(buffer)
@@ -1072,7 +1089,7 @@ def export_purchase_quote(request):
         # If accessed directly via GET, redirect to purchase quote page
         messages.error(request, 'Please select items first to generate a quote.')
         return redirect('inventory:purchase_quote')
-        
+
 # API for scooter details with store information
 @login_required
 def scooter_details_api(request):
@@ -1084,7 +1101,7 @@ def scooter_details_api(request):
                 'success': False,
                 'error': 'No scooter_id provided'
             })
-            
+        
         scooter = get_object_or_404(Scooter, pk=scooter_id)
         data = {
             'success': True,
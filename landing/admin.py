@@ -71,13 +71,13 @@ class ProductAdmin(admin.ModelAdmin):
     remove_featured.short_description = "Remove selected products from featured"
 
 class RentalCategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'daily_rate', 'weekly_rate', 'monthly_rate', 'is_active')
+    list_display = ('name', 'scooter_category', 'daily_rate', 'weekly_rate', 'monthly_rate', 'is_active')
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name', 'description')
     list_filter = ('is_active',)
     fieldsets = (
         (None, {
-            'fields': ('name', 'slug', 'description', 'image')
+            'fields': ('name', 'slug', 'description', 'image', 'scooter_category')
         }),
         ('Pricing', {
             'fields': ('daily_rate', 'weekly_rate', 'monthly_rate')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-16 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0002_rentalcategory_alter_brand_logo_alter_product_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rentalcategory',
+            name='scooter_category',
+            field=models.CharField(blank=True, choices=[('A', 'Category A - Sym Orbit 125cc'), ('B', 'Category B - Jet 14 200cc'), ('C', 'Category C - Citycom 300cc'), ('D', 'Category D - Vespa 150/300cc')], help_text='Fleet category (A-D) used to check availability', max_length=1),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.text import slugify
 from django.urls import reverse
+from inventory.models import Scooter
 import os
 
 class Category(models.Model):
@@ -104,6 +105,8 @@ class RentalCategory(models.Model):
     daily_rate = models.DecimalField(max_digits=10, decimal_places=2)
     weekly_rate = models.DecimalField(max_digits=10, decimal_places=2)
     monthly_rate = models.DecimalField(max_digits=10, decimal_places=2)
+    scooter_category = models.CharField(max_length=1, choices=Scooter.CATEGORY_CHOICES, blank=True,
+                                        help_text="Fleet category (A-D) used to check availability")
     is_active = models.BooleanField(default=True)
     date_added = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
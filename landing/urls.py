@@ -10,6 +10,7 @@ urlpatterns = [
     path('products/<int:product_id>/', views.product_detail, name='product_detail'),
     path('buy/', views.buy, name='buy'),
     path('rent/', views.rent, name='rent'),
+    path('rent/availability/', views.rent_availability, name='rent_availability'),
     path('restore/', views.restore, name='restore'),
     path('service/', views.service, name='service'),
     path('contact/', views.contact, name='contact'),
@@ -4,6 +4,7 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from .models import Category, Brand, Product
 
 # The following sample data functions will eventually be removed once we have real data in database
@@ -57,6 +58,7 @@ def get_sample_rental_categories():
     categories = [
         {
             'id': 1,
+            'scooter_category': 'A',
             'name': 'Category A - Sym Orbit 125cc',
             'description': 'Economical 125cc scooters perfect for city trips and commuting. Easy to handle.',
             'image': '/static/images/rental/economy.jpg',
@@ -66,6 +68,7 @@ def get_sample_rental_categories():
         },
         {
             'id': 2,
+            'scooter_category': 'B',
             'name': 'Category B - Jet 14 200cc',
             'description': 'Mid-size 200cc scooters with more power and comfort for longer journeys.',
             'image': '/static/images/rental/midsize.jpg',
@@ -75,6 +78,7 @@ def get_sample_rental_categories():
         },
         {
             'id': 3,
+            'scooter_category': 'C',
             'name': 'Category C - Citycom 300cc',
             'description': 'Powerful 300cc scooters with enhanced comfort for city and highway riding.',
             'image': '/static/images/rental/premium.jpg',
@@ -84,6 +88,7 @@ def get_sample_rental_categories():
         },
         {
             'id': 4,
+            'scooter_category': 'D',
             'name': 'Category D - Vespa 150/300cc',
             'description': 'Premium Vespa scooters with stylish Italian design and excellent performance.',
             'image': '/static/images/rental/vespa.jpg',
@@ -265,6 +270,27 @@ def rent(request):
     # Using the new rent page template with direct booking form
     return render(request, 'landing/rent_new.html', context)
 
+def rent_availability(request):
+    """API endpoint: scooters free per store for a category and dates (?category=A&start=YYYY-MM-DD&end=YYYY-MM-DD)"""
+    from customers.availability import get_availability_index, parse_window
+    from inventory.models import Store
+    
+    window = parse_window(request.GET.get('start'), request.GET.get('end'))
+    if not window:
+        return JsonResponse({'error': 'Please choose a pickup and return date.'}, status=400)
+    
+    counts = get_availability_index().free_counts(*window, category=request.GET.get('category') or None)
+    store_names = dict(Store.objects.filter(id__in=counts, is_active=True).values_list('id', 'name'))
+    
+    return JsonResponse({
+        'available': sum(count for store_id, count in counts.items() if store_id in store_names),
+        'stores': [
+            {'name': store_names[store_id], 'available': count}
+            for store_id, count in sorted(counts.items(), key=lambda item: -item[1])
+            if store_id in store_names
+        ]
+    })
+
 def restore(request):
     """Restoration services page"""
     return render(request, 'landing/restore.html')
@@ -41,6 +41,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Outermost after security so session/auth queries are profiled too (off unless REQUEST_PROFILING=1)
+    'analytics.middleware.RequestProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -132,3 +134,74 @@ SESSION_COOKIE_AGE = 300  # 5 minutes in seconds
 # Reset expiry time on every request
 SESSION_SAVE_EVERY_REQUEST = True
 
+# Sessions live in the cache in front of the database (users.sessions); a request that
+# only resets the expiry refreshes the cache, and the database copy is rewritten when the
+# session changes or is more than SESSION_DB_REFRESH_INTERVAL seconds old
+SESSION_ENGINE = 'users.sessions'
+SESSION_DB_REFRESH_INTERVAL = int(os.environ.get('SESSION_DB_REFRESH_INTERVAL', 60))
+
+
+# Background alert worker (python manage.py run_alert_worker)
+# Seconds between inventory alert generation runs
+INVENTORY_ALERT_INTERVAL = int(os.environ.get('INVENTORY_ALERT_INTERVAL', 300))
+
+# Overdue rental sweeper (python manage.py sweep_overdue_rentals)
+# Seconds between sweeps marking active rentals past their expected return as overdue
+OVERDUE_SWEEP_INTERVAL = int(os.environ.get('OVERDUE_SWEEP_INTERVAL', 300))
+
+# Cache: local memory by default; set REDIS_URL (e.g. redis://127.0.0.1:6379/1)
+# to share cached dashboard metrics and their invalidation across processes
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'scootdr-default',
+        }
+    }
+
+# Seconds cached dashboard metrics live before being recomputed, even without writes
+DASHBOARD_METRICS_TTL = int(os.environ.get('DASHBOARD_METRICS_TTL', 300))
+
+# Scooter and parts lists (inventory.listing): rows per page, and seconds the
+# cached totals live before being recounted, even without writes
+INVENTORY_LIST_PAGE_SIZE = int(os.environ.get('INVENTORY_LIST_PAGE_SIZE', 50))
+INVENTORY_LIST_COUNT_TTL = int(os.environ.get('INVENTORY_LIST_COUNT_TTL', 300))
+
+# Background export worker (python manage.py run_export_worker)
+# Exports produced at the same time; further jobs wait in the queue
+EXPORT_MAX_CONCURRENCY = int(os.environ.get('EXPORT_MAX_CONCURRENCY', 2))
+# Seconds between queue polls when the worker is idle
+EXPORT_POLL_INTERVAL = int(os.environ.get('EXPORT_POLL_INTERVAL', 5))
+# Days finished export files are kept under MEDIA_ROOT/exports
+EXPORT_RETENTION_DAYS = int(os.environ.get('EXPORT_RETENTION_DAYS', 7))
+# Seconds after which a running export is marked failed (its worker stopped)
+EXPORT_JOB_TIMEOUT = int(os.environ.get('EXPORT_JOB_TIMEOUT', 1800))
+
+# Report scheduler (python manage.py run_report_scheduler)
+# Seconds between checks for due ReportSchedule rows
+REPORT_SCHEDULER_INTERVAL = int(os.environ.get('REPORT_SCHEDULER_INTERVAL', 60))
+# Processes building reports at the same time
+REPORT_SCHEDULER_WORKERS = int(os.environ.get('REPORT_SCHEDULER_WORKERS', 2))
+
+# Seconds the in-process scooter availability index is reused before a rebuild
+# (writes to rentals, job cards and scooters rebuild it straight away)
+AVAILABILITY_INDEX_TTL = int(os.environ.get('AVAILABILITY_INDEX_TTL', 60))
+
+# Request profiling (analytics.middleware.RequestProfilingMiddleware), off unless REQUEST_PROFILING=1
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', '0') == '1'
+# Fraction of requests profiled, e.g. 0.05 in production
+REQUEST_PROFILING_SAMPLE_RATE = float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', 1.0))
+# JSON lines log of profiled requests, rotated at REQUEST_PROFILING_LOG_MAX_BYTES
+REQUEST_PROFILING_LOG = os.environ.get('REQUEST_PROFILING_LOG', str(BASE_DIR / 'logs' / 'request_profile.jsonl'))
+REQUEST_PROFILING_LOG_MAX_BYTES = int(os.environ.get('REQUEST_PROFILING_LOG_MAX_BYTES', 10 * 1024 * 1024))
+REQUEST_PROFILING_LOG_BACKUPS = int(os.environ.get('REQUEST_PROFILING_LOG_BACKUPS', 5))
+
+# Seconds a user's store assignment is cached in their session (0 to look it up on every request)
+STORE_SCOPE_SESSION_TTL = int(os.environ.get('STORE_SCOPE_SESSION_TTL', 60))
@@ -2,6 +2,7 @@ from django import forms
 from .models import JobCard, JobCardItem, ServiceChecklist
 from django.contrib.auth import get_user_model
 from inventory.models import Scooter, Parts
+from utils.search import TypeaheadSelect
 
 User = get_user_model()
 
@@ -36,7 +37,7 @@ class JobCardForm(forms.ModelForm):
             base_queryset = Scooter.objects.exclude(status='maintenance')
         else:
             base_queryset = Scooter.objects.all()
-            
+        
         # Filter by store if provided
         if store:
             self.fields['scooter'].queryset = base_queryset.filter(store=store)
@@ -74,10 +75,11 @@ class JobCardItemForm(forms.ModelForm):
         model = JobCardItem
         fields = ['part', 'quantity', 'unit_price', 'total_price']
         widgets = {
-            'part': forms.Select(attrs={
-                'class': 'form-control select2-searchable part-select',
-                'placeholder': 'Type Part Number or Name to search...',
-                'data-search-field': 'true'
+            # Parts are looked up as the user types instead of listing every part in every row
+            'part': TypeaheadSelect('parts', attrs={
+                'class': 'form-control part-select',
+                'data-placeholder': 'Type Part Number or Name to search...',
+                'data-search-params': 'in_stock=1',
             }),
             'quantity': forms.NumberInput(attrs={'min': '0.01', 'step': '0.01', 'class': 'part-quantity'}),
             'unit_price': forms.NumberInput(attrs={'step': '0.01', 'min': '0', 'class': 'part-price', 'readonly': 'readonly'}),
@@ -97,7 +99,7 @@ class JobCardItemForm(forms.ModelForm):
         else:
             # Only show parts that have stock available if no store specified
             self.fields['part'].queryset = Parts.objects.filter(current_stock__gt=0)
-            
+        
         # Update help text to reflect store filtering
         if store:
             self.fields['part'].help_text = f"Parts from {store.name} with available stock"
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-16 23:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_hot_path_indexes'),
+        ('service', '0004_jobcard_store'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['status', 'date_created'], name='jobcard_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['date_updated'], name='jobcard_updated_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 from inventory.models import Scooter, Parts
+from inventory.querysets import StoreScopedManager
 
 class JobCard(models.Model):
     """Model representing a service job card for scooter repairs/maintenance"""
@@ -39,6 +40,9 @@ class JobCard(models.Model):
     total_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0, validators=[MinValueValidator(0)])
     notes = models.TextField(blank=True)
     
+    # Store scoping (see inventory.querysets)
+    objects = StoreScopedManager('store')
+    
     def __str__(self):
         return f"Job Card #{self.job_card_number} - {self.scooter}"
     
@@ -60,6 +64,14 @@ class JobCard(models.Model):
         if self.pk:
             self.total_cost = self.calculate_total_cost()
         super().save(*args, **kwargs)
+    
+    class Meta:
+        indexes = [
+            # Job card list/dashboard: by status, newest first
+            models.Index(fields=['status', 'date_created'], name='jobcard_status_created_idx'),
+            # Incremental analytics rollups (changed since the watermark)
+            models.Index(fields=['date_updated'], name='jobcard_updated_idx'),
+        ]
 
 class JobCardItem(models.Model):
     """Model representing parts used in a job card"""
@@ -0,0 +1,73 @@
+from datetime import date
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from inventory.models import Parts, Scooter, StockMovement, Store
+from service.models import JobCard
+from utils.testing import ViewBudgetTestCase
+
+
+class ServiceViewBudgetTests(ViewBudgetTestCase):
+    
+    def test_job_card_list(self):
+        # Session, user, count, page with scooters and technicians
+        self.assertViewBudget('service:job_card_list', queries=4)
+    
+    def test_job_card_detail(self):
+        # Session, user, job card with scooter, store and technician, parts used, checklist
+        job_card = JobCard.objects.filter(parts_used__isnull=False).order_by('-pk').first()
+        self.assertViewBudget('service:job_card_detail', [job_card.pk], queries=5)
+
+
+class JobCardCreateTests(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = Store.objects.create(name='Test Store', location='1 Main Road', contact_person='Manager',
+                                         phone='0215550000', email='store@example.com')
+        cls.scooter = Scooter.objects.create(vin='TEST-VIN1', make='Sym', model='Orbit 125', year=2024, color='Red',
+                                             hourly_rate=50, daily_rate=300, store=cls.store,
+                                             purchase_date=date(2024, 1, 1), purchase_price=20000)
+        cls.part = Parts.objects.create(part_number='BRK-1', name='Brake pad', store=cls.store, current_stock=2,
+                                        unit_price=100, category='Brakes')
+        # Inserted directly, as saving a User also creates its profile twice
+        User.objects.bulk_create([User(username='technician', is_superuser=True, is_staff=True)])
+        cls.user = User.objects.get(username='technician')
+    
+    def setUp(self):
+        self.client.force_login(self.user)
+    
+    def post_job_card(self, quantity):
+        return self.client.post(reverse('service:job_card_create'), {
+            'job_card_number': 'JC000001', 'scooter': self.scooter.pk, 'store': self.store.pk, 'status': 'pending',
+            'priority': 'medium', 'description': 'Brakes', 'technician': self.user.pk, 'mileage': 100,
+            'labor_hours': 1, 'labor_rate': 100, 'notes': '',
+            'parts_used-TOTAL_FORMS': 1, 'parts_used-INITIAL_FORMS': 0,
+            'parts_used-MIN_NUM_FORMS': 0, 'parts_used-MAX_NUM_FORMS': 1000,
+            'parts_used-0-part': self.part.pk, 'parts_used-0-quantity': quantity,
+            'parts_used-0-unit_price': 100, 'parts_used-0-total_price': 100 * quantity,
+        })
+    
+    def test_creates_job_card_and_takes_parts_from_stock(self):
+        response = self.post_job_card(2)
+        
+        self.assertRedirects(response, reverse('service:job_card_list'), fetch_redirect_response=False)
+        job_card = JobCard.objects.get()
+        self.assertEqual(job_card.checklist_items.count(), 6)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.current_stock, 0)
+        self.assertEqual(StockMovement.objects.get(reason='job_card').quantity, -2)
+        self.scooter.refresh_from_db()
+        self.assertEqual(self.scooter.status, 'maintenance')
+    
+    def test_insufficient_stock_saves_nothing(self):
+        response = self.post_job_card(5)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Insufficient stock for Brake pad')
+        self.assertFalse(JobCard.objects.exists())
+        self.assertFalse(StockMovement.objects.exists())
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.current_stock, 2)
+        self.scooter.refresh_from_db()
+        self.assertEqual(self.scooter.status, 'available')
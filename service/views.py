@@ -1,12 +1,14 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Sum, F
 from django.forms import inlineformset_factory, BaseInlineFormSet
 from django.http import JsonResponse
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from .models import JobCard, JobCardItem, ServiceChecklist
 from inventory.models import Scooter, Parts, Store
+from inventory.stock import apply_movements, InsufficientStock
 from .forms import JobCardForm, JobCardItemForm, ServiceChecklistForm
 
 @login_required
@@ -42,7 +44,8 @@ def job_card_list(request):
             columns=columns,
             filename='Service_Job_Cards',
             title='Service Job Cards Report',
-            sheet_name='Job Cards'
+            sheet_name='Job Cards',
+            streaming=True
         )
     
     # Pagination - 9 items per page
@@ -105,100 +108,80 @@ def job_card_create(request):
                 # For any other status, set to maintenance
                 scooter.status = 'maintenance'
             
-            # Save the scooter with updated status
-            scooter.save()
-            
-            # Save the job card to get an ID
-            job_card.save()
-            
-            # Log successful job card creation
-            print(f"Job Card created successfully with ID: {job_card.id}, Number: {job_card.job_card_number}, Store: {job_card.store}")
-            
-            # Re-instantiate the formset with the saved job_card instance and filtered by store
-            formset = JobCardItemFormSet(request.POST, instance=job_card, store=job_card.store)
-            
-            if formset.is_valid():
-                # Process parts and update inventory
-                parts_valid = True
-                parts_to_update = []
-                
-                for item_form in formset:
-                    if item_form.cleaned_data and not item_form.cleaned_data.get('DELETE', False):
-                        part = item_form.cleaned_data['part']
-                        quantity = item_form.cleaned_data['quantity']
-                        
-                        # Check if part has enough stock
-                        if part.current_stock >= quantity:
-                            # Store part info for later update
-                            parts_to_update.append((part, quantity))
-                        else:
-                            messages.error(request, f'Insufficient stock for {part.name}')
-                            parts_valid = False
-                            break
-                
-                if parts_valid:
-                    # Update inventory and save formset
-                    for part, quantity in parts_to_update:
-                        part.current_stock -= quantity
-                        part.save()
-                    
-                    # Save the formset items
-                    formset.save()
+            try:
+                # The scooter status, the job card, the parts taken from stock, the items and
+                # the checklist are saved together; a failure rolls all of them back
+                with transaction.atomic():
+                    # Save the scooter with updated status
+                    scooter.save()
                     
-                    # Create default checklist items
-                    default_items = [
-                        "Brake inspection",
-                        "Battery check",
-                        "Tire pressure and condition",
-                        "Lights and signals testing",
-                        "Electrical system check",
-                        "Frame and suspension inspection"
-                    ]
+                    # Save the job card to get an ID
+                    job_card.save()
                     
-                    for item in default_items:
-                        ServiceChecklist.objects.create(job_card=job_card, item_name=item)
+                    # Log successful job card creation
+                    print(f"Job Card created successfully with ID: {job_card.id}, Number: {job_card.job_card_number}, Store: {job_card.store}")
                     
-                    messages.success(request, 'Job card created successfully!')
+                    # Re-instantiate the formset with the saved job_card instance and filtered by store
+                    formset = JobCardItemFormSet(request.POST, instance=job_card, store=job_card.store)
                     
-                    # Force a recalculation of the total cost
-                    job_card.save()
+                    if formset.is_valid():
+                        # Take the parts out of stock and save the items; the parts are
+                        # locked while their stock is checked, so they cannot be oversold
+                        parts_to_update = [
+                            (item_form.cleaned_data['part'], -item_form.cleaned_data['quantity'])
+                            for item_form in formset
+                            if item_form.cleaned_data and not item_form.cleaned_data.get('DELETE', False)
+                        ]
+                        apply_movements(parts_to_update, 'job_card', job_card.job_card_number, request.user)
+                        formset.save()
+                        
+                        # Create default checklist items
+                        default_items = [
+                            "Brake inspection",
+                            "Battery check",
+                            "Tire pressure and condition",
+                            "Lights and signals testing",
+                            "Electrical system check",
+                            "Frame and suspension inspection"
+                        ]
+                        
+                        for item in default_items:
+                            ServiceChecklist.objects.create(job_card=job_card, item_name=item)
+                        
+                        # Force a recalculation of the total cost
+                        job_card.save()
+                        
+                        messages.success(request, 'Job card created successfully!')
+                        
+                        # Redirect to the job card list view after creating a job card
+                        return redirect('service:job_card_list')
                     
-                    # Redirect to the job card list view after creating a job card
-                    return redirect('service:job_card_list')
-                else:
-                    # If parts validation failed, delete the job card
-                    job_card.delete()
-                    # Restore original scooter status
-                    scooter.status = job_card.previous_scooter_status
-                    scooter.save()
-                    # Error already shown
-            else:
-                # If formset is invalid, delete the job_card to prevent orphan records
-                job_card.delete()
-                # Restore original scooter status
-                scooter.status = job_card.previous_scooter_status
-                scooter.save()
-                messages.error(request, 'There was an error with the job card items. Please check the form and try again.')
+                    # If the formset is invalid, roll back the job card and scooter status
+                    transaction.set_rollback(True)
+                    messages.error(request, 'There was an error with the job card items. Please check the form and try again.')
+            except InsufficientStock as e:
+                # Nothing was saved; the rollback restored the scooter status
+                for part in e.parts:
+                    messages.error(request, f'Insufficient stock for {part.name}')
+            
+            # The job card was rolled back, so the form is shown again as a new one
+            job_card.pk = None
         else:
             formset = JobCardItemFormSet()  # Initialize formset
             messages.error(request, 'There was an error with the job card form. Please check and try again.')
     else:
         form = JobCardForm()
-        # Handle AJAX request for filtered parts
+        # Handle AJAX request for the store's scooters (parts are searched with dashboard:search_api)
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest' and 'store_id' in request.GET:
             store_id = request.GET.get('store_id')
             try:
                 store = Store.objects.get(pk=store_id)
-                # Filter parts by store (limit to 200 most recent for performance)
-                parts = Parts.objects.filter(store=store, current_stock__gt=0).order_by('-id')[:200]
                 # Filter scooters by store (limit to 100 most recent for performance)
                 scooters = Scooter.objects.filter(store=store).exclude(status='maintenance').order_by('-id')[:100]
                 
                 return JsonResponse({
                     'success': True,
-                    'parts': [{'id': p.id, 'text': f"{p.part_number} - {p.name} ({p.current_stock} in stock)", 'unit_price': float(p.unit_price)} for p in parts],
                     'scooters': [{'id': s.id, 'text': f"{s.number_plate} - {s.model} ({s.vin})"} for s in scooters],
-                    'parts_count': Parts.objects.filter(store=store, current_stock__gt=0).count(),
                     'scooters_count': Scooter.objects.filter(store=store).exclude(status='maintenance').count()
                 })
             except Exception as e:
@@ -282,8 +265,8 @@ def job_card_update(request, pk):
 
 @login_required
 def job_card_detail(request, pk):
-    job_card = get_object_or_404(JobCard, pk=pk)
-    parts_used = job_card.parts_used.all().select_related('part')
+    job_card = get_object_or_404(JobCard.objects.select_related('scooter__store', 'technician'), pk=pk)
+    parts_used = list(job_card.parts_used.all().select_related('part'))
     checklist_items = job_card.checklist_items.all()
     
     context = {
@@ -291,7 +274,7 @@ def job_card_detail(request, pk):
         'parts_used': parts_used,
         'checklist_items': checklist_items,
         'labor_cost': job_card.calculate_labor_cost(),
-        'parts_cost': job_card.calculate_parts_cost(),
+        'parts_cost': sum(item.total_price for item in parts_used),
         'total_cost': job_card.total_cost
     }
     
@@ -363,40 +346,43 @@ def job_card_delete(request, pk):
     job_card = get_object_or_404(JobCard, pk=pk)
     
     if request.method == 'POST':
-        # Get all parts used in the job card before deleting it
-        job_card_items = JobCardItem.objects.filter(job_card=job_card).select_related('part')
-        
-        # Return parts to inventory
-        for item in job_card_items:
-            part = item.part
-            part.current_stock += item.quantity
-            part.save()
-            messages.info(request, f'Returned {item.quantity} units of {part.name} to inventory')
-        
-        # If the scooter is in maintenance status and the only job card for this scooter is being deleted,
-        # update scooter status to available (unless it's retired)
-        scooter = job_card.scooter
-        other_active_job_cards = JobCard.objects.filter(
-            scooter=scooter, 
-            status__in=['pending', 'in_progress', 'on_hold']
-        ).exclude(pk=job_card.pk).count()
-        
-        if other_active_job_cards == 0 and scooter.status == 'maintenance':
-            # Check if the scooter was previously marked as retired
-            # We can't simply check the current status since it's already 'maintenance'
-            # So instead, check for the scooter model year. If it's very old, assume it's retired.
-            # This is just a placeholder - in a real app, you'd have a 'is_retired' field
-            # or some other way to track this permanent status.
-            current_year = 2025  # Hard-coded current year
-            if scooter.year < current_year - 10:  # Assuming scooters older than 10 years are retired
-                messages.info(request, f'Scooter {scooter} remains in retired status')
-            else:
-                scooter.status = 'available'
-                scooter.save()
-                messages.info(request, f'Scooter {scooter} status updated to available')
-        
-        # Now delete the job card
-        job_card.delete()
+        # Returned stock, scooter status and the deletion are saved together or not at all
+        with transaction.atomic():
+            # Get all parts used in the job card before deleting it
+            job_card_items = JobCardItem.objects.filter(job_card=job_card).select_related('part')
+            
+            # Return parts to inventory
+            apply_movements(
+                [(item.part, item.quantity) for item in job_card_items],
+                'job_card_return', job_card.job_card_number, request.user,
+            )
+            for item in job_card_items:
+                messages.info(request, f'Returned {item.quantity} units of {item.part.name} to inventory')
+            
+            # If the scooter is in maintenance status and the only job card for this scooter is being deleted,
+            # update scooter status to available (unless it's retired)
+            scooter = job_card.scooter
+            other_active_job_cards = JobCard.objects.filter(
+                scooter=scooter, 
+                status__in=['pending', 'in_progress', 'on_hold']
+            ).exclude(pk=job_card.pk).count()
+            
+            if other_active_job_cards == 0 and scooter.status == 'maintenance':
+                # Check if the scooter was previously marked as retired
+                # We can't simply check the current status since it's already 'maintenance'
+                # So instead, check for the scooter model year. If it's very old, assume it's retired.
+                # This is just a placeholder - in a real app, you'd have a 'is_retired' field
+                # or some other way to track this permanent status.
+                current_year = 2025  # Hard-coded current year
+                if scooter.year < current_year - 10:  # Assuming scooters older than 10 years are retired
+                    messages.info(request, f'Scooter {scooter} remains in retired status')
+                else:
+                    scooter.status = 'available'
+                    scooter.save()
+                    messages.info(request, f'Scooter {scooter} status updated to available')
+            
+            # Now delete the job card
+            job_card.delete()
         messages.success(request, 'Job Card deleted successfully.')
         return redirect('service:job_card_list')
     
@@ -27,6 +27,12 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Setup mobile menu functionality
     setupMobileMenu();
+    
+    // Setup "Load more" buttons on paged lists
+    setupLoadMore();
+    
+    // Setup typeahead selects and search box suggestions
+    setupTypeahead();
 });
 
 /**
@@ -375,3 +381,140 @@ function setupMobileMenu() {
         }
     }
 }
+
+/**
+ * Append the next page of a keyset-paged list (scooters, parts) in place
+ * A [data-load-more] link points at the next page; with ?partial=1 the list
+ * view returns {html: rows, next_url: ...}. The link also loads by itself
+ * when it scrolls into view. Without JavaScript it opens the next page.
+ */
+function setupLoadMore() {
+    document.querySelectorAll('[data-load-more]').forEach(function(link) {
+        const rows = document.getElementById(link.dataset.rows);
+        const shown = document.getElementById(link.dataset.shown);
+        let loading = false;
+        
+        function loadMore() {
+            if (loading || !link.getAttribute('href')) {
+                return;
+            }
+            loading = true;
+            
+            const url = new URL(link.href, window.location.href);
+            url.searchParams.set('partial', '1');
+            fetch(url, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+                .then(response => response.json())
+                .then(data => {
+                    rows.insertAdjacentHTML('beforeend', data.html);
+                    if (shown) {
+                        shown.textContent = rows.querySelectorAll('tr').length;
+                    }
+                    if (data.next_url) {
+                        link.setAttribute('href', data.next_url);
+                    } else {
+                        link.removeAttribute('href');
+                        link.parentElement.remove();
+                    }
+                })
+                .catch(error => console.error('Error loading more rows:', error))
+                .finally(() => { loading = false; });
+        }
+        
+        link.addEventListener('click', function(e) {
+            e.preventDefault();
+            loadMore();
+        });
+        
+        // Infinite scroll
+        if ('IntersectionObserver' in window) {
+            new IntersectionObserver(function(entries) {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    loadMore();
+                }
+            }, {rootMargin: '200px'}).observe(link);
+        }
+    });
+}
+
+/**
+ * Select2 options for a typeahead select (rendered by utils.search.TypeaheadSelect)
+ * Matches come from the search API named in data-search-url, for the kind in
+ * data-typeahead, with the fixed filters in data-search-params plus any
+ * returned by extraParams() (read each time, e.g. the selected store).
+ */
+function typeaheadSelect2Options(select, extraParams) {
+    return {
+        theme: 'bootstrap-5',
+        width: '100%',
+        allowClear: true,
+        placeholder: select.dataset.placeholder || 'Type to search',
+        minimumInputLength: 2,
+        ajax: {
+            url: select.dataset.searchUrl,
+            dataType: 'json',
+            delay: 250,
+            data: function(params) {
+                const query = Object.fromEntries(new URLSearchParams(select.dataset.searchParams || ''));
+                return Object.assign(query, {type: select.dataset.typeahead, q: params.term}, extraParams ? extraParams() : {});
+            }
+        },
+        language: {
+            inputTooShort: function() {
+                return 'Type at least 2 characters to search';
+            },
+            noResults: function() {
+                return 'No matching results found - try a different search term';
+            }
+        }
+    };
+}
+
+/**
+ * Typeahead selects and search box suggestions, both from the search API
+ * - select[data-typeahead]: a Select2 box unless the page has already set one up
+ * - input[data-typeahead]: suggestions in a datalist as the user types
+ */
+function setupTypeahead() {
+    if (window.jQuery && jQuery.fn.select2) {
+        document.querySelectorAll('select[data-typeahead]:not(.select2-hidden-accessible)').forEach(function(select) {
+            $(select).select2(typeaheadSelect2Options(select));
+        });
+    }
+    
+    document.querySelectorAll('input[data-typeahead]').forEach(function(input) {
+        const datalist = document.createElement('datalist');
+        datalist.id = input.id + '-suggestions';
+        input.after(datalist);
+        input.setAttribute('list', datalist.id);
+        input.setAttribute('autocomplete', 'off');
+        
+        let timer = null;
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (query.length < 2) {
+                datalist.innerHTML = '';
+                return;
+            }
+            
+            // Wait for a pause in typing before asking the server
+            timer = setTimeout(function() {
+                const params = new URLSearchParams(input.dataset.searchParams || '');
+                params.set('type', input.dataset.typeahead);
+                params.set('q', query);
+                fetch(input.dataset.searchUrl + '?' + params)
+                    .then(response => response.json())
+                    .then(data => {
+                        datalist.innerHTML = '';
+                        (data.results || []).forEach(function(result) {
+                            const option = document.createElement('option');
+                            option.value = result.value;
+                            option.label = result.text;
+                            datalist.appendChild(option);
+                        });
+                    })
+                    .catch(error => console.error('Error fetching suggestions:', error));
+            }, 250);
+        });
+    });
+}
@@ -2,6 +2,8 @@
 Custom context processors for the users app.
 These make commonly used data available to all templates.
 """
+from .scope import get_request_store_scope
+
 
 def user_store(request):
     """
@@ -24,9 +26,10 @@ def user_store(request):
     if request.user.is_superuser:
         return context
     
-    # Check if user has a profile with an assigned store
-    if hasattr(request.user, 'profile') and request.user.profile.store:
-        context['user_store'] = request.user.profile.store
+    # Shares the store scope already resolved by StoreAccessMiddleware
+    scope = get_request_store_scope(request)
+    if scope.is_store_limited:
+        context['user_store'] = scope.store
         context['is_store_limited'] = True
     
     return context
\ No newline at end of file
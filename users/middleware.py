@@ -1,7 +1,7 @@
 from django.http import HttpResponseForbidden
 from django.conf import settings
-from django.urls import resolve
 from django.utils.deprecation import MiddlewareMixin
+from .scope import get_request_store_scope
 
 
 class StoreAccessMiddleware(MiddlewareMixin):
@@ -27,37 +27,35 @@ class StoreAccessMiddleware(MiddlewareMixin):
         if request.user.is_superuser:
             return None
             
-        # Get the URL pattern match to determine the app/view being accessed
-        resolver_match = resolve(request.path)
-        app_name = resolver_match.app_name
+        # Django has already resolved the URL for this view
+        app_name = request.resolver_match.app_name if request.resolver_match else ''
         
         # Some apps don't need store filtering
         if app_name in ['landing', 'dashboard', 'admin']:
             return None
         
-        # Check if staff user has an assigned store
-        try:
-            user_profile = request.user.profile
+        # Store scope is resolved once per request and shared with views and templates
+        scope = get_request_store_scope(request)
+        request.store_scope = scope
+        
+        # Users without an assigned store can see all stores
+        if not scope.is_store_limited:
+            return None
             
-            # Skip if staff and not assigned to any specific store (can see all)
-            if request.user.is_staff and user_profile.store is None:
-                return None
-                
-            # For GET requests, we'll filter in the view
-            if request.method == 'GET':
-                # Set the user's store ID in the request object for views to use
-                if user_profile.store:
-                    request.user_store_id = user_profile.store.id
-                return None
-                
-            # For POST, PUT, DELETE, check if trying to access data from another store
-            # This is a basic check that can be expanded upon for specific views
-            store_id = view_kwargs.get('store_id') or request.POST.get('store_id')
+        # For GET requests, we'll filter in the view
+        if request.method == 'GET':
+            # Set the user's store ID in the request object for views to use
+            request.user_store_id = scope.store_id
+            return None
             
-            if store_id and user_profile.store and int(store_id) != user_profile.store.id:
+        # For POST, PUT, DELETE, check if trying to access data from another store
+        # This is a basic check that can be expanded upon for specific views
+        store_id = view_kwargs.get('store_id') or request.POST.get('store_id')
+        
+        try:
+            if store_id and int(store_id) != scope.store_id:
                 return HttpResponseForbidden("You do not have permission to access data from this store.")
-                
-        except Exception as e:
+        except (TypeError, ValueError) as e:
             # Log error but don't break access (fail safe)
             if settings.DEBUG:
                 print(f"StoreAccessMiddleware error: {e}")
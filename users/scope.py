@@ -0,0 +1,101 @@
+"""
+Store scope
+
+The store a user is limited to, resolved once and shared by
+StoreAccessMiddleware, the user_store context processor and the
+store-scoped querysets (inventory.querysets). The scope is loaded with a
+single query (profile and store together), cached on the user object for
+the rest of the request and, for STORE_SCOPE_SESSION_TTL seconds, in the
+session so most requests need no query at all. A store reassignment therefore reaches a signed-in user
+within that TTL.
+"""
+import time
+from django.conf import settings
+from inventory.models import Store
+from .models import UserProfile
+
+SESSION_KEY = 'store_scope'
+
+
+class StoreScope:
+    """
+    Store a user may see, or None for access to every store
+    
+    Superusers, users without a profile and profiles without a store are
+    not limited; everyone else only sees their assigned store.
+    """
+    
+    def __init__(self, store=None):
+        self.store = store
+    
+    @property
+    def store_id(self):
+        return self.store.pk if self.store else None
+    
+    @property
+    def is_store_limited(self):
+        return self.store is not None
+
+
+def load_store_scope(user):
+    """Load a user's store scope from the database (one query)"""
+    if not user.is_authenticated or user.is_superuser:
+        return StoreScope()
+    
+    profile = UserProfile.objects.select_related('store').filter(user_id=user.pk).first()
+    if profile is None:
+        return StoreScope()
+    
+    # Keep the loaded profile so user.profile does not query again
+    user.profile = profile
+    return StoreScope(profile.store)
+
+
+def get_store_scope(user):
+    """A user's store scope, loaded once per user object"""
+    scope = getattr(user, '_store_scope', None)
+    if scope is None:
+        scope = load_store_scope(user)
+        user._store_scope = scope
+    return scope
+
+
+def _scope_from_session(request):
+    """The scope cached in the session, if it belongs to this user and is fresh"""
+    cached = request.session.get(SESSION_KEY)
+    ttl = getattr(settings, 'STORE_SCOPE_SESSION_TTL', 60)
+    if not cached or cached.get('user_id') != request.user.pk or time.time() - cached.get('loaded_at', 0) > ttl:
+        return None
+    
+    if cached['store_id'] is None:
+        return StoreScope()
+    # Only id and name are cached; other store fields load on first access
+    return StoreScope(Store.from_db(None, ['id', 'name'], [cached['store_id'], cached['store_name']]))
+
+
+def get_request_store_scope(request):
+    """
+    The current user's store scope, resolved at most once per request
+    
+    Returns:
+        StoreScope: Empty (no limit) for anonymous users and superusers
+    """
+    user = request.user
+    scope = getattr(user, '_store_scope', None)
+    if scope is not None:
+        return scope
+    
+    use_session = user.is_authenticated and hasattr(request, 'session') and getattr(settings, 'STORE_SCOPE_SESSION_TTL', 60) > 0
+    scope = _scope_from_session(request) if use_session else None
+    if scope is None:
+        scope = load_store_scope(user)
+        if use_session:
+            request.session[SESSION_KEY] = {
+                'user_id': user.pk,
+                'store_id': scope.store_id,
+                'store_name': scope.store.name if scope.store else '',
+                'loaded_at': time.time(),
+            }
+    
+    user._store_scope = scope
+    return scope
@@ -0,0 +1,51 @@
+"""
+Session engine with coalesced expiry writes (SESSION_ENGINE = 'users.sessions')
+
+With SESSION_SAVE_EVERY_REQUEST the idle timeout (SESSION_COOKIE_AGE) is
+pushed back on every request, which with the database backend is an UPDATE
+of django_session per request. This engine keeps sessions in the cache in
+front of the database (like 'cached_db') and, when a request changes
+nothing but the expiry, only refreshes the cache entry's timeout. The
+database row is rewritten when the session data changes or when its copy
+is more than SESSION_DB_REFRESH_INTERVAL seconds old.
+
+The cache entry therefore still expires exactly SESSION_COOKIE_AGE after
+the last request. The database expiry can only lag behind it, never run
+past it, so if the cache entry is lost a session ends at most
+SESSION_DB_REFRESH_INTERVAL seconds early. Several server processes need a
+shared cache (REDIS_URL) so they see each other's session changes.
+"""
+import time
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+# Unix time the database copy of the session was last written
+DB_SAVED_AT_KEY = '_session_db_saved_at'
+
+
+class SessionStore(CachedDBStore):
+    """cached_db session store that skips database writes that would only refresh the expiry"""
+    
+    def _refresh_interval(self):
+        # Never longer than half the session age, so the database row cannot expire while in use
+        interval = getattr(settings, 'SESSION_DB_REFRESH_INTERVAL', 60)
+        return min(interval, self.get_expiry_age() // 2)
+    
+    def _touch_cache(self):
+        """Refresh only the cache timeout; False if the database copy is due a rewrite"""
+        if self.session_key is None:
+            return False
+        
+        saved_at = self._get_session().get(DB_SAVED_AT_KEY)
+        if saved_at is None or time.time() - saved_at >= self._refresh_interval():
+            return False
+        
+        # touch() is False when the entry has been evicted, in which case it is written again
+        return self._cache.touch(self.cache_key, self.get_expiry_age())
+    
+    def save(self, must_create=False):
+        if not must_create and not self.modified and self._touch_cache():
+            return
+        
+        self._get_session(no_load=must_create)[DB_SAVED_AT_KEY] = int(time.time())
+        super().save(must_create=must_create)
@@ -4,6 +4,7 @@ from django.contrib.auth.models import User
 from django.contrib import messages
 from inventory.models import Store
 from .models import UserProfile
+from .scope import get_request_store_scope
 
 def is_admin(user):
     """Check if user is an admin/superuser"""
@@ -47,8 +48,10 @@ def assign_store(request, user_id):
 @login_required
 def current_user_store(request):
     """Display the current user's store assignment"""
-    if hasattr(request.user, 'profile') and request.user.profile.store:
-        store = request.user.profile.store
+    store_id = get_request_store_scope(request).store_id
+    if store_id:
+        # The scope may only hold the store's name, so load the full record for this page
+        store = get_object_or_404(Store, id=store_id)
         return render(request, 'users/user_store.html', {
             'store': store,
         })
@@ -1,13 +1,51 @@
 """Utility functions for exporting data to Excel with professional formatting"""
 import datetime
 import csv
-from django.http import HttpResponse
+import tempfile
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
 from io import BytesIO
 import openpyxl
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
 from openpyxl.utils import get_column_letter
 
-def export_to_excel(data, columns, filename, title=None, sheet_name=None, store_name=None, additional_info=None):
+# Rows fetched per database round trip when streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """Pseudo-buffer for csv.writer: write() returns the line instead of storing it"""
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, header, filename):
+    """
+    Stream rows as a CSV download without building the file in memory
+    
+    Args:
+        rows: Iterable of row sequences, ideally lazy (e.g. values_list(...).iterator())
+        header: List of column titles for the first row
+        filename: Name of the file to export (without extension)
+        
+    Returns:
+        StreamingHttpResponse that writes each row as it is produced
+    """
+    writer = csv.writer(_Echo())
+    
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+    
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+def export_to_excel(data, columns, filename, title=None, sheet_name=None, store_name=None, additional_info=None,
+                    streaming=False):
     """
     Export data to a professionally formatted Excel file
     
@@ -19,10 +57,15 @@ def export_to_excel(data, columns, filename, title=None, sheet_name=None, store_
         sheet_name: Name of the Excel sheet
         store_name: Store name for the report header
         additional_info: Dictionary of additional information to display
+        streaming: Use the constant-memory write-only engine (for large exports)
         
     Returns:
         HttpResponse object with Excel file
     """
+    if streaming:
+        return export_to_excel_streaming(data, columns, filename, title=title, sheet_name=sheet_name,
+                                         store_name=store_name, additional_info=additional_info)
+    
     # Create a new workbook and worksheet
     wb = openpyxl.Workbook()
     ws = wb.active
@@ -147,4 +190,245 @@ def export_to_excel(data, columns, filename, title=None, sheet_name=None, store_
     )
     response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
     
-    return response
\ No newline at end of file
+    return response
+
+
+# Rows sampled to size columns in write-only mode; openpyxl writes column
+# widths before the first row, so they cannot be measured over the whole export
+WIDTH_SAMPLE_ROWS = 1000
+
+# Column width limit, in characters
+MAX_COLUMN_WIDTH = 50
+
+
+def _format_value(value):
+    """Convert a value to what is written to a cell"""
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    elif isinstance(value, datetime.date):
+        return value.strftime('%Y-%m-%d')
+    elif value is None:
+        return ''
+    return value
+
+
+def _attribute_getter(col_name):
+    """Build a getter for a (possibly dotted) attribute path, splitting the path once"""
+    parts = col_name.split('.')
+    
+    def getter(obj):
+        value = obj
+        for part in parts:
+            value = getattr(value, part, None)
+            if value is None:
+                break
+        return value
+    
+    return getter
+
+
+def _values_list_fields(queryset, columns):
+    """
+    Map export columns to values_list() lookups so rows can be read without
+    model instances. Annotations are used as-is; columns that name nothing on
+    the model map to None (they export as blank cells). Returns None if any
+    column needs a model instance (properties, methods or related objects).
+    """
+    model = queryset.model
+    lookups = []
+    for col_name, _ in columns:
+        if col_name in queryset.query.annotations:
+            lookups.append(col_name)
+            continue
+        
+        parts = col_name.split('.')
+        current = model
+        for index, part in enumerate(parts):
+            try:
+                field = current._meta.get_field(part)
+            except FieldDoesNotExist:
+                if index == 0 and not hasattr(model, part):
+                    lookups.append(None)
+                    break
+                return None
+            
+            is_last = index == len(parts) - 1
+            if field.many_to_many or field.one_to_many:
+                return None
+            if field.is_relation:
+                if is_last:
+                    return None
+                current = field.related_model
+            elif not is_last:
+                return None
+        else:
+            lookups.append('__'.join(parts))
+    
+    return lookups
+
+
+def _iter_export_rows(data, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield one list of raw values per record, reading querysets in chunks"""
+    if isinstance(data, QuerySet):
+        lookups = _values_list_fields(data, columns)
+        if lookups is not None:
+            fields = [lookup for lookup in lookups if lookup]
+            for values in data.values_list(*fields).iterator(chunk_size=chunk_size):
+                values = iter(values)
+                yield [next(values) if lookup else '' for lookup in lookups]
+            return
+        data = data.iterator(chunk_size=chunk_size)
+    
+    getters = [_attribute_getter(col_name) for col_name, _ in columns]
+    for row_data in data:
+        yield [getter(row_data) for getter in getters]
+
+
+def _add_export_styles(wb):
+    """Register the shared named styles used by streaming exports"""
+    border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+    
+    wb.add_named_style(NamedStyle(
+        name='export_title',
+        font=Font(name='Arial', size=16, bold=True, color='FFFFFF'),
+        fill=PatternFill(start_color='2F75B5', end_color='2F75B5', fill_type='solid'),
+        alignment=Alignment(horizontal='center', vertical='center'),
+        border=border
+    ))
+    wb.add_named_style(NamedStyle(
+        name='export_info',
+        font=Font(name='Arial', size=10)
+    ))
+    wb.add_named_style(NamedStyle(
+        name='export_header',
+        font=Font(name='Arial', size=11, bold=True, color='FFFFFF'),
+        fill=PatternFill(start_color='4472C4', end_color='4472C4', fill_type='solid'),
+        alignment=Alignment(horizontal='center', vertical='center'),
+        border=border
+    ))
+    wb.add_named_style(NamedStyle(
+        name='export_data',
+        font=Font(name='Arial', size=10),
+        alignment=Alignment(horizontal='left', vertical='center'),
+        border=border
+    ))
+
+
+def write_excel(output, data, columns, title=None, sheet_name=None, store_name=None, additional_info=None):
+    """
+    Write data to an Excel file with bounded memory, for exports of any size
+    
+    Uses an openpyxl write-only worksheet with shared named styles, reads
+    querysets in chunks (via values_list when the columns allow it) and sizes
+    columns from the header and the first WIDTH_SAMPLE_ROWS rows. The title
+    row is not merged across columns.
+    
+    Args:
+        output: Path or binary file object to write the workbook to
+        data, columns, title, sheet_name, store_name, additional_info: As for export_to_excel
+        
+    Returns:
+        int: Number of data rows written
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name or "Report")
+    _add_export_styles(wb)
+    
+    def styled(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+    
+    header_rows = []
+    if title:
+        header_rows.append([styled(title, 'export_title')])
+        header_rows.append([])
+        header_rows.append([styled(f"Export Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 'export_info')])
+        if store_name:
+            header_rows.append([styled(f"Store: {store_name}", 'export_info')])
+        if additional_info:
+            for key, value in additional_info.items():
+                header_rows.append([styled(f"{key}: {value}", 'export_info')])
+        header_rows.append([])  # Empty row
+    
+    # Column widths start from the header titles and grow with the sampled rows
+    widths = [len(str(display_name)) for _, display_name in columns]
+    rows = _iter_export_rows(data, columns)
+    
+    sample = []
+    for row in rows:
+        row = [_format_value(value) for value in row]
+        for index, value in enumerate(row):
+            widths[index] = max(widths[index], len(str(value)))
+        sample.append(row)
+        if len(sample) >= WIDTH_SAMPLE_ROWS:
+            break
+    
+    for index, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(index)].width = min(width + 2, MAX_COLUMN_WIDTH)
+    
+    for header_row in header_rows:
+        ws.append(header_row)
+    ws.append([styled(display_name, 'export_header') for _, display_name in columns])
+    
+    row_count = len(sample)
+    for row in sample:
+        ws.append([styled(value, 'export_data') for value in row])
+    del sample
+    
+    for row in rows:
+        ws.append([styled(_format_value(value), 'export_data') for value in row])
+        row_count += 1
+    
+    wb.save(output)
+    return row_count
+
+
+def write_csv(output, data, columns):
+    """
+    Write data to a CSV file, reading querysets in chunks
+    
+    Args:
+        output: Text file object to write to
+        data: QuerySet or list of model objects
+        columns: List of tuples (column_name, display_name)
+        
+    Returns:
+        int: Number of data rows written
+    """
+    writer = csv.writer(output)
+    writer.writerow([display_name for _, display_name in columns])
+    
+    row_count = 0
+    for row in _iter_export_rows(data, columns):
+        writer.writerow([_format_value(value) for value in row])
+        row_count += 1
+    return row_count
+
+
+def export_to_excel_streaming(data, columns, filename, title=None, sheet_name=None, store_name=None,
+                              additional_info=None):
+    """
+    Export data to Excel with bounded memory (see write_excel), streaming the
+    finished file from a temporary file. Takes the same arguments as export_to_excel.
+    
+    Returns:
+        FileResponse streaming the Excel file
+    """
+    # Spool to disk and stream it; the temporary file is removed when the response closes it
+    output = tempfile.TemporaryFile()
+    write_excel(output, data, columns, title=title, sheet_name=sheet_name, store_name=store_name,
+                additional_info=additional_info)
+    output.seek(0)
+    
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"{filename}.xlsx",
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
@@ -3,7 +3,7 @@ Notification utilities for sending alerts via email
 """
 import os
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import send_mail, get_connection, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.contrib.auth.models import User
 
@@ -216,4 +216,99 @@ def send_critical_inventory_alert(alert, phone_numbers=None):
         sms_result = send_sms_notification(phone, sms_message)
         sms_sent = sms_sent or sms_result
     
-    return email_sent, sms_sent
\ No newline at end of file
+    return email_sent, sms_sent
+
+
+def send_scheduled_report_emails(deliveries):
+    """
+    Email generated scheduled reports to their recipients in one batch
+    
+    All messages are sent over a single SendGrid client or mail connection
+    rather than one connection per report.
+    
+    Args:
+        deliveries: List of (SavedReport, [email addresses]) tuples
+    
+    Returns:
+        int: Number of messages sent
+    """
+    site_url = settings.SITE_URL if hasattr(settings, 'SITE_URL') else 'http://localhost:8000'
+    
+    messages = []
+    for report, recipients in deliveries:
+        if not recipients:
+            continue
+        
+        summary = report.report_data.get('summary', {})
+        summary_lines = "\n".join(f"    {key.replace('_', ' ').title()}: {value}" for key, value in summary.items())
+        
+        subject = f"Scheduled Report: {report.title}"
+        text_content = f"""
+    SCHEDULED REPORT: {report.title}
+    
+    Period: {report.report_data.get('start_date')} to {report.report_data.get('end_date')}
+    
+{summary_lines}
+    
+    Generated: {report.date_generated}
+    {site_url}
+    """
+        messages.append((subject, text_content, recipients))
+    
+    # Log the batch in any case, even if we can't send emails
+    print(f"SCHEDULED REPORTS: sending {len(messages)} report emails")
+    
+    if not messages:
+        return 0
+    
+    sent = 0
+    
+    # Use SendGrid if available; messages it did not accept go through Django's mail backend
+    if USE_SENDGRID:
+        unsent = list(messages)
+        rejected = []
+        try:
+            sg = SendGridAPIClient(os.environ.get('SENDGRID_API_KEY'))
+            
+            while unsent:
+                subject, text_content, recipients = unsent[0]
+                message = Mail(
+                    from_email=Email(settings.DEFAULT_FROM_EMAIL),
+                    to_emails=[To(recipient) for recipient in recipients],
+                    subject=subject,
+                    plain_text_content=text_content
+                )
+                
+                response = sg.send(message)
+                unsent.pop(0)
+                if response.status_code in [200, 201, 202]:
+                    sent += 1
+                else:
+                    print(f"SendGrid error: {response.status_code}")
+                    rejected.append((subject, text_content, recipients))
+            
+        except Exception as e:
+            print(f"SendGrid error: {e}")
+        
+        # Only the messages SendGrid did not send are retried below
+        messages = rejected + unsent
+        if not messages:
+            return sent
+    
+    try:
+        # One connection for the whole batch
+        connection = get_connection(fail_silently=False)
+        return sent + (connection.send_messages([
+            EmailMultiAlternatives(
+                subject=subject,
+                body=text_content,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=recipients,
+                connection=connection
+            )
+            for subject, text_content, recipients in messages
+        ]) or 0)
+        
+    except Exception as e:
+        print(f"Email error: {e}")
+        return sent
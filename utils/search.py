@@ -0,0 +1,198 @@
+"""
+Search for parts, scooters and customers
+
+One engine behind the list page searches, the typeahead API
+(dashboard:search_api) and the typeahead selects on the job card and
+rental forms. A query is split into words and every word has to appear in
+one of the entity's searched columns. Ranked results put an exact match on
+an identifier (part number, VIN, licence number, email, ...) first, then
+identifiers starting with the query, then the other matches, each group in
+the entity's usual order.
+
+On PostgreSQL every searched column has a trigram index (see
+utils.trigram), so the substring and prefix lookups used here are index
+scans; other databases run the same lookups without one.
+"""
+from django import forms
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.urls import reverse
+from inventory.models import Parts, Scooter
+from customers.models import Customer
+
+# Shortest query the typeahead searches for; shorter ones match too much to be useful
+TYPEAHEAD_MIN_LENGTH = 2
+# Most results a typeahead request returns
+TYPEAHEAD_MAX_RESULTS = 50
+
+
+class SearchSpec:
+    """
+    How one kind of record is searched
+    
+    Args:
+        model: Model searched
+        fields: Columns a query word may appear in
+        key_fields: Identifier columns exact and prefix matches rank on
+        ordering: Order within a rank
+        describe: obj -> dict with 'text' (typeahead label), 'value' (what a
+            list search box is filled with) and any extra data for the page
+        store_scoped: Limit results to the user's store scope (model.objects.for_user)
+    """
+    
+    def __init__(self, model, fields, key_fields, ordering, describe, store_scoped=False):
+        self.model = model
+        self.fields = fields
+        self.key_fields = key_fields
+        self.ordering = ordering
+        self.describe = describe
+        self.store_scoped = store_scoped
+    
+    def filter(self, query):
+        """Q matching rows where every word of the query appears in a searched column"""
+        return Q(*(
+            Q(*((f'{field}__icontains', word) for field in self.fields), _connector=Q.OR)
+            for word in query.split()
+        ))
+    
+    def rank(self, query):
+        """0 for an exact identifier match, 1 for an identifier prefix match, 2 otherwise"""
+        return Case(
+            When(Q(*((f'{field}__iexact', query) for field in self.key_fields), _connector=Q.OR), then=Value(0)),
+            When(Q(*((f'{field}__istartswith', query) for field in self.key_fields), _connector=Q.OR), then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+
+
+def _describe_part(part):
+    return {
+        'text': f"{part.part_number} - {part.name} ({part.current_stock} in stock)",
+        'value': part.part_number,
+        'unit_price': float(part.unit_price),
+        'current_stock': float(part.current_stock),
+        'store_id': part.store_id,
+    }
+
+
+def _describe_scooter(scooter):
+    return {
+        'text': f"{scooter.license_number} - {scooter}" if scooter.license_number else str(scooter),
+        'value': scooter.vin,
+        'status': scooter.status,
+        'category': scooter.category,
+        'store_id': scooter.store_id,
+    }
+
+
+def _describe_customer(customer):
+    return {
+        'text': f"{customer.first_name} {customer.last_name} ({customer.email})",
+        'value': f"{customer.first_name} {customer.last_name}",
+    }
+
+
+SEARCHES = {
+    'parts': SearchSpec(Parts, ['part_number', 'name'], ['part_number'], ['part_number', 'pk'],
+                        _describe_part, store_scoped=True),
+    'scooters': SearchSpec(Scooter, ['vin', 'license_number'], ['vin', 'license_number'], ['vin'],
+                           _describe_scooter, store_scoped=True),
+    'customers': SearchSpec(Customer, ['first_name', 'last_name', 'email', 'phone', 'driver_license'],
+                            ['email', 'phone', 'driver_license', 'first_name', 'last_name'], ['last_name', 'first_name', 'pk'],
+                            _describe_customer),
+}
+
+
+def search_filter(kind, query):
+    """Q for the list pages' search boxes (unranked; the list keeps its own order)"""
+    return SEARCHES[kind].filter(query)
+
+
+def search(kind, query, queryset=None):
+    """
+    Ranked search
+    
+    Args:
+        kind: 'parts', 'scooters' or 'customers'
+        query: Search text
+        queryset: Queryset to search in (default: every row of the model)
+    
+    Returns:
+        Queryset ordered by rank, then the entity's usual order
+    """
+    spec = SEARCHES[kind]
+    if queryset is None:
+        queryset = spec.model.objects.all()
+    
+    query = query.strip()
+    if not query:
+        return queryset.order_by(*spec.ordering)
+    
+    return queryset.filter(spec.filter(query)).alias(search_rank=spec.rank(query)).order_by('search_rank', *spec.ordering)
+
+
+def typeahead(kind, query, user, filters=None, limit=10):
+    """
+    Typeahead results for the search API
+    
+    Args:
+        kind: 'parts', 'scooters' or 'customers'
+        query: What has been typed so far
+        user: Requesting user; parts and scooters are limited to their store scope
+        filters: Extra queryset filters (already validated by the caller)
+        limit: Most results returned
+    
+    Returns:
+        List of dicts with 'id', 'text', 'value' and the kind's extra data
+    """
+    spec = SEARCHES[kind]
+    query = query.strip()
+    if len(query) < TYPEAHEAD_MIN_LENGTH:
+        return []
+    
+    queryset = spec.model.objects.for_user(user) if spec.store_scoped else spec.model.objects.all()
+    if filters:
+        queryset = queryset.filter(**filters)
+    
+    return [
+        {'id': obj.pk, **spec.describe(obj)}
+        for obj in search(kind, query, queryset)[:min(limit, TYPEAHEAD_MAX_RESULTS)]
+    ]
+
+
+class TypeaheadSelect(forms.Select):
+    """
+    Select for a model choice that is looked up with the search API
+    
+    Only the selected option is rendered (one query instead of every row of
+    the field's queryset); main.js turns the select into a Select2 box that
+    asks dashboard:search_api for matches as the user types. The field's
+    queryset still validates the submitted choice.
+    """
+    
+    def __init__(self, kind, attrs=None):
+        super().__init__(attrs)
+        self.kind = kind
+    
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs'].update({
+            'data-typeahead': self.kind,
+            'data-search-url': reverse('dashboard:search_api'),
+        })
+        return context
+    
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        if not hasattr(choices, 'queryset'):
+            return super().optgroups(name, value, attrs)
+        
+        # The empty option and the selected rows only
+        selected = [pk for pk in value if str(pk).isdigit()]
+        options = [('', choices.field.empty_label or '')] if choices.field.empty_label is not None else []
+        options += [choices.choice(obj) for obj in choices.queryset.filter(pk__in=selected)] if selected else []
+        
+        self.choices = options
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
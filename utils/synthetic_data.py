@@ -0,0 +1,477 @@
+"""
+Synthetic dataset generator for load and performance checks
+
+Creates stores, staff, suppliers, parts, scooters, customers (with payment
+methods), rentals (with payments), job cards (with parts used), purchases
+(with items), stock transfers and inventory alerts. Rows are generated
+lazily and inserted with bulk_create one batch at a time, so only ids are
+kept in memory and millions of rows can be created in minutes.
+
+Everything is drawn from a random.Random seeded by the caller, so the same
+volumes, seed and reference time always produce the same rows. Every unique
+value starts with the prefix, so a dataset can be added to a database that
+already has data (once per prefix).
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate, islice
+from django.contrib.auth.models import User
+from django.utils import timezone
+from inventory.models import (Store, Supplier, Scooter, Parts, Purchase, PurchaseItem, StockTransfer,
+                              InventoryAlert, StockMovement)
+from customers.models import Customer, Rental, PaymentMethod, Payment
+from service.models import JobCard, JobCardItem
+from users.models import UserProfile
+
+# Rows per INSERT
+BATCH_SIZE = 1000
+
+# Default volumes: a few stores with thousands of scooters, parts and rentals
+DEFAULT_VOLUMES = {
+    'stores': 5,
+    'suppliers': 20,
+    'parts_per_store': 400,
+    'scooters': 2000,
+    'customers': 2000,
+    'rentals': 5000,
+    'job_cards': 2000,
+    'purchases': 500,
+    'transfers': 500,
+    'alerts': 500,
+    'history_days': 365,
+}
+
+# Relative rental demand per month (southern hemisphere: busiest over the December holidays)
+MONTH_WEIGHTS = [1.6, 1.3, 1.1, 1.0, 0.7, 0.6, 0.6, 0.7, 0.9, 1.1, 1.3, 1.8]
+WEEKEND_WEIGHT = 1.4
+
+PART_CATEGORIES = ['Engine', 'Brakes', 'Electrical', 'Body', 'Tyres', 'Suspension', 'Transmission', 'Accessories']
+SCOOTER_MODELS = {
+    'A': ('Sym', 'Orbit 125'),
+    'B': ('Sym', 'Jet 14 200'),
+    'C': ('Sym', 'Citycom 300'),
+    'D': ('Vespa', 'GTS 300'),
+}
+FIRST_NAMES = ['Thabo', 'Lerato', 'Sipho', 'Anele', 'Johan', 'Pieter', 'Ayesha', 'Naledi', 'Kagiso', 'Zanele', 'Michael', 'Sarah']
+LAST_NAMES = ['Nkosi', 'Dlamini', 'Botha', 'van Wyk', 'Naidoo', 'Mokoena', 'Smith', 'Pillay', 'Khumalo', 'Jacobs']
+CITIES = ['Cape Town', 'Johannesburg', 'Durban', 'Pretoria', 'Port Elizabeth', 'Stellenbosch']
+
+
+def _batches(rows, batch_size):
+    """Split an iterable of rows into lists of at most batch_size"""
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+def _bulk_create(model, rows, batch_size):
+    """
+    bulk_create that keeps the timestamps set on the rows
+    
+    bulk_create always stamps auto_now/auto_now_add fields with the current
+    time, so the values set on the rows are written back with one bulk_update
+    per batch (rows left without a value keep the current time).
+    
+    Returns:
+        list: The created rows (with pks)
+    """
+    fields = [
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    created = []
+    for batch in _batches(rows, batch_size):
+        timestamps = [[getattr(row, name) for name in fields] for row in batch]
+        model.objects.bulk_create(batch)
+        if fields:
+            for row, values in zip(batch, timestamps):
+                for name, value in zip(fields, values):
+                    if value is not None:
+                        setattr(row, name, value)
+            model.objects.bulk_update(batch, fields)
+        created.extend(batch)
+    return created
+
+
+def _insert(model, rows, batch_size):
+    """Insert an iterable of rows batch by batch, yielding each created batch (with pks)"""
+    for batch in _batches(rows, batch_size):
+        yield _bulk_create(model, batch, batch_size)
+
+
+class DatasetGenerator:
+    """
+    Generates one synthetic dataset
+    
+    Each step inserts one kind of row and keeps only what later steps need
+    (ids, stores, prices) so memory stays flat as volumes grow.
+    """
+    
+    def __init__(self, volumes=None, seed=1, prefix='LD', batch_size=BATCH_SIZE, now=None, progress=None):
+        """
+        Args:
+            volumes: Dict overriding any of DEFAULT_VOLUMES
+            seed: Random seed; the same seed and volumes give the same data
+            prefix: Prefix for unique values (names, numbers, emails)
+            batch_size: Rows per INSERT
+            now: Reference time that history runs up to (default: timezone.now())
+            progress: Optional function(step, rows) called after each step
+        """
+        self.volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.now = now or timezone.now()
+        self.history_seconds = max(self.volumes['history_days'] * 86400, 1)
+        self.history_start = self.now - timedelta(seconds=self.history_seconds)
+        self.progress = progress
+        self.counts = {}
+    
+    def _count(self, step, rows):
+        self.counts[step] = self.counts.get(step, 0) + rows
+    
+    def past_moment(self, days_back=None):
+        """Random time within the history window (or the last days_back days)"""
+        span = days_back * 86400 if days_back else self.history_seconds
+        return self.now - timedelta(seconds=self.rng.randrange(span))
+    
+    def busy_moment(self):
+        """Random time in the history window, weighted by season and weekday like rental demand"""
+        peak = max(MONTH_WEIGHTS) * WEEKEND_WEIGHT
+        while True:
+            moment = self.past_moment()
+            weight = MONTH_WEIGHTS[moment.month - 1] * (WEEKEND_WEIGHT if moment.weekday() >= 5 else 1)
+            if self.rng.random() * peak < weight:
+                return moment
+    
+    def generate(self):
+        """
+        Generate the whole dataset
+        
+        Returns:
+            dict: Step name -> number of rows created
+        """
+        steps = [
+            ('stores', self.create_stores),
+            ('suppliers', self.create_suppliers),
+            ('parts', self.create_parts),
+            ('scooters', self.create_scooters),
+            ('customers', self.create_customers),
+            ('rentals', self.create_rentals),
+            ('job_cards', self.create_job_cards),
+            ('purchases', self.create_purchases),
+            ('transfers', self.create_transfers),
+            ('alerts', self.create_alerts),
+        ]
+        for name, step in steps:
+            step()
+            if self.progress:
+                self.progress(name, self.counts.get(name, 0))
+        return self.counts
+    
+    def create_stores(self):
+        """Stores and one staff member per store (profiles are created here, not by the signal)"""
+        prefix = self.prefix.lower()
+        stores = _bulk_create(Store, [
+            Store(
+                name=f'{self.prefix} Store {i + 1}', location=f'{i + 1} Main Road', contact_person=f'Manager {i + 1}',
+                phone=f'021555{i:04d}', email=f'{prefix}-store{i + 1}@example.com', date_created=self.history_start
+            )
+            for i in range(self.volumes['stores'])
+        ], self.batch_size)
+        self.store_ids = [store.pk for store in stores]
+        self._count('stores', len(stores))
+        
+        staff = User.objects.bulk_create([
+            User(username=f'{prefix}-staff{i + 1}', email=f'{prefix}-staff{i + 1}@example.com',
+                 is_staff=True, date_joined=self.history_start)
+            for i in range(len(stores))
+        ], batch_size=self.batch_size)
+        _bulk_create(UserProfile, [
+            UserProfile(user=user, store_id=store_id, position='Technician', date_updated=self.now)
+            for user, store_id in zip(staff, self.store_ids)
+        ], self.batch_size)
+        self.staff_by_store = {store_id: user.pk for store_id, user in zip(self.store_ids, staff)}
+        self._count('staff', len(staff))
+    
+    def create_suppliers(self):
+        suppliers = _bulk_create(Supplier, [
+            Supplier(
+                name=f'{self.prefix} Supplier {i + 1}', address=f'{i + 1} Industrial Road', contact_person=f'Rep {i + 1}',
+                phone=f'011555{i:04d}', email=f'{self.prefix.lower()}-supplier{i + 1}@example.com',
+                payment_terms='30 days', date_created=self.history_start, date_updated=self.history_start
+            )
+            for i in range(self.volumes['suppliers'])
+        ], self.batch_size)
+        self.supplier_ids = [supplier.pk for supplier in suppliers]
+        self._count('suppliers', len(suppliers))
+    
+    def create_parts(self):
+        """The same catalogue in every store, roughly one in ten parts at or below its reorder level"""
+        rng = self.rng
+        catalogue = [
+            (f'{self.prefix}-P{n:06d}', f'{rng.choice(PART_CATEGORIES)} part {n}', rng.choice(PART_CATEGORIES),
+             Decimal(rng.randint(500, 250000)) / 100)
+            for n in range(self.volumes['parts_per_store'])
+        ]
+        
+        def rows():
+            for store_id in self.store_ids:
+                for part_number, name, category, unit_price in catalogue:
+                    reorder_level = Decimal(rng.randint(2, 20))
+                    if rng.random() < 0.1:
+                        current_stock = Decimal(rng.randint(0, int(reorder_level)))
+                    else:
+                        current_stock = reorder_level + rng.randint(1, 200)
+                    yield Parts(
+                        part_number=part_number, name=name, store_id=store_id, category=category,
+                        current_stock=current_stock, reorder_level=reorder_level, unit_price=unit_price,
+                        location_in_store=f'Shelf {rng.randint(1, 40)}',
+                        date_created=self.history_start, date_updated=self.now
+                    )
+        
+        # (pk, unit price) per store, and the low stock parts for alerts
+        self.parts_by_store = {store_id: [] for store_id in self.store_ids}
+        self.low_stock_parts = []
+        for batch in _insert(Parts, rows(), self.batch_size):
+            for part in batch:
+                self.parts_by_store[part.store_id].append((part.pk, part.unit_price))
+                if part.current_stock <= part.reorder_level:
+                    self.low_stock_parts.append(part)
+            
+            # Opening balances, so the stock ledger agrees with current_stock
+            _bulk_create(StockMovement, [
+                StockMovement(part_id=part.pk, quantity=part.current_stock, balance_after=part.current_stock,
+                              reason='opening', date_created=self.history_start)
+                for part in batch if part.current_stock
+            ], self.batch_size)
+            self._count('parts', len(batch))
+    
+    def create_scooters(self):
+        """Mostly category A, mostly available, some rented/in maintenance, a few damaged/retired"""
+        rng = self.rng
+        
+        def rows():
+            for n in range(self.volumes['scooters']):
+                category = rng.choices('ABCD', weights=[5, 3, 2, 1])[0]
+                make, model = SCOOTER_MODELS[category]
+                yield Scooter(
+                    vin=f'{self.prefix}-VIN{n:08d}', license_number=f'{self.prefix}-L{n:07d}', make=make, model=model,
+                    year=rng.randint(2016, self.now.year), color=rng.choice(['Red', 'Black', 'White', 'Blue', 'Silver']),
+                    status=rng.choices(['available', 'rented', 'maintenance', 'damaged', 'retired'], weights=[60, 25, 10, 3, 2])[0],
+                    category=category, hourly_rate=Decimal(rng.randint(40, 120)), daily_rate=Decimal(rng.randint(150, 450)),
+                    store_id=rng.choice(self.store_ids),
+                    purchase_date=(self.history_start - timedelta(days=rng.randint(0, 1500))).date(),
+                    purchase_price=Decimal(rng.randint(15000, 90000)), mileage=rng.randint(0, 40000),
+                    last_maintenance=(self.now - timedelta(days=rng.randint(1, 200))).date() if rng.random() < 0.8 else None,
+                    date_created=self.history_start, date_updated=self.now
+                )
+        
+        # (pk, store, mileage) for rentals and job cards
+        self.scooters = []
+        for batch in _insert(Scooter, rows(), self.batch_size):
+            self.scooters.extend((scooter.pk, scooter.store_id, scooter.mileage) for scooter in batch)
+            self._count('scooters', len(batch))
+    
+    def create_customers(self):
+        """Customers joining over the history window; most have a saved payment method"""
+        rng = self.rng
+        prefix = self.prefix.lower()
+        
+        def rows():
+            for n in range(self.volumes['customers']):
+                yield Customer(
+                    first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                    email=f'{prefix}-customer{n}@example.com', phone=f'+27{rng.randint(600000000, 899999999)}',
+                    address=f'{rng.randint(1, 999)} Long Street', city=rng.choice(CITIES), state='Western Cape',
+                    postal_code=f'{rng.randint(1000, 9999)}', country='South Africa', driver_license=f'{self.prefix}-DL{n:08d}',
+                    date_of_birth=(self.now - timedelta(days=rng.randint(18 * 365, 70 * 365))).date(),
+                    date_created=self.past_moment(), date_updated=self.now
+                )
+        
+        self.customer_ids = []
+        self.payment_method_by_customer = {}
+        for batch in _insert(Customer, rows(), self.batch_size):
+            self.customer_ids.extend(customer.pk for customer in batch)
+            self._count('customers', len(batch))
+            
+            methods = _bulk_create(PaymentMethod, [
+                PaymentMethod(
+                    customer_id=customer.pk, payment_type=rng.choices(['credit_card', 'debit_card', 'cash'], weights=[6, 3, 1])[0],
+                    card_number=f'{rng.randint(0, 9999):04d}', card_holder_name=f'{customer.first_name} {customer.last_name}',
+                    expiry_date=f'{rng.randint(1, 12):02d}/{self.now.year + rng.randint(1, 4)}', is_default=True,
+                    date_created=customer.date_created, date_updated=customer.date_created
+                )
+                for customer in batch if rng.random() < 0.7
+            ], self.batch_size)
+            self.payment_method_by_customer.update((method.customer_id, method.pk) for method in methods)
+            self._count('payment_methods', len(methods))
+        
+        # A few customers rent often: choice weight falls off with rank (1, 1/2, 1/3, ...)
+        self.customer_cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(self.customer_ids))))
+    
+    def create_rentals(self):
+        """Rentals spread over the history by season, most completed and paid"""
+        rng = self.rng
+        customer_picks = iter(())
+        
+        def rows():
+            nonlocal customer_picks
+            for n in range(self.volumes['rentals']):
+                if n % self.batch_size == 0:
+                    customer_picks = iter(rng.choices(
+                        self.customer_ids, cum_weights=self.customer_cum_weights, k=self.batch_size
+                    ))
+                scooter_id, store_id, mileage = rng.choice(self.scooters)
+                start = self.busy_moment()
+                expected_end = start + timedelta(days=rng.randint(1, 14), hours=rng.randint(0, 8))
+                rate = Decimal(rng.randint(150, 450))
+                if expected_end > self.now:
+                    status, end = 'active', None
+                else:
+                    status = rng.choices(['completed', 'cancelled', 'overdue'], weights=[90, 5, 5])[0]
+                    end = expected_end + timedelta(hours=rng.randint(-12, 24)) if status == 'completed' else None
+                days = max(((end or expected_end) - start).days, 1)
+                yield Rental(
+                    rental_number=f'{self.prefix}-R{n:08d}', customer_id=next(customer_picks), scooter_id=scooter_id,
+                    start_date=start, expected_end_date=expected_end, end_date=end, rate_type='daily',
+                    rate_amount=rate, status=status, deposit_amount=Decimal(500), deposit_returned=status == 'completed',
+                    total_amount=rate * days if status == 'completed' else None, mileage_start=mileage,
+                    mileage_end=mileage + rng.randint(20, 80) * days if end else None,
+                    created_by_id=self.staff_by_store[store_id], date_created=start, date_updated=end or start
+                )
+        
+        for batch in _insert(Rental, rows(), self.batch_size):
+            self._count('rentals', len(batch))
+            
+            # Completed rentals are paid on return (a few payments failed or were refunded)
+            payments = _bulk_create(Payment, [
+                Payment(
+                    rental_id=rental.pk, payment_method_id=self.payment_method_by_customer.get(rental.customer_id),
+                    amount=rental.total_amount, payment_date=rental.end_date,
+                    status=rng.choices(['completed', 'failed', 'refunded'], weights=[95, 3, 2])[0],
+                    transaction_id=f'{self.prefix}-TX{rental.pk}', date_created=rental.end_date, date_updated=rental.end_date
+                )
+                for rental in batch if rental.status == 'completed'
+            ], self.batch_size)
+            self._count('payments', len(payments))
+    
+    def create_job_cards(self):
+        """Job cards by the scooter's store technician, each using one to four of the store's parts"""
+        rng = self.rng
+        
+        def rows():
+            for n in range(self.volumes['job_cards']):
+                scooter_id, store_id, mileage = rng.choice(self.scooters)
+                created = self.past_moment()
+                status = rng.choices(['pending', 'in_progress', 'on_hold', 'completed', 'cancelled'], weights=[3, 3, 1, 88, 5])[0]
+                if status in ('pending', 'in_progress', 'on_hold'):
+                    created = self.past_moment(days_back=30)
+                yield JobCard(
+                    job_card_number=f'{self.prefix}-JC{n:08d}', scooter_id=scooter_id, store_id=store_id, status=status,
+                    priority=rng.choices(['low', 'medium', 'high', 'urgent'], weights=[3, 5, 2, 1])[0],
+                    description='Routine service', technician_id=self.staff_by_store[store_id], mileage=mileage,
+                    estimated_completion=(created + timedelta(days=rng.randint(1, 7))).date(),
+                    actual_completion=(created + timedelta(days=rng.randint(1, 10))).date() if status == 'completed' else None,
+                    labor_hours=Decimal(rng.randint(1, 16)) / 2, labor_rate=Decimal(350),
+                    date_created=created, date_updated=created
+                )
+        
+        for batch in _insert(JobCard, rows(), self.batch_size):
+            self._count('job_cards', len(batch))
+            
+            items = []
+            for job_card in batch:
+                store_parts = self.parts_by_store[job_card.store_id]
+                for part_id, unit_price in rng.sample(store_parts, k=min(rng.randint(1, 4), len(store_parts))):
+                    quantity = Decimal(rng.randint(1, 3))
+                    items.append(JobCardItem(
+                        job_card_id=job_card.pk, part_id=part_id, quantity=quantity, unit_price=unit_price,
+                        total_price=quantity * unit_price, date_added=job_card.date_created
+                    ))
+            _bulk_create(JobCardItem, items, self.batch_size)
+            self._count('job_card_items', len(items))
+    
+    def create_purchases(self):
+        """Supplier invoices for one to five of a store's parts, older ones paid"""
+        rng = self.rng
+        purchase_items = {}
+        
+        def rows():
+            for n in range(self.volumes['purchases'] if self.supplier_ids else 0):
+                store_id = rng.choice(self.store_ids)
+                store_parts = self.parts_by_store[store_id]
+                invoice_date = self.past_moment().date()
+                items = [
+                    (part_id, Decimal(rng.randint(1, 50)), unit_price)
+                    for part_id, unit_price in rng.sample(store_parts, k=min(rng.randint(1, 5), len(store_parts)))
+                ]
+                total = sum(quantity * unit_price for _, quantity, unit_price in items)
+                status = 'paid' if invoice_date < (self.now - timedelta(days=60)).date() else rng.choice(['pending', 'partial', 'paid'])
+                purchase_items[n] = items
+                yield Purchase(
+                    invoice_number=f'{self.prefix}-INV{n:08d}', supplier_id=rng.choice(self.supplier_ids), store_id=store_id,
+                    invoice_date=invoice_date, due_date=invoice_date + timedelta(days=30), status=status, total_amount=total,
+                    amount_paid=total if status == 'paid' else (total / 2 if status == 'partial' else 0),
+                    created_by_id=self.staff_by_store[store_id], date_created=self.now, date_updated=self.now
+                )
+        
+        created = 0
+        for batch in _insert(Purchase, rows(), self.batch_size):
+            _bulk_create(PurchaseItem, [
+                PurchaseItem(purchase_id=purchase.pk, store_id=purchase.store_id, part_id=part_id,
+                             description='Stock replenishment', quantity=quantity, unit_price=unit_price)
+                for n, purchase in enumerate(batch, start=created)
+                for part_id, quantity, unit_price in purchase_items.pop(n)
+            ], self.batch_size)
+            created += len(batch)
+            self._count('purchases', len(batch))
+    
+    def create_transfers(self):
+        rng = self.rng
+        
+        def rows():
+            for n in range(self.volumes['transfers'] if len(self.store_ids) > 1 else 0):
+                source_id, destination_id = rng.sample(self.store_ids, 2)
+                part_id, _ = rng.choice(self.parts_by_store[source_id])
+                created = self.past_moment()
+                yield StockTransfer(
+                    transfer_number=f'{self.prefix}-T{n:08d}', source_store_id=source_id, destination_store_id=destination_id,
+                    part_id=part_id, quantity=Decimal(rng.randint(1, 10)), transfer_date=created.date(),
+                    status=rng.choices(['pending', 'in_transit', 'completed', 'cancelled'], weights=[5, 5, 85, 5])[0],
+                    created_by_id=self.staff_by_store[source_id], date_created=created, date_updated=created
+                )
+        
+        for batch in _insert(StockTransfer, rows(), self.batch_size):
+            self._count('transfers', len(batch))
+    
+    def create_alerts(self):
+        """Low stock alerts, most of them already dealt with"""
+        rng = self.rng
+        parts = rng.sample(self.low_stock_parts, k=min(self.volumes['alerts'], len(self.low_stock_parts)))
+        
+        def rows():
+            for part in parts:
+                created = self.past_moment(days_back=90)
+                yield InventoryAlert(
+                    alert_type='low_stock', title=f'Low Stock: {part.name}',
+                    description=f'Part #{part.part_number} is low on stock.',
+                    severity='critical' if part.current_stock == 0 else 'medium',
+                    status=rng.choices(['new', 'acknowledged', 'resolved', 'dismissed'], weights=[30, 20, 40, 10])[0],
+                    part_id=part.pk, store_id=part.store_id, threshold_value=part.reorder_level,
+                    current_value=part.current_stock, date_created=created, date_updated=created
+                )
+        
+        for batch in _insert(InventoryAlert, rows(), self.batch_size):
+            self._count('alerts', len(batch))
+
+
+def generate_dataset(volumes=None, seed=1, prefix='LD', batch_size=BATCH_SIZE, now=None, progress=None):
+    """
+    Generate a synthetic dataset (see DatasetGenerator)
+    
+    Returns:
+        dict: Step name -> number of rows created
+    """
+    return DatasetGenerator(volumes, seed=seed, prefix=prefix, batch_size=batch_size, now=now, progress=progress).generate()
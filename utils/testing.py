@@ -0,0 +1,87 @@
+"""
+View performance budgets for the apps' test suites
+
+ViewBudgetTestCase seeds a small deterministic synthetic dataset
+(utils.synthetic_data) once per test class and checks a view's exact query
+count with assertNumQueries and its response time against a budget. Query
+counts do not depend on the number of rows, so an N+1 loop fails at any
+volume. Each budget is the number of queries the view needs, starting with
+the session and user lookups every signed-in request makes.
+
+Time budgets are multiplied by the VIEW_BUDGET_TIME_FACTOR environment
+variable, e.g. 2 on a slow machine; 0 checks query counts only.
+"""
+import os
+import time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from users.models import UserProfile
+from utils.synthetic_data import generate_dataset
+
+# Enough rows for every list to fill a page and every detail view to have related rows
+BUDGET_VOLUMES = {
+    'stores': 3,
+    'suppliers': 5,
+    'parts_per_store': 40,
+    'scooters': 120,
+    'customers': 100,
+    'rentals': 300,
+    'job_cards': 120,
+    'purchases': 30,
+    'transfers': 30,
+    'alerts': 30,
+    'history_days': 120,
+}
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'view-budgets',
+}})
+class ViewBudgetTestCase(TestCase):
+    """Base class for view query/time budget tests, signed in as a superuser"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        generate_dataset(BUDGET_VOLUMES, seed=1, prefix='BUDGET')
+        # Superuser with full store access (inserted directly, as the profile is created here)
+        user = User(username='view-budget-check', is_superuser=True, is_staff=True)
+        user.set_unusable_password()
+        User.objects.bulk_create([user])
+        cls.user = User.objects.get(username='view-budget-check')
+        UserProfile.objects.create(user=cls.user)
+    
+    def setUp(self):
+        self.client.force_login(self.user)
+        # A first request that resolves the store scope caches it in the session,
+        # so the requests measured do not write the session
+        self.client.get(reverse('inventory:purchase_list'))
+    
+    def assertViewBudget(self, url_name, args=None, queries=None, max_ms=500):
+        """
+        Request a view with a cold cache and check its status, query count and time
+        
+        Args:
+            url_name: URL pattern name
+            args: URL arguments
+            queries: Exact number of queries the view needs
+            max_ms: Response time budget in milliseconds (before VIEW_BUDGET_TIME_FACTOR)
+        
+        Returns:
+            The response
+        """
+        url = reverse(url_name, args=args or [])
+        cache.clear()
+        
+        with self.assertNumQueries(queries):
+            start_time = time.perf_counter()
+            response = self.client.get(url)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+        
+        self.assertEqual(response.status_code, 200, url)
+        time_factor = float(os.environ.get('VIEW_BUDGET_TIME_FACTOR', 1))
+        if time_factor:
+            self.assertLessEqual(elapsed_ms, max_ms * time_factor, f'{url} took {elapsed_ms:.0f} ms')
+        return response
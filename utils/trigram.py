@@ -0,0 +1,47 @@
+"""
+pg_trgm indexes for search (see utils.search)
+
+Each index is a GIN trigram index on UPPER(column). On PostgreSQL Django's
+icontains and istartswith lookups compare UPPER(column) LIKE UPPER(pattern),
+which this index serves, so substring and prefix searches no longer scan
+the table. The indexes only exist on PostgreSQL: they are created by
+migrations through trigram_indexes() rather than declared in the models'
+Meta.indexes, which every backend would try to build.
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+def trigram_index(field, name):
+    """GIN trigram index on UPPER(field)"""
+    return GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=name)
+
+
+def trigram_indexes(app_label, indexes):
+    """
+    Migration operation creating trigram indexes on PostgreSQL (a no-op elsewhere)
+    
+    Args:
+        app_label: App the models belong to
+        indexes: (model name, field, index name) tuples
+    
+    Returns:
+        RunPython operation, reversible
+    """
+    def create(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for model_name, field, name in indexes:
+            schema_editor.add_index(apps.get_model(app_label, model_name), trigram_index(field, name))
+    
+    def drop(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        
+        for model_name, field, name in indexes:
+            schema_editor.remove_index(apps.get_model(app_label, model_name), trigram_index(field, name))
+    
+    return migrations.RunPython(create, drop)
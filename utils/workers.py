@@ -0,0 +1,79 @@
+"""
+Background worker helpers
+
+The long-running management commands (run_alert_worker,
+sweep_overdue_rentals, run_report_scheduler and run_export_worker) share
+run_worker_loop() for their poll/sleep loop. Workers whose runs are shown in
+the UI record each run on their WorkerStatus row with record_worker_run().
+"""
+import time
+import traceback
+from django.db import close_old_connections
+from django.utils import timezone
+from inventory.models import WorkerStatus
+
+
+def record_worker_run(worker, run, interval_seconds=300):
+    """
+    Run one cycle of a worker and record it on the worker's WorkerStatus row
+    
+    Args:
+        worker: One of WorkerStatus.WORKER_CHOICES
+        run: Callable doing the work and returning a dict of counts
+        interval_seconds: Seconds until the worker's next run
+    
+    Returns:
+        dict: The counts returned by run, or an empty dict if it raised
+    """
+    started = timezone.now()
+    start_time = time.monotonic()
+    counts = {}
+    error = ''
+    
+    try:
+        counts = run()
+    except Exception:
+        # Keep the worker alive; the error is surfaced through the status row
+        error = traceback.format_exc()
+    
+    finished = timezone.now()
+    WorkerStatus.objects.update_or_create(
+        worker=worker,
+        defaults={
+            'last_run_started': started,
+            'last_run_finished': finished,
+            'next_run': finished + timezone.timedelta(seconds=interval_seconds),
+            'interval_seconds': interval_seconds,
+            'counts': counts,
+            'duration_seconds': time.monotonic() - start_time,
+            'last_error': error,
+        }
+    )
+    
+    return counts
+
+
+def run_worker_loop(command, name, step, interval, run_once=False):
+    """
+    Call `step` until the worker is stopped with Ctrl+C
+    
+    Args:
+        command: Management command, for its output
+        name: Worker name shown in the stop message, e.g. 'Alert worker'
+        step: Callable doing one round of work; it returns True when more
+            work is waiting, to be called again without sleeping
+        interval: Seconds slept after a round that left no work waiting
+        run_once: Return once a round leaves no work waiting (for cron/systemd timers)
+    """
+    try:
+        while True:
+            # Long-running process: drop connections the database may have closed
+            close_old_connections()
+            
+            if step():
+                continue
+            if run_once:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        command.stdout.write(command.style.SUCCESS(f'{name} stopped.'))